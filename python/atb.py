@@ -3,15 +3,31 @@ from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import mysql.connector
+import argparse
+import functools
 import time
 import random
-import csv
 import os
 import subprocess
-import re
-from config import host, user, password, db_name, port
+from urllib.parse import urlparse
+from parsers import parse_atb_page
+from parallel import crawl_parallel, start_headless_edge
+from browser_pool import DEFAULT_MAX_PAGES, ManagedDriver, start_headless_chromium
+from page_archive import archive_page, replay_archive
+from js_extract import extract_with_js
+from pipeline import BackgroundWriter, CsvSink, DatabaseSink, ParquetSink, export_formats
+from rate_limiter import default_limiter
+from metrics import METRICS_DIR, default_metrics
+from units import UNIT_COLUMNS, normalize_batch
+from search import SEARCH_COLUMNS, index_batch
+from atb_http import crawl_http, parse_cookies
+from checkpoint import CrawlJournal
+from recrawl import RecrawlScheduler
+from work_queue import IDLE_EXIT, QUEUE_TIMEOUT, TaskError, WorkQueue, crawl_queue, follow_pages, page_url, run_workers
+from images import update_product_images
+from matching import rebuild_matches
+from storage import DEFAULT_BATCH_SIZE, IDENTITY_COLUMNS, with_identity, staging_table
+from backends import SQLITE_PATH, open_backend
 
 def start_browser():
     """Запускає браузер Edge у режимі віддаленого налагодження"""
@@ -19,91 +35,86 @@ def start_browser():
     time.sleep(3)
     print("🟢 Браузер успішно запущено")
 
-def clear_database(conn):
+def clear_database(db):
     """Очищає базу даних перед початком роботи"""
-    if conn:
-        cursor = conn.cursor()
+    if db:
         try:
-            cursor.execute("DELETE FROM atb_products")
-            conn.commit()
+            db.clear('atb_products')
             print("🗑️ Базу даних очищено")
         except Exception as e:
-            conn.rollback()
             print(f"🔴 Помилка очищення бази даних: {e}")
-        finally:
-            cursor.close()
 
-def connect_to_database():
-    """Підключається до бази даних MySQL"""
-    try:
-        conn = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=db_name,
-            port=port,
-        )
-        print("🟢 Підключено до бази даних MySQL")
-        return conn
-    except Exception as e:
-        print(f"🔴 Помилка підключення до MySQL: {e}")
-        return None
+def connect_to_database(allow_local_infile=False, backend='mysql', sqlite_path=SQLITE_PATH, pool_size=4):
+    """Відкриває сховище: пул з'єднань MySQL або локальну базу SQLite"""
+    db = open_backend(backend, sqlite_path, pool_size, allow_local_infile)
+    if db:
+        print("🟢 Підключено до бази даних " + ("MySQL" if backend == 'mysql' else f"SQLite ({sqlite_path})"))
+    return db
+
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS atb_products (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(500) NOT NULL,
+        price DECIMAL(10,2) NOT NULL,
+        price_bot DECIMAL(10,2),
+        discount VARCHAR(50),
+        unit VARCHAR(10),
+        quantity DECIMAL(10,3),
+        image_url VARCHAR(512),
+        category VARCHAR(100),
+        product_key CHAR(40) NULL,
+        content_hash CHAR(40) NULL,
+        base_unit VARCHAR(4) NULL,
+        base_quantity DECIMAL(12,4) NULL,
+        price_per_kg_or_l DECIMAL(12,2) NULL,
+        old_price_per_kg_or_l DECIMAL(12,2) NULL,
+        search_text VARCHAR(800) NULL,
+        image_path VARCHAR(100) NULL,
+        is_available BOOLEAN DEFAULT TRUE,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE INDEX uq_product_key (product_key),
+        INDEX idx_unit_price (base_unit, price_per_kg_or_l),
+        FULLTEXT INDEX ft_search (search_text) WITH PARSER ngram,
+        INDEX idx_category (category),
+        INDEX idx_price (price)
+    ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+COLUMNS = ('name', 'price', 'price_bot', 'discount', 'unit', 'quantity', 'image_url', 'category') + UNIT_COLUMNS + SEARCH_COLUMNS
 
-def save_to_database(conn, products):
-    """Зберігає товари у базу даних"""
-    if not conn:
+def prepare_database(db, incremental=True):
+    """Готує таблицю: проміжну для інкрементального режиму або очищену для повного"""
+    db.prepare('atb_products', TABLE_DDL, incremental)
+    if not incremental:
+        clear_database(db)
+
+def save_to_database(db, products, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False, incremental=False):
+    """Зберігає товари у базу даних пачками
+
+    В інкрементальному режимі товари пишуться у проміжну таблицю, яку потім
+    зливає з основною db.merge. Кожен виклик бере окреме з'єднання сховища,
+    тож кілька пачок можуть писатися одночасно.
+    """
+    if not db:
         return
     
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS atb_products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(500) NOT NULL,
-                price DECIMAL(10,2) NOT NULL,
-                price_bot DECIMAL(10,2),
-                discount VARCHAR(50),
-                unit VARCHAR(10),
-                quantity DECIMAL(10,3),
-                image_url VARCHAR(512),
-                category VARCHAR(100),
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_category (category),
-                INDEX idx_price (price)
-            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
-        """)
-        
-        for product in products:
-            # Обробка знижки (якщо є)
-            discount_text = product.get('discount').get_text(strip=True) if product.get('discount') else None
-            # Обробка ціни price_bot (якщо є)
-            price_bot = float(product['price_bot']['value']) if product.get('price_bot') and 'value' in product['price_bot'].attrs else None
-            
-            cursor.execute("""
-                INSERT INTO atb_products 
-                (name, price, price_bot, discount, unit, quantity, image_url, category)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                product.get('name'),
-                product.get('price'),
-                price_bot,
-                discount_text,
-                product.get('unit'),
-                product.get('quantity'),
-                product.get('image_url'),
-                product.get('category')
-            ))
-        
-        conn.commit()
+        with default_metrics.timer('normalize', store='atb'):
+            normalize_batch(products)
+            index_batch(products)
+            rows = [tuple(getattr(product, column) for column in COLUMNS) for product in products]
+        with default_metrics.timer('db_write', store='atb'):
+            if incremental:
+                db.insert(staging_table('atb_products'), COLUMNS + IDENTITY_COLUMNS,
+                          with_identity('atb', COLUMNS, rows), batch_size, use_load_data,
+                          ignore_duplicates=True)
+            else:
+                db.insert('atb_products', COLUMNS, rows, batch_size, use_load_data)
         print(f"💾 Збережено {len(products)} товарів у БД")
     except Exception as e:
-        conn.rollback()
         print(f"🔴 Помилка запису в БД: {e}")
         import traceback
         traceback.print_exc()  # Друкуємо повний traceback помилки
-    finally:
-        cursor.close()
 
 def connect_to_existing_edge():
     """Підключається до вже запущеного браузера Edge"""
@@ -122,193 +133,427 @@ def human_like_delay(min=1, max=3):
     delay = random.uniform(min, max)
     time.sleep(delay)
 
-def extract_weight_and_unit(text):
-    """Витягує вагу та одиницю виміру з тексту"""
-    weight_match = re.search(r'(\d+[,.]?\d*)\s*([а-яґєіїa-z]{1,3}\b)', text, re.IGNORECASE)
-    if weight_match:
-        quantity = float(weight_match.group(1).replace(',', '.'))
-        unit = weight_match.group(2).lower()
-        return quantity, unit
-    return None, None
-
-def extract_products(driver):
-    """Витягує дані про товари з поточної сторінки"""
+def extract_page(driver, engine=None, archive_key=None, js=False):
+    """Витягує товари з поточної сторінки та кількість сторінок категорії з пагінації"""
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "article.catalog-item"))
-        )
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        products = soup.find_all('article', class_='catalog-item')
-        extracted = []
-        
-        for product in products:
-            try:
-                # Назва товару
-                name_tag = product.find('div', class_='catalog-item__title')
-                name = name_tag.get_text(strip=True) if name_tag else None
-                if not name:
-                    continue
-                
-                # Ціна
-                price_data = product.find('data', class_='product-price__top')
-                price = float(price_data['value']) if price_data and 'value' in price_data.attrs else None
-                if price is None:
-                    continue
-                # Скидочка
-                price_bot = product.find('data', class_='product-price__bottom')
-                discount = product.find('span', class_='custom-product-label')
-                # Одиниця виміру
-                unit_span = product.find('span', class_='product-price__unit')
-                unit = unit_span.get_text(strip=True)[1:] if unit_span else None
-                
-                # Витягуємо вагу/кількість з назви
-                quantity, extracted_unit = extract_weight_and_unit(name)
-                if extracted_unit:
-                    unit = extracted_unit
-                elif unit == "шт":
-                    quantity = 1
-                else:
-                    quantity = None
-                
-                # Зображення
-                img_tag = product.find('img', class_='catalog-item__img')
-                image_url = img_tag['src'] if img_tag and 'src' in img_tag.attrs else None
-                if image_url and not image_url.startswith(('http', '//')):
-                    image_url = f"https://www.atbmarket.com{image_url}"
-                
-                extracted.append({
-                    'name': name,
-                    'price': price,
-                    'price_bot': price_bot,
-                    'discount': discount,
-                    'unit': unit,
-                    'quantity': quantity,
-                    'image_url': image_url
-                })
-                
-            except Exception as e:
-                print(f"⚠️ Помилка парсингу товару: {e}")
-                continue
-                
+        with default_metrics.timer('wait'):
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "article.catalog-item"))
+            )
+        html = None
+        if archive_key or not js:
+            # page_source передається з браузера один раз і для архіву, і для розбору
+            with default_metrics.timer('page_source'):
+                html = driver.page_source
+        if archive_key:
+            # archive_key = (категорія, номер сторінки, url)
+            with default_metrics.timer('archive'):
+                archive_page('atb', *archive_key, html)
+        if js:
+            # Один execute_script замість передачі та розбору всього DOM
+            with default_metrics.timer('js_extract'):
+                extracted, page_count = extract_with_js(driver, 'atb')
+        else:
+            with default_metrics.timer('parse'):
+                extracted, page_count = parse_atb_page(html, engine)
         print(f"🔍 Знайдено товарів на сторінці: {len(extracted)}")
-        return extracted
+        return extracted, page_count
         
     except Exception as e:
+        default_metrics.count('errors')
         print(f"🔴 Помилка витягування товарів: {e}")
-        return []
+        return [], None
 
-def process_category(driver, base_url, category_name, min_products=36, max_pages=17):
-    """Обробляє всі сторінки вказаної категорії"""
-    all_products = []
-    current_page = 1
-    has_next_page = True
-    
-    while has_next_page and current_page <= max_pages:
-        url = f"{base_url}?page={current_page}" if current_page > 1 else base_url
-        print(f"\n📄 Обробляємо сторінку {current_page}: {url}")
+def extract_products(driver, engine=None, archive_key=None):
+    """Витягує дані про товари з поточної сторінки"""
+    return extract_page(driver, engine, archive_key)[0]
+
+def load_page(driver, url, category_name, current_page, archive=True, js=False):
+    """Завантажує сторінку категорії в браузері та повертає (товари, кількість сторінок)"""
+    with default_metrics.page('atb', category_name, current_page):
+        with default_metrics.timer('delay'):
+            default_limiter.wait(url)
+        started = time.monotonic()
+        with default_metrics.timer('load'):
+            driver.get(url)
+        load_time = time.monotonic() - started
         
+        # Обробка підтвердження віку (якщо є)
         try:
-            driver.get(url)
-            human_like_delay(2, 4)
-            
-            # Обробка підтвердження віку (якщо є)
-            try:
+            with default_metrics.timer('age_gate'):
                 age_btn = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "button.custom-blue-btn"))
                 )
-                age_btn.click()
-                print("🔞 Підтверджено вік")
+            age_btn.click()
+            print("🔞 Підтверджено вік")
+            with default_metrics.timer('human_delay'):
                 human_like_delay()
-            except:
-                pass
-                
-            products = extract_products(driver)
+        except:
+            pass
+            
+        products, page_count = extract_page(driver, archive_key=(category_name, current_page, url) if archive else None,
+                                            js=js)
+        default_limiter.record(url, load_time, len(products))
+        default_metrics.count('pages')
+        default_metrics.count('products', len(products))
+    return products, page_count
+
+def iter_category_pages(driver, base_url, category_name, min_products=36, max_pages=17, archive=True,
+                        js=False, journal=None, scheduler=None):
+    """Обробляє сторінки категорії, віддаючи товари кожної сторінки окремою пачкою
+
+    Кількість сторінок береться з пагінації першої сторінки, і далі завантажуються
+    рівно ці сторінки. Якщо пагінацію не знайдено, наступна сторінка
+    запитується лише після повної сторінки (min_products товарів).
+    Сторінки, вже записані в journal, беруться з нього без завантаження.
+    scheduler (RecrawlScheduler) зупиняє обхід, якщо перші сторінки не змінилися.
+    """
+    pending = [1]
+    known_pages = False
+    complete = True
+    short_circuited = False
+    total = 0
+    
+    while pending:
+        current_page = pending.pop(0)
+        url = page_url(base_url, current_page)
+        
+        try:
+            saved = journal.load_page(category_name, current_page) if journal else None
+            if saved:
+                products, page_count = saved
+                default_metrics.count('resumed_pages', store='atb', category=category_name)
+                print(f"\n♻️ Сторінка {current_page} з журналу: {len(products)} товарів")
+            else:
+                print(f"\n📄 Обробляємо сторінку {current_page}: {url}")
+                products, page_count = load_page(driver, url, category_name, current_page, archive, js)
+            if current_page == 1 and page_count:
+                known_pages = True
+                pending = list(range(2, min(page_count, max_pages) + 1))
+                print(f"📑 Сторінок у категорії: {page_count}")
+            
             if not products:
+                default_metrics.count('empty_pages', store='atb', category=category_name)
                 print("⚠️ Товари не знайдено")
+                # Сторінка без товарів — збій завантаження, тож категорію обійдено не повністю
+                if known_pages or current_page == 1:
+                    complete = False
+                if known_pages:
+                    continue
                 break
                 
-            all_products.extend(products)
+            for product in products:
+                product.category = category_name
+            if journal and not saved:
+                journal.record_page(category_name, current_page, products, page_count)
+            unchanged = scheduler.check_page(category_name, current_page, products, page_count) \
+                if scheduler and not saved else False
+            total += len(products)
+            yield products
             
-            if len(products) < min_products:
-                print(f"⚠️ На сторінці лише {len(products)} товарів")
+            if unchanged:
+                short_circuited = True
+                print(f"⏩ Перші {scheduler.unchanged_pages} сторінки без змін, "
+                      f"решту сторінок категорії пропущено")
                 break
-                
-            current_page += 1
-            human_like_delay(3, 5)
+            
+            if not known_pages:
+                if len(products) < min_products:
+                    print(f"⚠️ На сторінці лише {len(products)} товарів")
+                elif current_page < max_pages:
+                    pending.append(current_page + 1)
             
         except Exception as e:
+            complete = False
+            default_metrics.count('errors', store='atb', category=category_name)
             print(f"🔴 Помилка обробки сторінки: {e}")
-            break
-    
-    for product in all_products:
-        product['category'] = category_name
+            if not known_pages:
+                break
     
-    print(f"✅ Всього зібрано товарів у категорії '{category_name}': {len(all_products)}")
-    return all_products
+    if journal and complete:
+        journal.complete_category(category_name)
+    if scheduler:
+        scheduler.finish_category(category_name, short_circuited)
+    print(f"✅ Всього зібрано товарів у категорії '{category_name}': {total}")
 
-def main():
-    """Головна функція парсингу"""
-    categories = [
-        ("Овочі та фрукти", "https://www.atbmarket.com/catalog/287-ovochi-ta-frukti"),
-        ("Бакалія", "https://www.atbmarket.com/catalog/285-bakaliya"),
-        ("Молочні продукти", "https://www.atbmarket.com/catalog/molocni-produkti-ta-ajca"),
-        ("М'ясо", "https://www.atbmarket.com/catalog/maso"),
-        ("Сири", "https://www.atbmarket.com/catalog/siri"),
-        ("Риба та морепродукти", "https://www.atbmarket.com/catalog/353-riba-i-moreprodukti"),
-        ("Хлібобулочні вироби", "https://www.atbmarket.com/catalog/325-khlibobulochni-virobi"),
-        ("Заморожені продукти", "https://www.atbmarket.com/catalog/322-zamorozheni-produkti"),
-        ("Ковбаси та м'ясні делікатеси", "https://www.atbmarket.com/catalog/360-kovbasa-i-m-yasni-delikatesi"),
-    ]
-    
-    # Підключення до БД
-    start_browser()
-    db_conn = connect_to_database()
-    if db_conn:
-        clear_database(db_conn)
-    
-    driver = connect_to_existing_edge()
+def process_category(driver, base_url, category_name, min_products=36, max_pages=17, archive=True, js=False,
+                     journal=None, scheduler=None):
+    """Обробляє всі сторінки вказаної категорії"""
+    pages = iter_category_pages(driver, base_url, category_name, min_products, max_pages, archive, js, journal,
+                                scheduler)
+    return [product for products in pages for product in products]
+
+def process_task(driver, task, min_products=36, max_pages=17, archive=True, js=False):
+    """Обробляє одну сторінку із черги завдань: (товари, кількість сторінок, наступні сторінки)"""
+    url = page_url(task.url, task.page)
+    print(f"\n📄 {task.category}, сторінка {task.page}: {url}")
+    products, page_count = load_page(driver, url, task.category, task.page, archive, js)
+    if not products:
+        raise TaskError(f"{url}: на сторінці немає карток товарів")
+    for product in products:
+        product.category = task.category
+    return products, page_count, follow_pages(task.page, products, page_count, min_products, max_pages)
+
+CATEGORIES = [
+    ("Овочі та фрукти", "https://www.atbmarket.com/catalog/287-ovochi-ta-frukti"),
+    ("Бакалія", "https://www.atbmarket.com/catalog/285-bakaliya"),
+    ("Молочні продукти", "https://www.atbmarket.com/catalog/molocni-produkti-ta-ajca"),
+    ("М'ясо", "https://www.atbmarket.com/catalog/maso"),
+    ("Сири", "https://www.atbmarket.com/catalog/siri"),
+    ("Риба та морепродукти", "https://www.atbmarket.com/catalog/353-riba-i-moreprodukti"),
+    ("Хлібобулочні вироби", "https://www.atbmarket.com/catalog/325-khlibobulochni-virobi"),
+    ("Заморожені продукти", "https://www.atbmarket.com/catalog/322-zamorozheni-produkti"),
+    ("Ковбаси та м'ясні делікатеси", "https://www.atbmarket.com/catalog/360-kovbasa-i-m-yasni-delikatesi"),
+]
+
+def crawl_sequential(categories, archive=True, js=False, journal=None, make_driver=None, scheduler=None):
+    """Послідовно обробляє категорії в одному браузері, віддаючи пачки по сторінках
+
+    Без make_driver запускається Edge з портом 9222, інакше браузер створює make_driver
+    (наприклад, керований headless Chromium з browser_pool).
+    """
+    if make_driver:
+        driver = make_driver()
+    else:
+        start_browser()
+        driver = connect_to_existing_edge()
     if not driver:
         return
     
     try:
-        all_products = []
-        
         for category_name, url in categories:
-            products = process_category(driver, url, category_name)
-            if products:
-                all_products.extend(products)
-                # Збереження в БД
-                if db_conn:
-                    save_to_database(db_conn, products)
-            
-            human_like_delay(5, 8)
-        
-        # Збереження в CSV
-        if all_products:
-            info_folder = os.path.join(os.path.dirname(__file__), 'info')
-            os.makedirs(info_folder, exist_ok=True)
-            csv_path = os.path.join(info_folder, 'atb_products.csv')
-            
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'category', 'name', 'price', 'unit', 
-                    'quantity', 'image_url'
-                ])
-                writer.writeheader()
-                writer.writerows(all_products)
-            
-            print(f"💾 Дані збережено у файл: {csv_path}")
-            
-    except Exception as e:
-        print(f"🔴 Критична помилка: {e}")
+            for products in iter_category_pages(driver, url, category_name, archive=archive, js=js,
+                                                journal=journal, scheduler=scheduler):
+                yield category_name, products
     finally:
         driver.quit()
         print("🛑 Браузер закрито")
-        if db_conn:
-            db_conn.close()
+        default_limiter.report()
+
+def main(workers=1, per_host=2, http=False, concurrency=4, base_url=None,
+         batch_size=DEFAULT_BATCH_SIZE, use_load_data=False, incremental=True,
+         archive=True, replay=False, js=False, export=export_formats()[0], metrics_dir=METRICS_DIR,
+         resume=False, browser='edge', session_pages=DEFAULT_MAX_PAGES, backend='mysql',
+         sqlite_path=SQLITE_PATH, db_writers=None, schedule=False, images=False, queue=False, age_cookie=None,
+         queue_timeout=QUEUE_TIMEOUT, match=False):
+    """Головна функція парсингу
+
+    З resume=True сторінки незавершеного запуску беруться з журналу checkpoint,
+    а обхід продовжується з місця збою. Таблиця наповнюється заново з журналу,
+    тож повне перезавантаження (clear_database) теж безпечне.
+    З queue=True сторінки обробляють воркери (run_queue_worker) на будь-яких
+    машинах через спільну чергу в БД, а тут лише записуються їхні результати.
+    """
+    # Підключення до БД
+    # Кілька потоків запису для паралельного обходу, кожен зі своїм з'єднанням пулу
+    db_writers = db_writers or workers
+    db = connect_to_database(allow_local_infile=use_load_data, backend=backend, sqlite_path=sqlite_path,
+                             pool_size=db_writers + 1)
+    if db:
+        prepare_database(db, incremental)
+    elif queue:
+        print("🔴 Черзі завдань потрібна БД")
+        return
+    
+    # Журнал завершених сторінок для --resume (архів і так відтворюється повністю; черга зберігає стан сама)
+    task_queue = WorkQueue(db, 'atb') if queue and not replay else None
+    journal = None if replay or task_queue else CrawlJournal('atb', resume=resume)
+    # Розклад за частотою змін: лише категорії, час яких настав (і незавершені з журналу)
+    scheduler = RecrawlScheduler('atb') if schedule and not replay else None
+    categories = CATEGORIES
+    if scheduler:
+        due = scheduler.due(CATEGORIES)
+        pending = journal.categories() if resume and journal else set()
+        categories = [(name, url) for name, url in CATEGORIES if (name, url) in due or name in pending]
+    # Керований headless Chromium замість Edge, запущеного вручну
+    make_driver = None
+    if browser == 'chromium':
+        make_driver = functools.partial(ManagedDriver, start_headless_chromium, session_pages)
+    # Категорії, обробку яких перервала помилка в сеансі --workers
+    parallel_failed = set()
+    
+    if replay:
+        # Повторний розбір архіву без мережі та браузера
+        results = replay_archive('atb', CATEGORIES)
+    elif task_queue:
+        results = crawl_queue(task_queue, categories, resume, scheduler, timeout=queue_timeout)
+    elif http:
+        # Браузер запускається лише для категорій, які не вдалося отримати через HTTP
+        results = crawl_http(categories, concurrency, base_url, archive=archive, journal=journal,
+                             scheduler=scheduler, cookies=parse_cookies(age_cookie) if age_cookie else None,
+                             fallback=functools.partial(crawl_sequential, archive=archive, js=js,
+                                                        journal=journal, make_driver=make_driver,
+                                                        scheduler=scheduler))
+    elif workers > 1:
+        results = crawl_parallel(functools.partial(iter_category_pages, archive=archive, js=js, journal=journal,
+                                                   scheduler=scheduler),
+                                 categories, workers, per_host,
+                                 make_driver or functools.partial(ManagedDriver, start_headless_edge, session_pages),
+                                 failed=parallel_failed)
+    else:
+        results = crawl_sequential(categories, archive, js, journal, make_driver, scheduler)
+    
+    # Запис у БД та файл у фоновому потоці, поки браузер завантажує наступні сторінки
+    if export == 'parquet':
+        sinks = [ParquetSink('atb')]
+    else:
+        sinks = [CsvSink(os.path.join(os.path.dirname(__file__), 'info', 'atb_products.csv'),
+                         ['category', 'name', 'price', 'unit', 'quantity', 'image_url'])]
+    if db:
+        sinks.append(DatabaseSink(functools.partial(
+            save_to_database, db, batch_size=batch_size,
+            use_load_data=use_load_data, incremental=incremental), writers=db_writers))
+    writer = BackgroundWriter(sinks)
+    
+    try:
+        for category_name, products in results:
+            writer.put(products)
+    except Exception as e:
+        print(f"🔴 Критична помилка: {e}")
+    finally:
+        written = writer.close()
+        # Не повністю обійдені категорії: відсутні в них товари не позначаються зниклими
+        partial = set(parallel_failed)
+        if journal:
+            journal.finish(categories)
+            partial.update(journal.incomplete(categories))
+            journal.close()
+        if task_queue:
+            partial.update(task_queue.failed_categories())
+        if scheduler:
+            # Збої та блокування не відсувають категорію на весь інтервал розкладу
+            scheduler.retry_soon(partial)
+            partial.update(scheduler.short_circuited())
+            scheduler.close()
+        try:
+            # Перенесення змін в основну таблицю
+            if db and incremental and written:
+                with default_metrics.timer('db_merge', store='atb'):
+                    db.merge('atb_products', COLUMNS, store='atb', partial_categories=sorted(partial))
+        except Exception as e:
+            print(f"🔴 Помилка злиття змін: {e}")
+        try:
+            # Локальні копії зображень нових і змінених товарів
+            if db and images and written:
+                with default_metrics.timer('images', store='atb'):
+                    update_product_images(db, 'atb_products')
+        except Exception as e:
+            print(f"🔴 Помилка завантаження зображень: {e}")
+        try:
+            # Пари ATB↔Silpo за свіжими товарами обох магазинів
+            if db and match and written:
+                with default_metrics.timer('matching', store='atb'):
+                    rebuild_matches(db)
+        except Exception as e:
+            print(f"🔴 Помилка зіставлення товарів: {e}")
+        if db:
+            db.close()
             print("🛑 З'єднання з БД закрито")
+        json_path, _ = default_metrics.write_reports('atb', metrics_dir)
+        print(f"⏱️ Час етапів, с: {default_metrics.summary()}")
+        print(f"📊 Звіт запуску: {json_path}")
+
+def run_queue_worker(workers=1, per_host=2, archive=True, js=False, browser='edge',
+                     session_pages=DEFAULT_MAX_PAGES, backend='mysql', sqlite_path=SQLITE_PATH,
+                     idle_exit=IDLE_EXIT, metrics_dir=METRICS_DIR):
+    """Воркер спільної черги: обробляє сторінки ATB, доки координатор (--queue) додає завдання
+
+    Можна запускати на кількох машинах з однією БД; workers — кількість headless-сеансів тут.
+    """
+    if browser == 'chromium':
+        make_driver = functools.partial(ManagedDriver, start_headless_chromium, session_pages)
+    else:
+        # Edge теж у керованому сеансі: перезапуск після збою чи session_pages сторінок
+        make_driver = functools.partial(ManagedDriver, start_headless_edge, session_pages)
+    done = run_workers(functools.partial(open_backend, backend, sqlite_path, 2), 'atb',
+                       functools.partial(process_task, archive=archive, js=js), make_driver, workers,
+                       {urlparse(url).netloc for _, url in CATEGORIES}, per_host, idle_exit)
+    default_limiter.report()
+    json_path, _ = default_metrics.write_reports('atb_worker', metrics_dir)
+    print(f"✅ Виконано завдань черги: {done}")
+    print(f"📊 Звіт воркера: {json_path}")
 
 if __name__ == "__main__":
-    print("🚀 Запуск парсера ATB Market")
-    main()
+    parser = argparse.ArgumentParser(description="Парсер ATB Market")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="кількість паралельних headless-сеансів (1 — один браузер на порту 9222)")
+    parser.add_argument('--per-host', type=int, default=2,
+                        help="максимум одночасних завантажень сторінок на сайт")
+    parser.add_argument('--http', action='store_true',
+                        help="завантажувати сторінки через HTTP без браузера (Selenium лише як запасний варіант)")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="максимум одночасних HTTP-запитів у режимі --http")
+    parser.add_argument('--base-url',
+                        help="замінити адресу сайту, наприклад локальним сервером із збереженими сторінками")
+    parser.add_argument('--age-cookie',
+                        help="cookie підтвердження віку для --http у вигляді назва=значення "
+                             "(за замовчуванням ATB_AGE_COOKIE або age_confirmed=1)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="кількість рядків в одному INSERT")
+    parser.add_argument('--load-data', action='store_true',
+                        help="записувати через LOAD DATA LOCAL INFILE")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="очистити таблицю й завантажити все заново замість інкрементального оновлення")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="не зберігати завантажені сторінки в архів")
+    parser.add_argument('--replay', action='store_true',
+                        help="розібрати сторінки з архіву замість обходу сайту")
+    parser.add_argument('--js-extract', action='store_true',
+                        help="витягувати картки JavaScript-функцією в браузері (разом із --no-archive "
+                             "page_source не передається взагалі)")
+    parser.add_argument('--export', choices=export_formats(), default=export_formats()[0],
+                        help="формат файлу з товарами: Parquet з розділами store/date/category або CSV")
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help="тека для JSON-звіту та файлу Prometheus textfile collector")
+    parser.add_argument('--resume', action='store_true',
+                        help="продовжити перерваний запуск: завершені сторінки взяти з журналу")
+    parser.add_argument('--browser', choices=['edge', 'chromium'], default='edge',
+                        help="edge — браузер з портом 9222 (або headless Edge для --workers); chromium — "
+                             "керовані headless-сеанси без зображень, шрифтів і лічильників")
+    parser.add_argument('--session-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help="після скількох сторінок перезапускати сеанс Chromium або headless Edge (--workers, воркери черги)")
+    parser.add_argument('--db', choices=['mysql', 'sqlite'], default='mysql',
+                        help="сховище: пул з'єднань MySQL або локальна база SQLite (WAL)")
+    parser.add_argument('--sqlite-path', default=SQLITE_PATH,
+                        help="файл бази для --db sqlite")
+    parser.add_argument('--db-writers', type=int,
+                        help="кількість потоків запису в БД (за замовчуванням — як --workers)")
+    parser.add_argument('--schedule', action='store_true',
+                        help="обходити лише категорії, час яких настав за частотою змін, і зупиняти "
+                             "категорію, якщо перші сторінки не змінилися")
+    parser.add_argument('--images', action='store_true',
+                        help="після запису завантажити зображення нових товарів у локальний кеш з мініатюрами")
+    parser.add_argument('--match', action='store_true',
+                        help="після запису перебудувати пари ATB↔Silpo (product_matches); вмикати для "
+                             "парсера, що запускається другим, коли товари обох магазинів уже записано")
+    parser.add_argument('--queue', action='store_true',
+                        help="координатор: поставити категорії в спільну чергу в БД і записувати сторінки, "
+                             "які обробили воркери (з --resume — продовжити незавершену чергу)")
+    parser.add_argument('--queue-worker', action='store_true',
+                        help="воркер: брати сторінки зі спільної черги (--db має вказувати на ту саму БД); "
+                             "можна запускати на кількох машинах, --workers — сеансів на цій машині")
+    parser.add_argument('--idle-exit', type=int, default=IDLE_EXIT,
+                        help="через скільки секунд без завдань воркер завершується")
+    parser.add_argument('--queue-timeout', type=int, default=QUEUE_TIMEOUT,
+                        help="через скільки секунд координатор перестає чекати воркерів; незавершені "
+                             "сторінки позначаються невдалими (продовжити: --queue --resume)")
+    args = parser.parse_args()
+    
+    if args.queue_worker:
+        print("🚀 Запуск воркера черги ATB Market")
+        run_queue_worker(workers=args.workers, per_host=args.per_host, archive=not args.no_archive,
+                         js=args.js_extract, browser=args.browser, session_pages=args.session_pages,
+                         backend=args.db, sqlite_path=args.sqlite_path, idle_exit=args.idle_exit,
+                         metrics_dir=args.metrics_dir)
+    else:
+        print("🚀 Запуск парсера ATB Market")
+        main(workers=args.workers, per_host=args.per_host, http=args.http,
+             concurrency=args.concurrency, base_url=args.base_url,
+             batch_size=args.batch_size, use_load_data=args.load_data,
+             incremental=not args.full_reload, archive=not args.no_archive, replay=args.replay,
+             js=args.js_extract, export=args.export, metrics_dir=args.metrics_dir, resume=args.resume,
+             browser=args.browser, session_pages=args.session_pages,
+             backend=args.db, sqlite_path=args.sqlite_path, db_writers=args.db_writers,
+             schedule=args.schedule, images=args.images, queue=args.queue, age_cookie=args.age_cookie,
+             queue_timeout=args.queue_timeout, match=args.match)
     print("🏁 Роботу завершено")
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+import aiohttp
+from http_client import FetchError, fetch_page, rebase_url
+from parsers import parse_atb_page
+from page_archive import archive_page
+from metrics import default_metrics
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36 Edg/124.0"),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "uk-UA,uk;q=0.9",
+}
+
+
+def parse_cookies(text):
+    """Cookie з рядка "назва=значення; назва2=значення2" у словник"""
+    pairs = (item.strip().split('=', 1) for item in text.split(';') if '=' in item)
+    return {name.strip(): value.strip() for name, value in pairs}
+
+
+# Cookie підтвердження віку (button.custom-blue-btn). Назву age_confirmed не перевірено
+# на справжньому сайті — це припущення. Актуальну cookie скопіюйте з браузера після
+# підтвердження та задайте через ATB_AGE_COOKIE="назва=значення" або --age-cookie.
+# Якщо cookie не спрацює, сторінка без карток дає FetchError і категорія йде в браузер.
+AGE_GATE_COOKIES = parse_cookies(os.environ.get('ATB_AGE_COOKIE', 'age_confirmed=1'))
+# Скільки завантажених сторінок може чекати на запис; далі завантаження чекають
+PAGE_BUFFER = 8
+_DONE = object()
+
+async def fetch_category(session, semaphore, base_url, category_name, on_page, min_products=36, max_pages=17,
+                         archive=True, journal=None, scheduler=None):
+    """Обробляє всі сторінки категорії через HTTP і повертає кількість товарів
+
+    Товари кожної сторінки передаються в корутину on_page(назва, товари), щойно
+    сторінку розібрано, тож категорія не накопичується в пам'яті.
+
+    Після першої сторінки решта сторінок з пагінації завантажується паралельно.
+    Без пагінації сторінки йдуть послідовно, доки вони повні (min_products).
+    Сторінки, вже записані в journal, беруться з нього без запиту; категорія з
+    порожньою сторінкою не позначається в journal завершеною. scheduler лише
+    записує відбитки сторінок і частоту змін: сторінки тут завантажуються паралельно,
+    тож обхід не зупиняється після незмінних перших сторінок.
+    """
+    async def fetch(current_page):
+        saved = journal.load_page(category_name, current_page) if journal else None
+        if saved:
+            default_metrics.count('resumed_pages', store='atb', category=category_name)
+            print(f"♻️ {category_name}, сторінка {current_page} з журналу: {len(saved[0])} товарів")
+            return saved
+        url = f"{base_url}?page={current_page}" if current_page > 1 else base_url
+        started = time.perf_counter()
+        html = await fetch_page(session, semaphore, url)
+        default_metrics.observe('http_fetch', time.perf_counter() - started, 'atb', category_name, current_page)
+        # Синхронний блок без await: мітки потоку не змішуються між задачами
+        with default_metrics.page('atb', category_name, current_page):
+            if archive:
+                with default_metrics.timer('archive'):
+                    archive_page('atb', category_name, current_page, url, html)
+            with default_metrics.timer('parse'):
+                products, page_count = parse_atb_page(html)
+            default_metrics.count('pages')
+            default_metrics.count('products', len(products))
+        print(f"📄 {category_name}, сторінка {current_page}: {len(products)} товарів")
+        if journal and products:
+            journal.record_page(category_name, current_page, products, page_count)
+        if scheduler and products:
+            scheduler.check_page(category_name, current_page, products, page_count)
+        return products, page_count
+
+    async def emit(products):
+        for product in products:
+            product.category = category_name
+        await on_page(category_name, products)
+        return len(products)
+
+    products, page_count = await fetch(1)
+    if not products:
+        raise FetchError(f"{base_url}: на сторінці немає карток товарів")
+    total = await emit(products)
+    complete = True
+
+    if page_count:
+        for page in asyncio.as_completed([fetch(page) for page in range(2, min(page_count, max_pages) + 1)]):
+            page_products, _ = await page
+            # Порожня сторінка з пагінації — збій, решта товарів категорії не зникла
+            complete = complete and bool(page_products)
+            total += await emit(page_products)
+    else:
+        current_page = 1
+        while len(products) >= min_products and current_page < max_pages:
+            current_page += 1
+            products, _ = await fetch(current_page)
+            total += await emit(products)
+
+    if journal and complete:
+        journal.complete_category(category_name)
+    if scheduler:
+        scheduler.finish_category(category_name)
+    return total
+
+
+async def crawl_categories(categories, on_page, concurrency=4, base_url=None, timeout=30, archive=True,
+                           journal=None, scheduler=None, cookies=None):
+    """Обробляє категорії паралельно в одному пулі keep-alive з'єднань
+
+    Сторінки передаються в on_page (див. fetch_category). Повертає список
+    (назва, кількість товарів або FetchError) у порядку категорій.
+    cookies замінюють AGE_GATE_COOKIES.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers=HEADERS,
+        cookies=cookies or AGE_GATE_COOKIES,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as session:
+        tasks = [
+            fetch_category(session, semaphore, rebase_url(url, base_url), category_name, on_page,
+                           archive=archive, journal=journal, scheduler=scheduler)
+            for category_name, url in categories
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    return [(category_name, result) for (category_name, _), result in zip(categories, results)]
+
+
+def crawl_http(categories, concurrency=4, base_url=None, fallback=None, archive=True, journal=None,
+               scheduler=None, cookies=None):
+    """Обходить категорії ATB без браузера; невдалі категорії передає у fallback
+
+    fallback — функція, що приймає список (назва, url) і повертає пари (назва, товари),
+    наприклад crawl_sequential з atb.py на Selenium.
+    Сторінки віддаються парами (назва, товари) по мірі завантаження: цикл подій
+    працює у фоновому потоці й передає їх через обмежену чергу.
+    """
+    pages = queue.Queue(maxsize=PAGE_BUFFER)
+
+    async def on_page(category_name, products):
+        # Якщо запис відстає, сторінка чекає місця в черзі, не блокуючи цикл подій
+        await asyncio.to_thread(pages.put, (category_name, products))
+
+    def run():
+        try:
+            result = asyncio.run(crawl_categories(categories, on_page, concurrency, base_url, archive=archive,
+                                                  journal=journal, scheduler=scheduler, cookies=cookies))
+        except Exception as e:
+            result = e
+        pages.put((_DONE, result))
+
+    thread = threading.Thread(target=run, name='atb-http', daemon=True)
+    thread.start()
+    while True:
+        category_name, item = pages.get()
+        if category_name is _DONE:
+            break
+        yield category_name, item
+    thread.join()
+    if isinstance(item, Exception):
+        raise item
+
+    failed = []
+    for category_name, result in item:
+        if isinstance(result, Exception):
+            print(f"🔴 {category_name}: {result}")
+            failed.append(category_name)
+            continue
+        print(f"✅ Всього зібрано товарів у категорії '{category_name}': {result}")
+
+    if failed and fallback:
+        print(f"🔁 Обробка через браузер: {', '.join(failed)}")
+        yield from fallback([(name, url) for name, url in categories if name in failed])
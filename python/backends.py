@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from metrics import default_metrics
+from storage import (DEFAULT_BATCH_SIZE, begin_incremental, bulk_insert, ensure_table, merge_incremental,
+                     staging_table, INCREMENTAL_COLUMNS, INCREMENTAL_INDEXES)
+
+SQLITE_PATH = os.path.join(os.path.dirname(__file__), 'info', 'products.db')
+
+# Таблиця товарів у SQLite з тими ж колонками, що й atb_products/silpo_products у MySQL
+SQLITE_PRODUCTS_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT, name TEXT NOT NULL, price REAL NOT NULL, price_bot REAL, discount TEXT,
+        unit TEXT, quantity REAL, image_url TEXT, is_available INTEGER DEFAULT 1,
+        product_key TEXT UNIQUE, content_hash TEXT,
+        base_unit TEXT, base_quantity REAL, price_per_kg_or_l REAL, old_price_per_kg_or_l REAL,
+        search_text TEXT, image_path TEXT, scraped_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+# Колонки, яких може не бути в базі, створеній попередньою версією
+SQLITE_ADDED_COLUMNS = {'image_path': 'TEXT'}
+SQLITE_PRODUCT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_{table}_category ON {table} (category)",
+    "CREATE INDEX IF NOT EXISTS idx_{table}_unit_price ON {table} (base_unit, price_per_kg_or_l)",
+)
+
+
+class MySQLBackend:
+    """Пул з'єднань MySQL (mysql.connector.pooling)
+
+    Кожна операція бере з'єднання з пулу, тож кілька потоків запису працюють
+    одночасно. Пул сам перепідключає з'єднання, що розірвалися між операціями;
+    обрив посеред операції дає ще retries спроб на новому з'єднанні (транзакція
+    перед цим відкочується, тож повтор безпечний).
+    """
+
+    dialect = 'mysql'
+
+    def __init__(self, pool_size=4, allow_local_infile=False, retries=2, backoff=1.0, **params):
+        from mysql.connector import errors, pooling
+        if not params:
+            from config import host, user, password, db_name, port
+            params = dict(host=host, user=user, password=password, database=db_name, port=port)
+        self._errors = errors
+        self.retries = retries
+        self.backoff = backoff
+        self.pool = pooling.MySQLConnectionPool(pool_name=f"scraper_{os.getpid()}_{id(self)}",
+                                                pool_size=pool_size, allow_local_infile=allow_local_infile,
+                                                **params)
+
+    def _get_connection(self, timeout=60):
+        """З'єднання з пулу; якщо всі зайняті — чекає, доки звільниться"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except self._errors.PoolError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def connection(self):
+        conn = self._get_connection()
+        try:
+            yield conn
+        finally:
+            try:
+                conn.close()  # повертає з'єднання в пул
+            except Exception:
+                pass
+
+    def run(self, action):
+        """Виконує action(conn) на з'єднанні з пулу з повтором після обриву з'єднання"""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.connection() as conn:
+                    return action(conn)
+            except (self._errors.OperationalError, self._errors.InterfaceError) as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                default_metrics.count('db_reconnects')
+                print(f"⚠️ З'єднання з MySQL втрачено ({e}), повтор через {delay:.1f} с")
+                time.sleep(delay)
+
+    def prepare(self, table, ddl, incremental=True):
+        """Створює таблицю за ddl, а для інкрементального режиму — порожню проміжну"""
+        def action(conn):
+            ensure_table(conn, table, ddl, INCREMENTAL_COLUMNS, INCREMENTAL_INDEXES)
+            if incremental:
+                begin_incremental(conn, table)
+        self.run(action)
+
+    def clear(self, table):
+        self.run(lambda conn: _execute(conn, f"DELETE FROM {table}"))
+
+    def insert(self, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False,
+               ignore_duplicates=False):
+        return self.run(lambda conn: bulk_insert(conn, table, columns, rows, batch_size, use_load_data,
+                                                 ignore_duplicates))
+
+    def merge(self, table, columns, store=None, partial_categories=()):
+        return self.run(lambda conn: merge_incremental(conn, table, columns, store, partial_categories))
+
+    def close(self):
+        pass  # з'єднання пулу закриваються разом із процесом
+
+
+class _SqliteCursor:
+    """Курсор SQLite з параметрами %s, як у mysql.connector"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @staticmethod
+    def _translate(query):
+        return query.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+
+    def execute(self, query, params=()):
+        return self._cursor.execute(self._translate(query), params)
+
+    def executemany(self, query, rows):
+        return self._cursor.executemany(self._translate(query), rows)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SqliteConnection:
+    """З'єднання SQLite з інтерфейсом, який очікують функції storage.py"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+    def cursor(self):
+        return _SqliteCursor(self._conn.cursor())
+
+    def execute(self, query, params=()):
+        return self.cursor().execute(query, params)
+
+    def executescript(self, script):
+        self._conn.executescript(script)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteBackend:
+    """Вбудована база SQLite у режимі WAL для локальних запусків і бенчмарків
+
+    Схема таблиць товарів та price_history повторює MySQL (без FULLTEXT-індексу), а злиття
+    виконує той самий storage.merge_incremental.
+    Кожен потік працює зі своїм з'єднанням; WAL дозволяє читати під час запису,
+    а записи з кількох потоків по черзі чекають блокування (timeout 30 с).
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _SqliteConnection(self.path)
+            with self._lock:
+                self._connections.append(conn)
+        yield conn
+
+    def run(self, action):
+        with self.connection() as conn:
+            return action(conn)
+
+    def _create(self, conn, table):
+        conn.execute(SQLITE_PRODUCTS_DDL.format(table=table))
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        for name, definition in SQLITE_ADDED_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        for index in SQLITE_PRODUCT_INDEXES:
+            conn.execute(index.format(table=table))
+        conn.commit()
+
+    def prepare(self, table, ddl=None, incremental=True):
+        """Створює таблицю товарів і проміжну таблицю; ddl для MySQL тут не потрібен"""
+        with self.connection() as conn:
+            self._create(conn, table)
+            if incremental:
+                staging = staging_table(table)
+                conn.execute(f"DROP TABLE IF EXISTS {staging}")
+                self._create(conn, staging)
+                print(f"🧱 Проміжна таблиця {staging} готова")
+
+    def clear(self, table):
+        self.run(lambda conn: _execute(conn, f"DELETE FROM {table}"))
+
+    def insert(self, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False,
+               ignore_duplicates=False):
+        # LOAD DATA є лише в MySQL; executemany у SQLite і так швидкий
+        return self.run(lambda conn: bulk_insert(conn, table, columns, rows, batch_size, False,
+                                                 ignore_duplicates))
+
+    def merge(self, table, columns, store=None, partial_categories=()):
+        """storage.merge_incremental з фрагментами SQL діалекту SQLite"""
+        return self.run(lambda conn: merge_incremental(conn, table, columns, store, partial_categories,
+                                                       self.dialect))
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def _execute(conn, query):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def open_backend(kind='mysql', sqlite_path=SQLITE_PATH, pool_size=4, allow_local_infile=False):
+    """Відкриває сховище 'mysql' або 'sqlite'; None, якщо підключитися не вдалося"""
+    try:
+        if kind == 'sqlite':
+            return SQLiteBackend(sqlite_path)
+        return MySQLBackend(pool_size=pool_size, allow_local_infile=allow_local_infile)
+    except Exception as e:
+        print(f"🔴 Помилка підключення до бази даних ({kind}): {e}")
+        return None
@@ -0,0 +1,103 @@
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from bs4 import BeautifulSoup
+from bench_parsers import FIXTURES_DIR, load_pages
+from parsers import extract_weight_and_unit, parse_atb_products
+
+MODES = ('tags', 'dict', 'slots')
+
+
+def _legacy_atb_products(html):
+    """Розбір як у старому extract_products: price_bot і discount лишаються тегами BeautifulSoup"""
+    soup = BeautifulSoup(html, 'html.parser')
+    extracted = []
+    for product in soup.find_all('article', class_='catalog-item'):
+        name_tag = product.find('div', class_='catalog-item__title')
+        name = name_tag.get_text(strip=True) if name_tag else None
+        price_data = product.find('data', class_='product-price__top')
+        price = float(price_data['value']) if price_data and 'value' in price_data.attrs else None
+        if not name or price is None:
+            continue
+        unit_span = product.find('span', class_='product-price__unit')
+        unit = unit_span.get_text(strip=True)[1:] if unit_span else None
+        quantity, extracted_unit = extract_weight_and_unit(name)
+        img_tag = product.find('img', class_='catalog-item__img')
+        extracted.append({
+            'name': name,
+            'price': price,
+            'price_bot': product.find('data', class_='product-price__bottom'),
+            'discount': product.find('span', class_='custom-product-label'),
+            'unit': extracted_unit or unit,
+            'quantity': quantity,
+            'image_url': img_tag['src'] if img_tag and 'src' in img_tag.attrs else None,
+        })
+    return extracted
+
+
+PARSE = {
+    'tags': _legacy_atb_products,
+    'dict': lambda html: [record.to_dict() for record in parse_atb_products(html, 'bs4')],
+    'slots': lambda html: parse_atb_products(html, 'bs4'),
+}
+
+
+def _max_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak  # macOS віддає байти
+
+
+def measure(mode, pages, products):
+    """Тримає в пам'яті products записів і повертає приріст піку RSS"""
+    parse = PARSE[mode]
+    gc.collect()
+    baseline = _max_rss_kb()
+    all_products = []
+    while len(all_products) < products:
+        for html in pages:
+            all_products.extend(parse(html))
+    gc.collect()
+    peak = _max_rss_kb()
+    return {
+        'mode': mode,
+        'products': len(all_products),
+        'peak_rss_mb': round(peak / 1024, 1),
+        'kb_per_1000': round((peak - baseline) / len(all_products) * 1000, 1),
+    }
+
+
+def main():
+    """Порівнює пік RSS на 1000 товарів для різних форматів записів"""
+    parser = argparse.ArgumentParser(description="Бенчмарк пам'яті записів товарів")
+    parser.add_argument('--pages-dir', default=FIXTURES_DIR)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--mode', choices=MODES, help="виміряти один режим у поточному процесі")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, 'atb')
+    if not pages:
+        print(f"⚠️ Немає сторінок atb у {args.pages_dir}")
+        return
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, pages, args.products)))
+        return
+
+    # Кожен режим в окремому процесі, бо пік RSS не зменшується
+    print(f"📊 atb: {args.products} товарів, пік RSS (приріст на 1000 товарів)")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode,
+             '--products', str(args.products), '--pages-dir', args.pages_dir],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"  {mode:<6} {result['kb_per_1000']:10.1f} КБ/1000 товарів  (пік {result['peak_rss_mb']} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import time
+from parsers import PARSERS, available_engines
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'info', 'fixtures')
+
+
+def load_pages(pages_dir, store):
+    """Завантажує збережені сторінки магазину ({store}_*.html)"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, f'{store}_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+def check_parity(store, pages, engines):
+    """Перевіряє, що всі рушії дають ті самі записи, що й еталонний bs4"""
+    parse = PARSERS[store]
+    reference = [parse(html, 'bs4') for html in pages]
+    ok = True
+    for engine in engines:
+        result = [parse(html, engine) for html in pages]
+        if result != reference:
+            print(f"🔴 {store}/{engine}: записи відрізняються від bs4")
+            ok = False
+    return ok
+
+
+def bench_engine(store, pages, engine, repeat):
+    """Вимірює пропускну здатність рушія у сторінках за секунду"""
+    parse = PARSERS[store]
+    products = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            products += len(parse(html, engine))
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeat / elapsed, products / elapsed
+
+
+def main():
+    """Порівнює швидкість рушіїв парсингу на збережених сторінках"""
+    parser = argparse.ArgumentParser(description="Бенчмарк рушіїв парсингу карток товарів")
+    parser.add_argument('--pages-dir', default=FIXTURES_DIR)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--engine', action='append', choices=available_engines())
+    args = parser.parse_args()
+
+    engines = args.engine or available_engines()
+    for store in PARSERS:
+        pages = load_pages(args.pages_dir, store)
+        if not pages:
+            print(f"⚠️ Немає сторінок для {store} у {args.pages_dir}")
+            continue
+        check_parity(store, pages, engines)
+        print(f"\n📊 {store}: {len(pages)} сторінок x {args.repeat}")
+        results = {}
+        for engine in engines:
+            pages_per_sec, products_per_sec = bench_engine(store, pages, engine, args.repeat)
+            results[engine] = pages_per_sec
+            print(f"  {engine:<14} {pages_per_sec:9.1f} стор/с  {products_per_sec:10.1f} товарів/с")
+        if 'bs4' in results:
+            for engine, pages_per_sec in results.items():
+                if engine != 'bs4':
+                    print(f"  {engine:<14} x{pages_per_sec / results['bs4']:.1f} відносно bs4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from bench_parsers import FIXTURES_DIR, load_pages
+from parsers import DEFAULT_ENGINE, PARSERS, extract_weight_and_unit
+from search import index_batch
+from backends import SQLiteBackend
+from storage import IDENTITY_COLUMNS, with_identity
+from units import normalize_batch
+import atb
+import silpo
+
+# Колонки беремо зі скраперів, щоб вимір вставки не розходився з реальним записом
+COLUMNS = {'atb': atb.COLUMNS, 'silpo': silpo.COLUMNS}
+
+MIN_STAGE_TIME = 1.0
+
+
+def _timed(stage, repeat):
+    """Запускає stage() щонайменше repeat разів і не менше MIN_STAGE_TIME секунд
+
+    Повертає (секунди, кількість запусків, кількість одиниць, пік пам'яті МБ).
+    """
+    runs = units = 0
+    start = time.perf_counter()
+    while runs < repeat or time.perf_counter() - start < MIN_STAGE_TIME:
+        units += stage()
+        runs += 1
+    elapsed = time.perf_counter() - start
+
+    # Пам'ять окремим проходом, щоб tracemalloc не спотворював швидкість
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, runs, units, round(peak / 1024 / 1024, 2)
+
+
+def _catalog(parsed, size):
+    """Розмножує розібрані товари до size унікальних записів (різні назви — різні product_key)"""
+    products = []
+    while len(products) < size:
+        copy = len(products) // len(parsed)
+        for product in parsed[:size - len(products)]:
+            products.append(dataclasses.replace(product, name=f"{product.name} {copy}", category='bench'))
+    return products
+
+
+def bench_store(store, pages, engine, repeat, db_path, size):
+    """Вимірює етапи розбору, нормалізації та запису для сторінок одного магазину"""
+    parse = PARSERS[store]
+    products = _catalog([product for html in pages for product in parse(html, engine)], size)
+    results = {}
+
+    elapsed, runs, count, peak = _timed(lambda: sum(len(parse(html, engine)) for html in pages), repeat)
+    results['parse'] = {'engine': engine, 'pages_per_sec': round(len(pages) * runs / elapsed, 1),
+                        'products_per_sec': round(count / elapsed, 1), 'peak_mb': peak}
+
+    names = [product.name for product in products]
+
+    def normalize():
+        for name in names:
+            extract_weight_and_unit(name)
+        index_batch(normalize_batch(products))
+        return len(products)
+
+    elapsed, _, count, peak = _timed(normalize, repeat)
+    results['normalize'] = {'products_per_sec': round(count / elapsed, 1), 'peak_mb': peak}
+
+    table = f"{store}_products"
+    db = SQLiteBackend(db_path)
+    db.prepare(table, incremental=False)
+    columns = COLUMNS[store]
+    rows = [tuple(getattr(product, column) for column in columns) for product in products]
+
+    def insert():
+        db.clear(table)
+        with contextlib.redirect_stdout(io.StringIO()):  # bulk_insert друкує швидкість кожного виклику
+            return db.insert(table, columns + IDENTITY_COLUMNS, with_identity(store, columns, rows),
+                             ignore_duplicates=True)
+
+    elapsed, _, count, peak = _timed(insert, repeat)
+    db.close()
+    results['insert'] = {'db': 'sqlite', 'rows_per_sec': round(count / elapsed, 1), 'peak_mb': peak}
+    results['products'] = len(products)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Друкує зміни швидкості відносно попереднього результату; True — без регресій"""
+    ok = True
+    for store, stages in current['stores'].items():
+        for stage, metrics in stages.items():
+            if not isinstance(metrics, dict):
+                continue
+            old = baseline.get('stores', {}).get(store, {}).get(stage, {})
+            for metric, value in metrics.items():
+                if not metric.endswith('_per_sec') or not old.get(metric):
+                    continue
+                change = (value - old[metric]) / old[metric]
+                mark = '🔴' if change < -tolerance else '🟢'
+                ok = ok and change >= -tolerance
+                print(f"  {mark} {store}/{stage}/{metric}: {old[metric]} -> {value} ({change:+.1%})")
+    return ok
+
+
+def main():
+    """Наскрізний бенчмарк: розбір, нормалізація та запис на збережених сторінках"""
+    parser = argparse.ArgumentParser(description="Бенчмарк конвеєра парсерів на збережених сторінках")
+    parser.add_argument('--pages-dir', default=FIXTURES_DIR)
+    parser.add_argument('--engine', default=DEFAULT_ENGINE)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="мінімальна кількість повторів кожного етапу")
+    parser.add_argument('--products', type=int, default=5000,
+                        help="кількість товарів для етапів нормалізації та запису")
+    parser.add_argument('--output', help="записати результати у JSON-файл")
+    parser.add_argument('--compare', help="JSON попереднього запуску для порівняння")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="допустиме сповільнення відносно --compare (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'products': args.products,
+        'stores': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in PARSERS:
+            pages = load_pages(args.pages_dir, store)
+            if not pages:
+                print(f"⚠️ Немає сторінок для {store} у {args.pages_dir}")
+                continue
+            results['stores'][store] = bench_store(store, pages, args.engine, args.repeat,
+                                                   os.path.join(tmp, 'bench.db'), args.products)
+
+    for store, stages in results['stores'].items():
+        print(f"\n📊 {store}: {len(load_pages(args.pages_dir, store))} сторінок, {stages['products']} товарів")
+        print(f"  розбір ({stages['parse']['engine']}) {stages['parse']['pages_per_sec']:>10} стор/с "
+              f"{stages['parse']['products_per_sec']:>10} товарів/с  пік {stages['parse']['peak_mb']} МБ")
+        print(f"  нормалізація       {stages['normalize']['products_per_sec']:>10} товарів/с  "
+              f"пік {stages['normalize']['peak_mb']} МБ")
+        print(f"  запис (sqlite)     {stages['insert']['rows_per_sec']:>10} рядків/с   "
+              f"пік {stages['insert']['peak_mb']} МБ")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результати: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n📈 Порівняння з {baseline.get('commit')} ({baseline.get('timestamp')})")
+        if not compare(results, baseline, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
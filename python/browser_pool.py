@@ -0,0 +1,156 @@
+import os
+import queue
+import shutil
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from metrics import default_metrics
+
+# Скільки сторінок відкриває один сеанс, перш ніж його буде перезапущено
+DEFAULT_MAX_PAGES = 50
+PAGE_LOAD_TIMEOUT = 60
+
+# Шаблони Network.setBlockedURLs: зображення, шрифти, медіа та відомі сторонні лічильники.
+# Сторонні скрипти блокуються лише за цим списком доменів, а не всі скрипти з чужих хостів.
+# Атрибути src у розмітці лишаються, тож image_url розбирається як і раніше.
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.m3u8',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*criteo.*',
+    '*tiktok.com*', '*analytics.tiktok*', '*mc.yandex*', '*bing.com/bat*', '*onesignal.com*',
+]
+
+
+def _chromium_binary():
+    """Шлях до Chromium: змінна CHROMIUM_BINARY або перший знайдений у PATH"""
+    path = os.environ.get('CHROMIUM_BINARY')
+    if path:
+        return path
+    for name in ('chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable'):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def block_resources(driver, patterns=BLOCKED_URLS):
+    """Забороняє завантаження ресурсів за шаблонами URL через CDP"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def start_headless_chromium(block=True):
+    """Запускає headless Chromium для Linux без ручного запуску браузера"""
+    options = Options()
+    binary = _chromium_binary()
+    if binary:
+        options.binary_location = binary
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    if block:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    if block:
+        block_resources(driver)
+    return driver
+
+
+class ManagedDriver:
+    """Драйвер, що сам перезапускає сеанс браузера
+
+    Перед завантаженням сторінки перевіряє, чи сеанс живий, і перезапускає його
+    після max_pages сторінок або після збою. Решта атрибутів передається
+    поточному драйверу, тож об'єкт підставляється замість звичайного webdriver.
+    """
+
+    def __init__(self, make_driver=start_headless_chromium, max_pages=DEFAULT_MAX_PAGES):
+        self._make_driver = make_driver
+        self.max_pages = max_pages
+        self._driver = None
+        self.pages = 0
+
+    def healthy(self):
+        """Чи відповідає сеанс на простий скрипт"""
+        try:
+            return self._driver.execute_script("return document.readyState") is not None
+        except Exception:
+            return False
+
+    def recycle(self, reason=None):
+        """Закриває поточний сеанс і запускає новий"""
+        if self._driver is not None:
+            default_metrics.count('session_recycles')
+            print(f"♻️ Перезапуск сеансу браузера після {self.pages} сторінок" + (f": {reason}" if reason else ""))
+            self._quit()
+        self._driver = self._make_driver()
+        self.pages = 0
+
+    def get(self, url):
+        if self._driver is None:
+            self.recycle()
+        elif self.pages >= self.max_pages:
+            self.recycle("ліміт сторінок")
+        elif not self.healthy():
+            self.recycle("сеанс не відповідає")
+        try:
+            self._driver.get(url)
+        except WebDriverException as e:
+            # Одна повторна спроба в новому сеансі; друга помилка йде далі
+            self.recycle(e.msg or type(e).__name__)
+            self._driver.get(url)
+        self.pages += 1
+
+    def _quit(self):
+        try:
+            self._driver.quit()
+        except Exception:
+            pass
+        self._driver = None
+
+    def quit(self):
+        if self._driver is not None:
+            self._quit()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._driver is None:
+            self.recycle()
+        return getattr(self._driver, name)
+
+
+class BrowserPool:
+    """Пул із size керованих сеансів для потоків одного процесу (ht.save_pages_html)
+
+    Сеанси запускаються лише при першому використанні й повторно
+    використовуються між завданнями; close() закриває їх усі.
+    """
+
+    def __init__(self, size=2, make_driver=start_headless_chromium, max_pages=DEFAULT_MAX_PAGES):
+        self._drivers = [ManagedDriver(make_driver, max_pages) for _ in range(size)]
+        self._idle = queue.Queue()
+        for driver in self._drivers:
+            self._idle.put(driver)
+
+    @contextmanager
+    def session(self):
+        """Видає вільний сеанс на час блоку; після помилки сеанс буде перезапущено"""
+        driver = self._idle.get()
+        try:
+            yield driver
+        except Exception:
+            driver.quit()
+            raise
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        for driver in self._drivers:
+            driver.quit()
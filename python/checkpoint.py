@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from records import Product
+
+JOURNAL_PATH = os.path.join(os.path.dirname(__file__), 'info', 'checkpoints.db')
+
+JOURNAL_DDL = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        store TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        finished_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS pages (
+        run_id INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        page_count INTEGER,
+        products TEXT NOT NULL,
+        done_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, category, page)
+    );
+    CREATE TABLE IF NOT EXISTS categories (
+        run_id INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        done_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, category)
+    );
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class CrawlJournal:
+    """Журнал завершених сторінок обходу з їхніми товарами (SQLite)
+
+    Кожна успішно розібрана сторінка записується одразу, тож після збою чи
+    блокування --resume віддає збережені сторінки з журналу й завантажує лише
+    решту. Запуск закривається, коли всі категорії пройдено без помилок.
+    Об'єкт можна передавати в робочі процеси: з'єднання відкривається в кожному процесі окремо.
+    """
+
+    def __init__(self, store, resume=False, path=JOURNAL_PATH):
+        self.store = store
+        self.path = path
+        self._conn = None
+        self._pid = None
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, started_at FROM runs WHERE store = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+            (store,)).fetchone() if resume else None
+        if row:
+            self.run_id = row[0]
+            pages = conn.execute("SELECT COUNT(*) FROM pages WHERE run_id = ?", (self.run_id,)).fetchone()[0]
+            print(f"♻️ Продовження запуску {store} від {row[1]}: {pages} сторінок у журналі")
+        else:
+            if resume:
+                print(f"⚠️ Незавершеного запуску {store} немає, починаємо спочатку")
+            with conn:
+                # Попередні запуски магазину більше не потрібні
+                old_runs = "SELECT id FROM runs WHERE store = ?"
+                conn.execute(f"DELETE FROM pages WHERE run_id IN ({old_runs})", (store,))
+                conn.execute(f"DELETE FROM categories WHERE run_id IN ({old_runs})", (store,))
+                conn.execute("DELETE FROM runs WHERE store = ?", (store,))
+                self.run_id = conn.execute("INSERT INTO runs (store, started_at) VALUES (?, ?)",
+                                           (store, _now())).lastrowid
+
+    def __getstate__(self):
+        return {'store': self.store, 'path': self.path, 'run_id': self.run_id}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _conn=None, _pid=None)
+
+    def _connect(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(JOURNAL_DDL)
+            self._pid = os.getpid()
+        return self._conn
+
+    def load_page(self, category, page):
+        """Товари та кількість сторінок із журналу або None, якщо сторінку ще не оброблено"""
+        row = self._connect().execute(
+            "SELECT products, page_count FROM pages WHERE run_id = ? AND category = ? AND page = ?",
+            (self.run_id, category, page)).fetchone()
+        if row is None:
+            return None
+        return [Product(**item) for item in json.loads(row[0])], row[1]
+
+    def record_page(self, category, page, products, page_count=None):
+        """Записує оброблену сторінку разом із товарами"""
+        data = json.dumps([dict(product.to_dict(), category=category) for product in products],
+                          ensure_ascii=False)
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO pages (run_id, category, page, page_count, products, done_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (self.run_id, category, page, page_count, data, _now()))
+
+    def categories(self):
+        """Категорії, для яких у журналі вже є сторінки"""
+        rows = self._connect().execute("SELECT DISTINCT category FROM pages WHERE run_id = ?", (self.run_id,))
+        return {row[0] for row in rows}
+
+    def complete_category(self, category):
+        """Позначає, що всі сторінки категорії оброблено без помилок"""
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO categories (run_id, category, done_at) VALUES (?, ?, ?)",
+                         (self.run_id, category, _now()))
+
+    def incomplete(self, categories):
+        """Категорії зі списку (назва, url), які не пройдено повністю: збій, блокування чи порожня сторінка"""
+        done = {row[0] for row in self._connect().execute("SELECT category FROM categories WHERE run_id = ?",
+                                                          (self.run_id,))}
+        return [name for name, _ in categories if name not in done]
+
+    def finish(self, categories):
+        """Закриває запуск, якщо всі категорії пройдено; інакше підказує про --resume"""
+        conn = self._connect()
+        missing = self.incomplete(categories)
+        if missing:
+            print(f"⏸️ Незавершені категорії: {', '.join(missing)}. Продовжити: --resume")
+            return False
+        with conn:
+            conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (_now(), self.run_id))
+        return True
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
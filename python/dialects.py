@@ -0,0 +1,23 @@
+# Фрагменти SQL, які відрізняються в MySQL та SQLite: запити злиття й історії цін
+# збираються в storage.py та price_history.py, а діалект впливає лише на ці фрагменти
+
+
+def distinct_from(left, right, dialect='mysql'):
+    """Умова «значення відрізняються» з урахуванням NULL"""
+    if dialect == 'sqlite':
+        return f"{left} IS NOT {right}"
+    return f"NOT ({left} <=> {right})"
+
+
+def update_join(table, staging, assignments, where, dialect='mysql'):
+    """UPDATE основної таблиці l за рядками проміжної s з тим самим product_key
+
+    assignments — пари (колонка l, вираз); where — умова над l та s.
+    """
+    if dialect == 'sqlite':
+        # UPDATE ... FROM (SQLite 3.33+): колонки в SET без псевдоніма
+        sets = ', '.join(f"{column} = {value}" for column, value in assignments)
+        return (f"UPDATE {table} AS l SET {sets} FROM {staging} AS s "
+                f"WHERE l.product_key = s.product_key AND ({where})")
+    sets = ', '.join(f"l.{column} = {value}" for column, value in assignments)
+    return f"UPDATE {table} l JOIN {staging} s ON l.product_key = s.product_key SET {sets} WHERE {where}"
@@ -1,34 +1,65 @@
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
+from browser_pool import BrowserPool, ManagedDriver
+from concurrent.futures import ThreadPoolExecutor
+import sys
 import os
 
-def save_page_html(url, output_file="page.html"):
-    """Зберігає HTML сторінки у файл"""
+def save_page_html(url, output_file="page.html", driver=None):
+    """Зберігає HTML сторінки у файл
+
+    Переданий driver використовується повторно; без нього запускається й закривається
+    окремий headless Chromium. Помилку з переданим driver надруковано й передано далі,
+    щоб пул (BrowserPool.session) перезапустив сеанс.
+    """
+    own_driver = driver is None
     try:
         # Налаштування драйвера
-        edge_options = Options()
-        edge_options.add_argument("--headless")  # Режим без відображення браузера
-        driver = webdriver.Edge(options=edge_options)
-        
+        if own_driver:
+            driver = ManagedDriver()
+
         # Отримання сторінки
         driver.get(url)
-        
+
         # Очікування завантаження (можна змінити за необхідності)
         driver.implicitly_wait(10)
-        
+
         # Збереження HTML у файл
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(driver.page_source)
-            
+
         print(f"HTML успішно збережено у файл: {os.path.abspath(output_file)}")
-        
+
     except Exception as e:
         print(f"Помилка: {e}")
+        if not own_driver:
+            raise
     finally:
-        if 'driver' in locals():
+        if own_driver and driver is not None:
             driver.quit()
 
+def save_pages_html(urls, output_dir=".", sessions=2):
+    """Зберігає кілька сторінок (page1.html, page2.html, ...) паралельно в sessions сеансах браузера
+
+    Сеанси пулу використовуються повторно для наступних сторінок.
+    """
+    pool = BrowserPool(min(sessions, len(urls)))
+
+    def save(index, url):
+        try:
+            with pool.session() as driver:
+                save_page_html(url, os.path.join(output_dir, f"page{index}.html"), driver)
+        except Exception:
+            pass  # помилку вже надруковано, сеанс перезапускається; решта сторінок зберігається
+
+    try:
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(save, range(1, len(urls) + 1), urls))
+    finally:
+        pool.close()
+
 # Приклад використання:
 if __name__ == "__main__":
-    url = "https://silpo.ua/category/frukty-ovochi-4788"  # Можна змінити на будь-яку URL-адресу
-    save_page_html(url)
\ No newline at end of file
+    urls = sys.argv[1:] or ["https://silpo.ua/category/frukty-ovochi-4788"]  # Можна передати кілька URL-адрес
+    if len(urls) == 1:
+        save_page_html(urls[0])
+    else:
+        save_pages_html(urls)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import asyncio
+import random
+from urllib.parse import urlsplit, urlunsplit
+import aiohttp
+from metrics import default_metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Сторінку не вдалося отримати через HTTP"""
+
+
+def rebase_url(url, base_url):
+    """Замінює схему та хост URL (наприклад, на локальний тестовий сервер)"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+async def _with_retries(url, request, retries, backoff):
+    """Виконує request() з повторними спробами та експоненційною затримкою
+
+    Повторюються лише мережеві збої, тайм-аути та статуси RETRY_STATUSES.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await request()
+        except aiohttp.ClientResponseError as e:
+            # Статус поза RETRY_STATUSES (404, 403...): повтор нічого не змінить
+            raise FetchError(f"{url}: HTTP {e.status}") from e
+        except (aiohttp.ClientError, asyncio.TimeoutError, FetchError) as e:
+            if attempt == retries:
+                raise FetchError(f"{url}: {e}") from e
+            delay = backoff * 2 ** attempt + random.uniform(0, backoff)
+            default_metrics.count('retries')
+            print(f"⚠️ {url}: {e}, повтор через {delay:.1f} с")
+            await asyncio.sleep(delay)
+
+
+async def fetch_page(session, semaphore, url, retries=3, backoff=1.0, headers=None):
+    """Завантажує сторінку з повторними спробами та експоненційною затримкою"""
+    async def request():
+        async with semaphore:
+            async with session.get(url, headers=headers) as response:
+                if response.status in RETRY_STATUSES:
+                    raise FetchError(f"HTTP {response.status}")
+                response.raise_for_status()
+                return await response.text()
+    return await _with_retries(url, request, retries, backoff)
+
+
+async def fetch_resource(session, semaphore, url, retries=3, backoff=1.0, headers=None):
+    """Завантажує файл як байти: (статус, вміст, заголовки відповіді)
+
+    Для умовних запитів (If-None-Match / If-Modified-Since) відповідь 304
+    повертається як (304, None, заголовки).
+    """
+    async def request():
+        async with semaphore:
+            async with session.get(url, headers=headers) as response:
+                if response.status in RETRY_STATUSES:
+                    raise FetchError(f"HTTP {response.status}")
+                if response.status == 304:
+                    return 304, None, response.headers
+                response.raise_for_status()
+                return response.status, await response.read(), response.headers
+    return await _with_retries(url, request, retries, backoff)
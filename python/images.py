@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import aiohttp
+from http_client import FetchError, fetch_resource, rebase_url
+from metrics import default_metrics
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'info', 'images')
+THUMBNAIL_SIZE = (256, 256)
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36 Edg/124.0"),
+    "Accept": "image/avif,image/webp,image/*,*/*;q=0.8",
+}
+
+# Розширення файлу за Content-Type; інакше береться з URL
+EXTENSIONS = {
+    'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif',
+    'image/avif': '.avif', 'image/svg+xml': '.svg',
+}
+
+INDEX_DDL = """
+    CREATE TABLE IF NOT EXISTS images (
+        url TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        checked_at TEXT NOT NULL
+    )
+"""
+
+
+def _connect(images_dir):
+    os.makedirs(images_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(images_dir, 'index.db'), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(INDEX_DDL)
+    return conn
+
+
+def _extension(content_type, url):
+    extension = EXTENSIONS.get((content_type or '').split(';')[0].strip().lower())
+    if extension:
+        return extension
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    return extension if 0 < len(extension) <= 5 else '.img'
+
+
+def thumbnail_path(path):
+    """Шлях мініатюри для збереженого зображення (відносно теки зображень)"""
+    digest = os.path.splitext(os.path.basename(path))[0]
+    return f"thumbs/{digest[:2]}/{digest}.webp"
+
+
+def store_image(data, content_type, url, images_dir=IMAGES_DIR):
+    """Зберігає вміст за sha256; однакові зображення з різних URL зберігаються один раз
+
+    Повертає шлях відносно images_dir.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = f"objects/{digest[:2]}/{digest}{_extension(content_type, url)}"
+    full_path = os.path.join(images_dir, path)
+    if not os.path.exists(full_path):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f"{full_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, full_path)
+    return path
+
+
+def make_thumbnail(path, images_dir=IMAGES_DIR, size=THUMBNAIL_SIZE):
+    """Створює мініатюру WebP (виконується в пулі процесів); None — якщо формат не підтримується"""
+    thumb = thumbnail_path(path)
+    full_thumb = os.path.join(images_dir, thumb)
+    if os.path.exists(full_thumb):
+        return thumb
+    try:
+        with Image.open(os.path.join(images_dir, path)) as image:
+            image.thumbnail(size)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+            os.makedirs(os.path.dirname(full_thumb), exist_ok=True)
+            tmp_path = f"{full_thumb}.{os.getpid()}.tmp"
+            image.save(tmp_path, 'WEBP', quality=75, method=4)
+        os.replace(tmp_path, full_thumb)
+        return thumb
+    except Exception as e:
+        print(f"⚠️ Мініатюра {path}: {e}")
+        return None
+
+
+async def fetch_image(session, semaphore, conn, url, base_url=None, images_dir=IMAGES_DIR):
+    """Завантажує зображення умовним запитом; повертає (шлях, чи змінився вміст)"""
+    row = conn.execute("SELECT path, etag, last_modified FROM images WHERE url = ?", (url,)).fetchone()
+    headers = {}
+    if row and os.path.exists(os.path.join(images_dir, row[0])):
+        if row[1]:
+            headers['If-None-Match'] = row[1]
+        if row[2]:
+            headers['If-Modified-Since'] = row[2]
+    status, data, response_headers = await fetch_resource(session, semaphore, rebase_url(url, base_url),
+                                                          headers=headers)
+    if status == 304 and not headers:
+        # 304 без умовного запиту: збереженої копії немає, тож повторюємо повз кеші
+        default_metrics.count('images_unexpected_304')
+        status, data, response_headers = await fetch_resource(session, semaphore, rebase_url(url, base_url),
+                                                              headers={'Cache-Control': 'no-cache'})
+        if status == 304:
+            raise FetchError(f"{url}: 304 без збереженої копії")
+    checked_at = datetime.now().isoformat(timespec='seconds')
+    if status == 304:
+        default_metrics.count('images_not_modified')
+        conn.execute("UPDATE images SET checked_at = ? WHERE url = ?", (checked_at, url))
+        return row[0], False
+    path = store_image(data, response_headers.get('Content-Type'), url, images_dir)
+    default_metrics.count('images_downloaded')
+    conn.execute("INSERT OR REPLACE INTO images (url, path, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?)",
+                 (url, path, response_headers.get('ETag'), response_headers.get('Last-Modified'), checked_at))
+    return path, row is None or row[0] != path
+
+
+async def fetch_images(urls, concurrency=8, base_url=None, images_dir=IMAGES_DIR, timeout=30):
+    """Завантажує зображення паралельно (не більше concurrency запитів)
+
+    Повертає {url: (шлях, чи змінився вміст)}; невдалі URL пропускаються.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    conn = _connect(images_dir)
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30),
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as session:
+            results = await asyncio.gather(
+                *(fetch_image(session, semaphore, conn, url, base_url, images_dir) for url in urls),
+                return_exceptions=True,
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    fetched = {}
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            default_metrics.count('image_errors')
+            print(f"🔴 Зображення {url}: {result}")
+        else:
+            fetched[url] = result
+    return fetched
+
+
+def cache_images(urls, concurrency=8, base_url=None, images_dir=IMAGES_DIR, thumbnails=True, workers=None):
+    """Завантажує зображення та створює мініатюри нових; повертає {url: шлях}"""
+    fetched = asyncio.run(fetch_images(list(urls), concurrency, base_url, images_dir))
+    paths = {url: path for url, (path, _) in fetched.items()}
+    if thumbnails and Image is None:
+        print("⚠️ Pillow не встановлено, мініатюри не створюються")
+    elif thumbnails:
+        pending = sorted({path for path, changed in fetched.values()
+                          if changed or not os.path.exists(os.path.join(images_dir, thumbnail_path(path)))})
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                done = sum(1 for thumb in pool.map(make_thumbnail, pending, [images_dir] * len(pending)) if thumb)
+            print(f"🖼️ Мініатюр створено: {done} з {len(pending)}")
+    return paths
+
+
+def _pending_urls(conn, table, refresh):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT DISTINCT image_url FROM {table} WHERE image_url IS NOT NULL AND image_url <> ''"
+                       + ("" if refresh else " AND image_path IS NULL"))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _save_paths(conn, table, paths):
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(f"UPDATE {table} SET image_path = %s WHERE image_url = %s",
+                           [(path, url) for url, path in paths.items()])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def update_product_images(db, table, concurrency=8, base_url=None, refresh=False, images_dir=IMAGES_DIR,
+                          thumbnails=True):
+    """Завантажує зображення нових і змінених товарів та записує image_path у таблицю
+
+    Новий чи змінений товар (інший image_url дає інший product_key) має порожній
+    image_path. refresh перевіряє всі зображення умовними запитами.
+    """
+    urls = db.run(lambda conn: _pending_urls(conn, table, refresh))
+    if not urls:
+        return 0
+    print(f"🖼️ {table}: зображень до перевірки {len(urls)}")
+    paths = cache_images(urls, concurrency, base_url, images_dir, thumbnails)
+    db.run(lambda conn: _save_paths(conn, table, paths))
+    print(f"🖼️ {table}: збережено шляхи {len(paths)} зображень у {images_dir}")
+    return len(paths)
+
+
+if __name__ == "__main__":
+    from backends import SQLITE_PATH, open_backend
+
+    parser = argparse.ArgumentParser(description="Локальний кеш зображень товарів і мініатюр")
+    parser.add_argument('--store', choices=['atb', 'silpo', 'all'], default='all')
+    parser.add_argument('--db', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--sqlite-path', default=SQLITE_PATH)
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="максимум одночасних завантажень")
+    parser.add_argument('--base-url',
+                        help="замінити адресу сервера зображень, наприклад локальним тестовим сервером")
+    parser.add_argument('--images-dir', default=IMAGES_DIR)
+    parser.add_argument('--refresh', action='store_true',
+                        help="перевірити всі зображення умовними запитами, а не лише нові")
+    parser.add_argument('--no-thumbnails', action='store_true')
+    args = parser.parse_args()
+
+    db = open_backend(args.db, args.sqlite_path)
+    if db is None:
+        raise SystemExit(1)
+    try:
+        for store in (['atb', 'silpo'] if args.store == 'all' else [args.store]):
+            update_product_images(db, f"{store}_products", args.concurrency, args.base_url, args.refresh,
+                                  args.images_dir, not args.no_thumbnails)
+    finally:
+        db.close()
@@ -0,0 +1,160 @@
+import argparse
+import glob
+import json
+import os
+import pathlib
+from metrics import default_metrics
+from parsers import (ATB_PAGINATION, SILPO_PAGINATION, PAGE_PARAM_RE, build_atb_record, build_silpo_record,
+                     parse_atb_page, parse_silpo_page)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'info', 'fixtures')
+
+# Спільні функції: текст як у get_text(strip=True) та кількість сторінок як у parsers._page_count
+_HELPERS_JS = """
+const SKIP = new Set(['SCRIPT', 'STYLE', 'TEMPLATE']);
+function textOf(el) {
+    if (!el) return null;
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {
+        acceptNode(node) {
+            for (let p = node.parentNode; p && p !== el.parentNode; p = p.parentNode) {
+                if (SKIP.has(p.nodeName)) return NodeFilter.FILTER_REJECT;
+            }
+            return NodeFilter.FILTER_ACCEPT;
+        }
+    });
+    let node;
+    while ((node = walker.nextNode())) {
+        const text = node.nodeValue.trim();
+        if (text) parts.push(text);
+    }
+    return parts.join('');
+}
+function attrOf(el, name) {
+    return el ? el.getAttribute(name) : null;
+}
+function pageCount(containers) {
+    const pageRe = new RegExp(%(page_re)s);
+    for (const [tag, cls] of containers) {
+        const container = document.querySelector(tag + '.' + cls);
+        if (!container) continue;
+        let pages = 1;
+        for (const link of container.querySelectorAll('a')) {
+            const match = pageRe.exec(link.getAttribute('href') || '');
+            if (match) pages = Math.max(pages, parseInt(match[1], 10));
+            const text = textOf(link);
+            if (/^\\d+$/.test(text)) pages = Math.max(pages, parseInt(text, 10));
+        }
+        return pages;
+    }
+    return null;
+}
+""" % {'page_re': json.dumps(PAGE_PARAM_RE.pattern)}
+
+ATB_EXTRACT_JS = _HELPERS_JS + """
+const cards = Array.from(document.querySelectorAll('article.catalog-item')).map(card => ({
+    name: textOf(card.querySelector('div.catalog-item__title')),
+    price: attrOf(card.querySelector('data.product-price__top'), 'value'),
+    price_bot: attrOf(card.querySelector('data.product-price__bottom'), 'value'),
+    discount: textOf(card.querySelector('span.custom-product-label')),
+    unit: textOf(card.querySelector('span.product-price__unit')),
+    image: attrOf(card.querySelector('img.catalog-item__img'), 'src'),
+}));
+return {cards: cards, pageCount: pageCount(%(pagination)s)};
+""" % {'pagination': json.dumps(ATB_PAGINATION)}
+
+SILPO_EXTRACT_JS = _HELPERS_JS + """
+const container = document.querySelector('div.products-list');
+if (!container) return {cards: null, pageCount: pageCount(%(pagination)s)};
+const cards = Array.from(container.querySelectorAll('shop-silpo-common-product-card')).map(product => {
+    const card = product.querySelector('a.product-card');
+    if (!card) return null;
+    return {
+        name: textOf(card.querySelector('div.product-card__title')),
+        price: textOf(card.querySelector('div.product-card-price__displayPrice')),
+        price_bot: textOf(card.querySelector('div.product-card-price__displayOldPrice')),
+        discount: textOf(card.querySelector('div.product-card-price__sale')),
+        weight: textOf(card.querySelector('div.ft-typo-14-semibold')),
+        image: attrOf(card.querySelector('img.product-card__product-img'), 'src'),
+    };
+});
+return {cards: cards, pageCount: pageCount(%(pagination)s)};
+""" % {'pagination': json.dumps(SILPO_PAGINATION)}
+
+EXTRACT_JS = {
+    'atb': (ATB_EXTRACT_JS, build_atb_record),
+    'silpo': (SILPO_EXTRACT_JS, build_silpo_record),
+}
+PAGE_PARSERS = {'atb': parse_atb_page, 'silpo': parse_silpo_page}
+
+
+def extract_with_js(driver, store):
+    """Витягує картки одним execute_script; повертає (товари, кількість сторінок)
+
+    Браузер віддає компактний JSON із сирими полями, а нормалізація
+    (ціни, вага, посилання) виконується тими самими функціями, що й у parsers.
+    """
+    script, build_record = EXTRACT_JS[store]
+    result = driver.execute_script(script)
+    if result['cards'] is None:
+        print("Не знайдено контейнер з товарами")
+        return [], result['pageCount']
+
+    extracted = []
+    for raw in result['cards']:
+        try:
+            record = build_record(raw)
+            if record:
+                extracted.append(record)
+            else:
+                default_metrics.count('skipped_cards')
+        except Exception as e:
+            default_metrics.count('skipped_cards')
+            print(f"⚠️ Помилка парсингу товару: {e}")
+    return extracted, result['pageCount']
+
+
+def fixture_pages(fixtures_dir=FIXTURES_DIR):
+    """Збережені сторінки: список (магазин, шлях)"""
+    return [(store, path) for store in EXTRACT_JS
+            for path in sorted(glob.glob(os.path.join(fixtures_dir, f'{store}_*.html')))]
+
+
+def extract_fixture(driver, store, path):
+    """JS-витяг і розбір BeautifulSoup однієї сторінки: ((товари, сторінки) JS, (товари, сторінки) bs4)"""
+    with open(path, encoding='utf-8') as f:
+        expected = PAGE_PARSERS[store](f.read(), 'bs4')
+    driver.get(pathlib.Path(path).resolve().as_uri())
+    return extract_with_js(driver, store), expected
+
+
+def check_parity(driver, fixtures_dir=FIXTURES_DIR):
+    """Порівнює JS-витяг із розбором BeautifulSoup на збережених сторінках: товари й кількість сторінок"""
+    ok = True
+    for store, path in fixture_pages(fixtures_dir):
+        (actual, actual_pages), (expected, expected_pages) = extract_fixture(driver, store, path)
+        if actual == expected and actual_pages == expected_pages:
+            print(f"🟢 {os.path.basename(path)}: {len(actual)} товарів і {actual_pages} сторінок збігаються")
+        else:
+            ok = False
+            print(f"🔴 {os.path.basename(path)}: JS {len(actual)} товарів / {actual_pages} сторінок, "
+                  f"bs4 {len(expected)} / {expected_pages}")
+            for js_record, soup_record in zip(actual, expected):
+                if js_record != soup_record:
+                    print(f"   JS:  {js_record}\n   bs4: {soup_record}")
+                    break
+    return ok
+
+
+if __name__ == "__main__":
+    from parallel import start_headless_edge
+
+    parser = argparse.ArgumentParser(description="Перевірка збігу JS-витягу з розбором BeautifulSoup")
+    parser.add_argument('--fixtures-dir', default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    driver = start_headless_edge()
+    try:
+        raise SystemExit(0 if check_parity(driver, args.fixtures_dir) else 1)
+    finally:
+        driver.quit()
@@ -0,0 +1,193 @@
+import argparse
+import random
+import re
+import time
+import zlib
+from parsers import WEIGHT_RE, SILPO_NAME_WEIGHT_RE
+from storage import bulk_insert, ensure_table
+
+MATCHES_DDL = """
+    CREATE TABLE IF NOT EXISTS product_matches (
+        atb_key CHAR(40) NOT NULL,
+        silpo_key CHAR(40) NOT NULL,
+        score DECIMAL(4,3) NOT NULL,
+        matched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (atb_key, silpo_key),
+        INDEX idx_silpo_key (silpo_key),
+        INDEX idx_score (score)
+    ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+SQLITE_MATCHES_DDL = """
+    CREATE TABLE IF NOT EXISTS product_matches (
+        atb_key TEXT NOT NULL,
+        silpo_key TEXT NOT NULL,
+        score REAL NOT NULL,
+        matched_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (atb_key, silpo_key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_matches_silpo_key ON product_matches (silpo_key);
+    CREATE INDEX IF NOT EXISTS idx_matches_score ON product_matches (score);
+"""
+
+# Бренд у лапках, номер на кшталт "№100" та все, що не є літерами
+BRAND_RE = re.compile(r'[«"“„]([^»"”“]+)[»"”“]')
+NUMBER_RE = re.compile(r'№\s*\d+')
+NON_LETTERS_RE = re.compile(r'[\W\d_]+')
+
+NGRAM = 3
+NUM_PERM = 64
+BANDS = 16
+DEFAULT_THRESHOLD = 0.5
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # Сталі перестановки: однакові підписи між запусками
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_name(name):
+    """Назва без бренду, ваги та одиниць: (основа назви, бренд)"""
+    brand = ' '.join(match.casefold().strip() for match in BRAND_RE.findall(name))
+    core = BRAND_RE.sub(' ', name)
+    core = NUMBER_RE.sub(' ', core)
+    core = WEIGHT_RE.sub(' ', core)
+    core = SILPO_NAME_WEIGHT_RE.sub(' ', core)
+    core = NON_LETTERS_RE.sub(' ', core.casefold())
+    return ' '.join(core.split()), brand
+
+
+def shingles(text, n=NGRAM):
+    """Множина символьних n-грам (слова обрамлені пробілами)"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {zlib.crc32(padded.encode('utf-8'))}
+    return {zlib.crc32(padded[i:i + n].encode('utf-8')) for i in range(len(padded) - n + 1)}
+
+
+def minhash(shingle_set):
+    """MinHash-підпис множини n-грам"""
+    return tuple(min((a * value + b) % _PRIME for value in shingle_set) for a, b in _PERMUTATIONS)
+
+
+def _bands(signature):
+    rows = NUM_PERM // BANDS
+    return [(band, signature[band * rows:(band + 1) * rows]) for band in range(BANDS)]
+
+
+def _compatible(left, right):
+    """Однакова базова одиниця та близька кількість (якщо відомі обидві)"""
+    if left['base_unit'] and right['base_unit'] and left['base_unit'] != right['base_unit']:
+        return False
+    if left['base_quantity'] and right['base_quantity']:
+        ratio = float(left['base_quantity']) / float(right['base_quantity'])
+        return 0.9 <= ratio <= 1.1
+    return True
+
+
+def _prepare(rows):
+    prepared = []
+    for key, name, base_unit, base_quantity in rows:
+        core, brand = normalize_name(name)
+        if not core:
+            continue
+        grams = shingles(core)
+        prepared.append({
+            'key': key, 'brand': brand, 'shingles': grams, 'signature': minhash(grams),
+            'base_unit': base_unit, 'base_quantity': base_quantity,
+        })
+    return prepared
+
+
+def match_products(atb_rows, silpo_rows, threshold=DEFAULT_THRESHOLD):
+    """Знаходить пари ATB↔Silpo зі схожістю назв не нижче threshold
+
+    Рядки — (product_key, назва, базова одиниця, базова кількість). Кандидати
+    відбираються LSH за смугами MinHash-підпису, а оцінка — точна схожість
+    Жаккара n-грам; збіг бренду додає 0.1. Для кожного товару ATB лишається
+    найкраща пара. Повертає список (atb_key, silpo_key, score).
+    """
+    atb = _prepare(atb_rows)
+    silpo = _prepare(silpo_rows)
+
+    buckets = {}
+    for index, item in enumerate(silpo):
+        for band in _bands(item['signature']):
+            buckets.setdefault(band, []).append(index)
+
+    matches = []
+    for item in atb:
+        candidates = set()
+        for band in _bands(item['signature']):
+            candidates.update(buckets.get(band, ()))
+        best = None
+        for index in candidates:
+            other = silpo[index]
+            if not _compatible(item, other):
+                continue
+            score = len(item['shingles'] & other['shingles']) / len(item['shingles'] | other['shingles'])
+            if item['brand'] and item['brand'] == other['brand']:
+                score = min(1.0, score + 0.1)
+            if score >= threshold and (best is None or score > best[1]):
+                best = (other['key'], score)
+        if best:
+            matches.append((item['key'], best[0], round(best[1], 3)))
+    return matches
+
+
+def _load(conn, table):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT product_key, name, base_unit, base_quantity FROM {table} "
+            "WHERE product_key IS NOT NULL AND is_available IS NOT FALSE"
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def rebuild_matches(db, threshold=DEFAULT_THRESHOLD):
+    """Перебудовує таблицю product_matches за поточними товарами обох магазинів
+
+    Запускається після обох парсерів (--match у другому з них або цей модуль окремо).
+    """
+    start = time.perf_counter()
+
+    def action(conn):
+        matches = match_products(_load(conn, 'atb_products'), _load(conn, 'silpo_products'), threshold)
+        if db.dialect == 'sqlite':
+            conn.executescript(SQLITE_MATCHES_DDL)
+        else:
+            ensure_table(conn, 'product_matches', MATCHES_DDL)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM product_matches")
+        finally:
+            cursor.close()
+        # bulk_insert завершує транзакцію разом з очищенням таблиці
+        bulk_insert(conn, 'product_matches', ('atb_key', 'silpo_key', 'score'), matches)
+        if not matches:
+            conn.commit()
+        return len(matches)
+
+    count = db.run(action)
+    print(f"🔗 Знайдено {count} пар ATB↔Silpo за {time.perf_counter() - start:.1f} с")
+    return count
+
+
+if __name__ == "__main__":
+    from backends import SQLITE_PATH, open_backend
+
+    parser = argparse.ArgumentParser(description="Зіставлення товарів ATB та Silpo; запускати, коли обидва "
+                                                 "парсери вже записали товари (або --match у другому парсері)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="мінімальна схожість назв (0..1)")
+    parser.add_argument('--db', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--sqlite-path', default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    db = open_backend(args.db, args.sqlite_path)
+    if db is None:
+        raise SystemExit(1)
+    try:
+        rebuild_matches(db, args.threshold)
+    finally:
+        db.close()
@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.path.join(os.path.dirname(__file__), 'info', 'metrics')
+
+# Межі кошиків гістограм тривалості етапів, секунди
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+
+    def add(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other['buckets'])]
+        self.sum += other['sum']
+        self.count += other['count']
+
+
+class RunMetrics:
+    """Тривалості етапів і лічильники подій одного запуску
+
+    Гістограми ведуться за (етап, магазин, категорія), сумарний час етапів — ще й
+    по сторінках. Мітки магазину/категорії/сторінки задає page() для поточного
+    потоку, тож вкладені timer() і count() їх успадковують.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.histograms = {}
+        self.counters = {}
+        self.pages = {}
+
+    @contextmanager
+    def page(self, store, category=None, page=None):
+        """Задає мітки для вимірів усередині блоку"""
+        previous = getattr(self._local, 'labels', None)
+        self._local.labels = (store, category, page)
+        try:
+            yield
+        finally:
+            self._local.labels = previous
+
+    def _labels(self, store, category, page):
+        current_store, current_category, current_page = getattr(self._local, 'labels', None) or (None, None, None)
+        return (store or current_store,
+                category if category is not None else current_category,
+                page if page is not None else current_page)
+
+    def observe(self, stage, seconds, store=None, category=None, page=None):
+        store, category, page = self._labels(store, category, page)
+        with self._lock:
+            key = (stage, store, category)
+            if key not in self.histograms:
+                self.histograms[key] = _Histogram()
+            self.histograms[key].observe(seconds)
+            if page is not None:
+                timings = self.pages.setdefault((store, category, page), {})
+                timings[stage] = timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage, store=None, category=None, page=None):
+        """Вимірює тривалість блоку як етап stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, store, category, page)
+
+    def count(self, event, n=1, store=None, category=None):
+        """Збільшує лічильник події (повтори, блокування, пропущені картки тощо)"""
+        store, category, _ = self._labels(store, category, None)
+        with self._lock:
+            key = (event, store, category)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def snapshot(self):
+        """Стан для передачі з робочого процесу (див. merge)"""
+        with self._lock:
+            return {
+                'histograms': {key: {'buckets': list(h.buckets), 'sum': h.sum, 'count': h.count}
+                               for key, h in self.histograms.items()},
+                'counters': dict(self.counters),
+                'pages': {key: dict(timings) for key, timings in self.pages.items()},
+            }
+
+    def merge(self, snapshot):
+        """Додає виміри з іншого процесу"""
+        with self._lock:
+            for key, data in snapshot['histograms'].items():
+                if key not in self.histograms:
+                    self.histograms[key] = _Histogram()
+                self.histograms[key].add(data)
+            for key, value in snapshot['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, timings in snapshot['pages'].items():
+                merged = self.pages.setdefault(key, {})
+                for stage, seconds in timings.items():
+                    merged[stage] = merged.get(stage, 0.0) + seconds
+
+    def report(self):
+        """Звіт запуску у вигляді словника для JSON"""
+        snapshot = self.snapshot()
+        stages = {}
+        for (stage, store, category), data in snapshot['histograms'].items():
+            stages.setdefault(stage, {'seconds': 0.0, 'count': 0, 'categories': {}})
+            stages[stage]['seconds'] += data['sum']
+            stages[stage]['count'] += data['count']
+            stages[stage]['categories'][category or ''] = {
+                'store': store, 'seconds': round(data['sum'], 3), 'count': data['count'],
+                'buckets': dict(zip(map(str, BUCKETS), data['buckets'])),
+            }
+        for stage in stages.values():
+            stage['seconds'] = round(stage['seconds'], 3)
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'duration_sec': round(time.time() - self.started, 1),
+            'stages': stages,
+            'counters': [{'event': event, 'store': store, 'category': category, 'value': value}
+                         for (event, store, category), value in sorted(snapshot['counters'].items(), key=str)],
+            'pages': [{'store': store, 'category': category, 'page': page,
+                       'stages': {stage: round(seconds, 3) for stage, seconds in timings.items()}}
+                      for (store, category, page), timings in snapshot['pages'].items()],
+        }
+
+    def prometheus(self, store):
+        """Текст у форматі Prometheus textfile collector"""
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP scraper_stage_seconds Duration of scraper stages.',
+            '# TYPE scraper_stage_seconds histogram',
+        ]
+        for (stage, stage_store, category), data in sorted(snapshot['histograms'].items(), key=str):
+            labels = _labels(store=stage_store or store, stage=stage, category=category or '')
+            cumulative = 0
+            for bound, value in zip(BUCKETS, data['buckets']):
+                cumulative += value
+                lines.append(f'scraper_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'scraper_stage_seconds_bucket{{{labels},le="+Inf"}} {data["count"]}')
+            lines.append(f'scraper_stage_seconds_sum{{{labels}}} {data["sum"]:.6f}')
+            lines.append(f'scraper_stage_seconds_count{{{labels}}} {data["count"]}')
+        lines += ['# HELP scraper_events_total Scraper events (retries, blocks, skipped cards, pages).',
+                  '# TYPE scraper_events_total counter']
+        for (event, event_store, category), value in sorted(snapshot['counters'].items(), key=str):
+            labels = _labels(store=event_store or store, event=event, category=category or '')
+            lines.append(f'scraper_events_total{{{labels}}} {value}')
+        lines += ['# HELP scraper_run_duration_seconds Duration of the last run.',
+                  '# TYPE scraper_run_duration_seconds gauge',
+                  f'scraper_run_duration_seconds{{{_labels(store=store)}}} {time.time() - self.started:.1f}',
+                  '# HELP scraper_last_run_timestamp_seconds End time of the last run.',
+                  '# TYPE scraper_last_run_timestamp_seconds gauge',
+                  f'scraper_last_run_timestamp_seconds{{{_labels(store=store)}}} {time.time():.0f}']
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, store, directory=METRICS_DIR):
+        """Записує {store}_run.json та {store}.prom; .prom замінюється атомарно для node_exporter"""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f'{store}_run.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        prom_path = os.path.join(directory, f'{store}.prom')
+        with open(prom_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.prometheus(store))
+        os.replace(prom_path + '.tmp', prom_path)
+        return json_path, prom_path
+
+    def summary(self):
+        """Короткий підсумок: сумарний час кожного етапу"""
+        return {stage: data['seconds'] for stage, data in self.report()['stages'].items()}
+
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+# Спільні виміри процесу: робочі процеси передають свої через snapshot/merge
+default_metrics = RunMetrics()
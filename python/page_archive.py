@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from parsers import PARSERS
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), 'info', 'archive')
+
+INDEX_DDL = """
+    CREATE TABLE IF NOT EXISTS pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        store TEXT NOT NULL,
+        category TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        fetched_at TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        codec TEXT NOT NULL
+    )
+"""
+
+
+def _connect(archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(archive_dir, 'index.db'), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(INDEX_DDL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_lookup ON pages (store, category, page, fetched_at)")
+    return conn
+
+
+def _object_path(archive_dir, digest, codec):
+    return os.path.join(archive_dir, 'objects', digest[:2], f"{digest}.html.{codec}")
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), 'zst'
+    return gzip.compress(data, compresslevel=6), 'gz'
+
+
+def _decompress(data, codec):
+    if codec == 'zst':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def archive_page(store, category, page, url, html, archive_dir=ARCHIVE_DIR):
+    """Зберігає сторінку в архіві; однаковий вміст зберігається лише один раз
+
+    Помилки архівування не зупиняють обхід: повідомлення друкується, повертається None.
+    """
+    try:
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        conn = _connect(archive_dir)
+        try:
+            row = conn.execute("SELECT codec FROM pages WHERE sha256 = ? LIMIT 1", (digest,)).fetchone()
+            if row and os.path.exists(_object_path(archive_dir, digest, row[0])):
+                codec = row[0]
+            else:
+                compressed, codec = _compress(data)
+                path = _object_path(archive_dir, digest, codec)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(compressed)
+                    os.replace(tmp_path, path)
+            with conn:
+                conn.execute(
+                    "INSERT INTO pages (store, category, page, url, fetched_at, sha256, codec) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (store, category, page, url, datetime.now().isoformat(timespec='seconds'), digest, codec)
+                )
+        finally:
+            conn.close()
+        return digest
+    except Exception as e:
+        print(f"⚠️ Не вдалося заархівувати сторінку {url}: {e}")
+        return None
+
+
+def list_pages(store, archive_dir=ARCHIVE_DIR, latest_only=True):
+    """Повертає записи індексу (category, page, url, fetched_at, sha256, codec)
+
+    latest_only залишає лише сторінки з останнього обходу кожної категорії
+    (починаючи з останнього завантаження її першої сторінки).
+    """
+    conn = _connect(archive_dir)
+    try:
+        if latest_only:
+            rows = conn.execute("""
+                SELECT p.category, p.page, p.url, p.fetched_at, p.sha256, p.codec
+                FROM pages p
+                JOIN (SELECT category, MAX(id) AS start_id FROM pages
+                      WHERE store = ? AND page = 1 GROUP BY category) last
+                  ON last.category = p.category AND p.id >= last.start_id
+                WHERE p.store = ?
+                ORDER BY p.category, p.page, p.id
+            """, (store, store)).fetchall()
+            # Якщо сторінку завантажено кілька разів, лишається останнє завантаження
+            rows = list({(row[0], row[1]): row for row in rows}.values())
+        else:
+            rows = conn.execute("""
+                SELECT category, page, url, fetched_at, sha256, codec FROM pages
+                WHERE store = ? ORDER BY category, page, id
+            """, (store,)).fetchall()
+    finally:
+        conn.close()
+    return rows
+
+
+def load_page(digest, codec, archive_dir=ARCHIVE_DIR):
+    """Читає HTML сторінки з архіву за хешем"""
+    with open(_object_path(archive_dir, digest, codec), 'rb') as f:
+        return _decompress(f.read(), codec).decode('utf-8')
+
+
+def _parse_archived(store, category, page, digest, codec, archive_dir):
+    products = PARSERS[store](load_page(digest, codec, archive_dir))
+    for product in products:
+        product.category = category
+    return category, page, products
+
+
+def replay_archive(store, categories=None, workers=None, archive_dir=ARCHIVE_DIR):
+    """Повторно розбирає збережені сторінки паралельно на всіх ядрах без мережі
+
+    Віддає пари (назва категорії, товари сторінки) у порядку категорій і сторінок;
+    categories задає порядок і фільтр. Одночасно розбирається не більше кількох
+    сторінок на ядро, тож пам'ять не залежить від розміру архіву.
+    """
+    entries = list_pages(store, archive_dir)
+    if categories is not None:
+        order = {name: index for index, (name, _) in enumerate(categories)}
+        entries = sorted((entry for entry in entries if entry[0] in order), key=lambda entry: order[entry[0]])
+    print(f"📦 Відтворення архіву {store}: {len(entries)} сторінок")
+
+    in_flight = (workers or os.cpu_count() or 1) * 4
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index in range(len(entries) + in_flight):
+            if index < len(entries):
+                category, page, _, _, digest, codec = entries[index]
+                pending.append(pool.submit(_parse_archived, store, category, page, digest, codec, archive_dir))
+            # Результати забираються в порядку подання, щойно в роботі in_flight сторінок
+            if pending and (len(pending) >= in_flight or index >= len(entries)):
+                category, _, products = pending.popleft().result()
+                counts[category] = counts.get(category, 0) + len(products)
+                yield category, products
+
+    for category, count in counts.items():
+        print(f"✅ {category}: {count} товарів з архіву")
@@ -0,0 +1,135 @@
+import multiprocessing
+import queue
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+from selenium import webdriver
+from selenium.webdriver.edge.options import Options
+from rate_limiter import default_limiter
+from metrics import default_metrics
+
+# Семафори сайтів і черга сторінок, успадковані робочими процесами через initializer
+_host_limits = {}
+_pages = None
+# Скільки сторінок на кожен сеанс може чекати в черзі до батьківського процесу
+PAGE_BUFFER = 2
+
+
+def start_headless_edge():
+    """Запускає окремий headless-сеанс Edge для робочого процесу"""
+    edge_options = Options()
+    edge_options.add_argument("--headless=new")
+    edge_options.add_argument("--disable-gpu")
+    edge_options.add_argument("--window-size=1920,1080")
+    return webdriver.Edge(options=edge_options)
+
+
+class PoliteDriver:
+    """Обгортка драйвера, що обмежує кількість одночасних завантажень на сайт"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def get(self, url):
+        limit = _host_limits.get(urlparse(url).netloc)
+        if limit is None:
+            return self._driver.get(url)
+        with limit:
+            return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def _init_worker(host_limits, pages=None, workers=1):
+    global _host_limits, _pages
+    _host_limits = host_limits
+    _pages = pages
+    # Обмежувачі процесів незалежні, тож кожен отримує 1/workers швидкості сайту
+    default_limiter.share(workers)
+    # Рознесені старти, щоб сеанси не відкривали сайт одночасно
+    time.sleep(random.uniform(0, 3))
+
+
+def _crawl_shard(iter_pages, shard, make_driver):
+    """Обробляє свою частку категорій одним драйвером, надсилаючи кожну сторінку в чергу _pages
+
+    Паузи між запитами задає адаптивний обмежувач усередині iter_pages. Помилка
+    в категорії не зупиняє решту частки; позначка кінця частки містить невдалі категорії.
+    Повертає виміри процесу — вони зливаються в батьківський процес.
+    """
+    failed = []
+    try:
+        driver = make_driver()
+        try:
+            polite = PoliteDriver(driver)
+            for category_name, url in shard:
+                try:
+                    for products in iter_pages(polite, url, category_name):
+                        _pages.put((category_name, products))
+                except Exception as e:
+                    print(f"🔴 {category_name}: {e}")
+                    failed.append(category_name)
+        finally:
+            driver.quit()
+            default_limiter.report()
+    except Exception as e:
+        print(f"🔴 Сеанс не запустився: {e}")
+        failed = [name for name, _ in shard]
+    finally:
+        # Позначка кінця частки йде після всіх її сторінок
+        _pages.put((None, failed))
+    return default_metrics.snapshot()
+
+
+def shard_categories(categories, workers):
+    """Розподіляє категорії між робочими процесами по колу"""
+    shards = [categories[i::workers] for i in range(workers)]
+    return [shard for shard in shards if shard]
+
+
+def crawl_parallel(iter_pages, categories, workers=3, per_host=2,
+                   make_driver=start_headless_edge, failed=None):
+    """Обробляє категорії у кількох незалежних сеансах браузера
+
+    iter_pages(driver, url, назва) віддає товари категорії по сторінках (iter_category_pages).
+    Сторінки з усіх сеансів віддаються парами (назва категорії, товари) по мірі
+    надходження через обмежену чергу, тож пам'ять не росте з розміром обходу.
+    Назви категорій, обробку яких перервала помилка, додаються в множину failed.
+    """
+    failed = set() if failed is None else failed
+    shards = shard_categories(categories, workers)
+    hosts = {urlparse(url).netloc for _, url in categories}
+    host_limits = {host: multiprocessing.BoundedSemaphore(per_host) for host in hosts}
+    pages = multiprocessing.Queue(maxsize=PAGE_BUFFER * len(shards))
+
+    print(f"🚦 Паралельний обхід: {len(categories)} категорій, {len(shards)} сеансів, "
+          f"не більше {per_host} запитів на сайт одночасно")
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker,
+                             initargs=(host_limits, pages, len(shards))) as pool:
+        futures = [
+            pool.submit(_crawl_shard, iter_pages, shard, make_driver)
+            for shard in shards
+        ]
+        finished = 0
+        while finished < len(shards):
+            try:
+                category_name, products = pages.get(timeout=1)
+            except queue.Empty:
+                # Процес, що аварійно завершився, не надішле позначки кінця
+                if all(future.done() for future in futures) and pages.empty():
+                    break
+                continue
+            if category_name is None:
+                finished += 1
+                failed.update(products)
+            else:
+                yield category_name, products
+        for future, shard in zip(futures, shards):
+            try:
+                default_metrics.merge(future.result())
+            except Exception as e:
+                # Процес аварійно завершився: невідомо, які категорії частки пройдено
+                print(f"🔴 Помилка робочого процесу: {e}")
+                failed.update(name for name, _ in shard)
@@ -0,0 +1,362 @@
+import re
+from bs4 import BeautifulSoup
+from records import Product
+from metrics import default_metrics
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+# Рушії у порядку пріоритету: перший доступний використовується за замовчуванням
+ENGINES = ('selectolax', 'lxml', 'bs4')
+
+WEIGHT_RE = re.compile(r'(\d+[,.]?\d*)\s*([а-яґєіїa-z]{1,3}\b)', re.IGNORECASE)
+SILPO_WEIGHT_RE = re.compile(r'^(\d+[,.]?\d*)\s*([а-яґєіїa-z]*)$', re.IGNORECASE)
+SILPO_NAME_WEIGHT_RE = re.compile(r'(\d+[,.]?\d*)\s*(г|кг|мл|л|шт)', re.IGNORECASE)
+
+PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+# Контейнери пагінації (тег, клас) для визначення кількості сторінок категорії
+ATB_PAGINATION = (('nav', 'product-pagination'), ('ul', 'product-pagination__list'))
+SILPO_PAGINATION = (('div', 'pagination'),)
+
+_SKIP_TEXT_TAGS = ('script', 'style', 'template')
+
+
+def available_engines():
+    """Повертає список рушіїв, для яких встановлено залежності"""
+    engines = []
+    for engine in ENGINES:
+        if engine == 'selectolax' and SelectolaxParser is None:
+            continue
+        if engine == 'lxml' and lxml_html is None:
+            continue
+        engines.append(engine)
+    return engines
+
+
+DEFAULT_ENGINE = available_engines()[0]
+
+
+def extract_weight_and_unit(text):
+    """Витягує вагу та одиницю виміру з тексту"""
+    weight_match = WEIGHT_RE.search(text)
+    if weight_match:
+        quantity = float(weight_match.group(1).replace(',', '.'))
+        unit = weight_match.group(2).lower()
+        return quantity, unit
+    return None, None
+
+
+# --- Адаптери вузлів: однаковий інтерфейс find/find_all/text/attr для кожного рушія ---
+
+class _SoupNode:
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def find(self, tag, cls):
+        found = self.node.find(tag, class_=cls)
+        return _SoupNode(found) if found is not None else None
+
+    def find_all(self, tag, cls=None):
+        if cls is None:
+            return [_SoupNode(n) for n in self.node.find_all(tag)]
+        return [_SoupNode(n) for n in self.node.find_all(tag, class_=cls)]
+
+    def text(self):
+        return self.node.get_text(strip=True)
+
+    def attr(self, name):
+        return self.node.attrs.get(name)
+
+
+_xpath_cache = {}
+
+
+def _class_xpath(tag, cls):
+    key = (tag, cls)
+    if key not in _xpath_cache:
+        if cls is None:
+            expr = f'.//{tag}'
+        else:
+            expr = f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+        _xpath_cache[key] = lxml_html.etree.XPath(expr)
+    return _xpath_cache[key]
+
+
+def _lxml_strings(el):
+    if not isinstance(el.tag, str) or el.tag in _SKIP_TEXT_TAGS:
+        return
+    if el.text:
+        yield el.text
+    for child in el:
+        yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+class _LxmlNode:
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def find(self, tag, cls):
+        found = _class_xpath(tag, cls)(self.node)
+        return _LxmlNode(found[0]) if found else None
+
+    def find_all(self, tag, cls=None):
+        return [_LxmlNode(n) for n in _class_xpath(tag, cls)(self.node)]
+
+    def text(self):
+        return ''.join(s.strip() for s in _lxml_strings(self.node))
+
+    def attr(self, name):
+        return self.node.get(name)
+
+
+class _SelectolaxNode:
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def find(self, tag, cls):
+        found = self.node.css_first(f'{tag}.{cls}')
+        return _SelectolaxNode(found) if found is not None else None
+
+    def find_all(self, tag, cls=None):
+        selector = tag if cls is None else f'{tag}.{cls}'
+        return [_SelectolaxNode(n) for n in self.node.css(selector)]
+
+    def text(self):
+        return self.node.text(deep=True, separator='', strip=True)
+
+    def attr(self, name):
+        return self.node.attributes.get(name)
+
+
+def _root(html, engine):
+    """Будує корінь дерева для вибраного рушія"""
+    if engine == 'selectolax':
+        return _SelectolaxNode(SelectolaxParser(html).root)
+    if engine == 'lxml':
+        return _LxmlNode(lxml_html.document_fromstring(html))
+    if engine == 'bs4':
+        return _SoupNode(BeautifulSoup(html, 'html.parser'))
+    raise ValueError(f"Невідомий рушій парсингу: {engine}")
+
+
+# --- ATB ---
+
+def _text_of(node):
+    return node.text() if node else None
+
+
+def _attr_of(node, name):
+    return node.attr(name) if node else None
+
+
+def _parse_atb_card(product):
+    """Сирі поля картки ATB (ті самі ключі повертає JS-витяг у браузері)"""
+    return {
+        'name': _text_of(product.find('div', 'catalog-item__title')),
+        'price': _attr_of(product.find('data', 'product-price__top'), 'value'),
+        'price_bot': _attr_of(product.find('data', 'product-price__bottom'), 'value'),
+        'discount': _text_of(product.find('span', 'custom-product-label')),
+        'unit': _text_of(product.find('span', 'product-price__unit')),
+        'image': _attr_of(product.find('img', 'catalog-item__img'), 'src'),
+    }
+
+
+def build_atb_record(raw):
+    """Перетворює сирі поля картки ATB на запис товару; None — картку пропущено"""
+    # Назва товару
+    name = raw['name']
+    if not name:
+        return None
+
+    # Ціна
+    price = float(raw['price']) if raw['price'] is not None else None
+    if price is None:
+        return None
+    # Скидочка
+    price_bot = float(raw['price_bot']) if raw['price_bot'] is not None else None
+    discount = raw['discount']
+    # Одиниця виміру
+    unit = raw['unit'][1:] if raw['unit'] is not None else None
+
+    # Витягуємо вагу/кількість з назви
+    quantity, extracted_unit = extract_weight_and_unit(name)
+    if extracted_unit:
+        unit = extracted_unit
+    elif unit == "шт":
+        quantity = 1
+    else:
+        quantity = None
+
+    # Зображення
+    image_url = raw['image']
+    if image_url and not image_url.startswith(('http', '//')):
+        image_url = f"https://www.atbmarket.com{image_url}"
+
+    return Product(name, price, price_bot, discount, unit, quantity, image_url)
+
+
+def _page_count(root, containers):
+    """Найбільший номер сторінки у пагінації або None, якщо пагінації немає"""
+    for tag, cls in containers:
+        container = root.find(tag, cls)
+        if not container:
+            continue
+        pages = [1]
+        for link in container.find_all('a'):
+            page_match = PAGE_PARAM_RE.search(link.attr('href') or '')
+            if page_match:
+                pages.append(int(page_match.group(1)))
+            text = link.text()
+            if text.isdigit():
+                pages.append(int(text))
+        return max(pages)
+    return None
+
+
+def _atb_products(root):
+    extracted = []
+    for product in root.find_all('article', 'catalog-item'):
+        try:
+            record = build_atb_record(_parse_atb_card(product))
+            if record:
+                extracted.append(record)
+            else:
+                default_metrics.count('skipped_cards')
+        except Exception as e:
+            default_metrics.count('skipped_cards')
+            print(f"⚠️ Помилка парсингу товару: {e}")
+    return extracted
+
+
+def parse_atb_products(html, engine=None):
+    """Розбирає HTML сторінки каталогу ATB у список товарів"""
+    return _atb_products(_root(html, engine or DEFAULT_ENGINE))
+
+
+def parse_atb_page(html, engine=None):
+    """Повертає товари сторінки ATB та кількість сторінок категорії з пагінації"""
+    root = _root(html, engine or DEFAULT_ENGINE)
+    return _atb_products(root), _page_count(root, ATB_PAGINATION)
+
+
+# --- Silpo ---
+
+def _parse_silpo_card(product):
+    """Сирі поля картки Silpo (ті самі ключі повертає JS-витяг у браузері); None — немає посилання"""
+    product_card = product.find('a', 'product-card')
+    if not product_card:
+        return None
+    return {
+        'name': _text_of(product_card.find('div', 'product-card__title')),
+        'price': _text_of(product_card.find('div', 'product-card-price__displayPrice')),
+        'price_bot': _text_of(product_card.find('div', 'product-card-price__displayOldPrice')),
+        'discount': _text_of(product_card.find('div', 'product-card-price__sale')),
+        'weight': _text_of(product_card.find('div', 'ft-typo-14-semibold')),
+        'image': _attr_of(product_card.find('img', 'product-card__product-img'), 'src'),
+    }
+
+
+def silpo_unit_and_quantity(name, weight_text):
+    """Одиниця та кількість товару Silpo з підпису ваги, а для штучних — з назви"""
+    unit, quantity = None, None
+
+    # Удосконалена обробка ваги
+    if weight_text is not None:
+        weight_match = SILPO_WEIGHT_RE.match(weight_text)
+        if weight_match:
+            quantity = float(weight_match.group(1).replace(',', '.'))
+            unit = weight_match.group(2).lower() if weight_match.group(2) else None
+
+    # Якщо unit = "шт", шукаємо вагу в назві
+    if unit == 'шт' or (unit is None and weight_text is None):
+        name_weight_match = SILPO_NAME_WEIGHT_RE.search(name)
+        if name_weight_match:
+            quantity = float(name_weight_match.group(1).replace(',', '.'))
+            unit = name_weight_match.group(2).lower()
+        else:
+            unit = 'шт'
+            quantity = None
+    return unit, quantity
+
+
+def silpo_price(text):
+    """Ціна Silpo з підпису "1 234,56 грн" у вигляді числа"""
+    return float(text.replace(' ', '')[:-3].replace(',', '.'))  # Видаляємо пробіли та "грн"
+
+
+def build_silpo_record(raw):
+    """Перетворює сирі поля картки Silpo на запис товару; None — картку пропущено"""
+    if raw is None:
+        return None
+    name = raw['name']
+    if name is None or raw['price'] is None:
+        raise ValueError("у картці немає назви або ціни")
+    price = silpo_price(raw['price'])
+
+    # Обробка опціональних полів
+    price_bot = silpo_price(raw['price_bot']) if raw['price_bot'] is not None else None
+    discount = raw['discount']
+
+    unit, quantity = silpo_unit_and_quantity(name, raw['weight'])
+
+    image_url = raw['image']
+    if image_url and not image_url.startswith('http'):
+        image_url = f"https://silpo.ua{image_url}"
+
+    return Product(name, price, price_bot, discount, unit, quantity, image_url)
+
+
+def _silpo_products(root):
+    products_container = root.find('div', 'products-list')
+    if not products_container:
+        print("Не знайдено контейнер з товарами")
+        return []
+
+    extracted = []
+    for product in products_container.find_all('shop-silpo-common-product-card'):
+        try:
+            record = build_silpo_record(_parse_silpo_card(product))
+            if record:
+                extracted.append(record)
+            else:
+                default_metrics.count('skipped_cards')
+        except Exception as e:
+            default_metrics.count('skipped_cards')
+            print(f"Помилка парсингу товару: {e}")
+    return extracted
+
+
+def parse_silpo_products(html, engine=None):
+    """Розбирає HTML сторінки категорії Silpo у список товарів"""
+    return _silpo_products(_root(html, engine or DEFAULT_ENGINE))
+
+
+def parse_silpo_page(html, engine=None):
+    """Повертає товари сторінки Silpo та кількість сторінок категорії з пагінації"""
+    root = _root(html, engine or DEFAULT_ENGINE)
+    return _silpo_products(root), _page_count(root, SILPO_PAGINATION)
+
+
+PARSERS = {
+    'atb': parse_atb_products,
+    'silpo': parse_silpo_products,
+}
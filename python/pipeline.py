@@ -0,0 +1,187 @@
+import csv
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+from units import normalize_batch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+_STOP = object()
+
+PARQUET_DIR = os.path.join(os.path.dirname(__file__), 'info', 'parquet')
+
+# Типізовані колонки експорту; повторювані рядки зберігаються як словник
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ('name', pa.string()),
+        ('price', pa.float64()),
+        ('price_bot', pa.float64()),
+        ('discount', pa.dictionary(pa.int16(), pa.string())),
+        ('unit', pa.dictionary(pa.int8(), pa.string())),
+        ('quantity', pa.float64()),
+        ('image_url', pa.string()),
+        ('is_available', pa.bool_()),
+        ('base_unit', pa.dictionary(pa.int8(), pa.string())),
+        ('base_quantity', pa.float64()),
+        ('price_per_kg_or_l', pa.float64()),
+        ('old_price_per_kg_or_l', pa.float64()),
+    ])
+
+
+def export_formats():
+    """Доступні формати вивантаження товарів у файли"""
+    return ('parquet', 'csv') if pa is not None else ('csv',)
+
+
+class CsvSink:
+    """Дописує товари у CSV по мірі надходження; файл створюється з першою пачкою"""
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._file = None
+        self._writer = None
+        self.rows = 0
+
+    def write(self, products):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(products)
+        self._file.flush()
+        self.rows += len(products)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            print(f"💾 Дані збережено у файл: {self.path} ({self.rows} рядків)")
+
+
+class ParquetSink:
+    """Пише товари у Parquet з розділами store=/date=/category=
+
+    Кожен запуск додає у розділ категорії новий файл run-<час>.parquet, а
+    пачки дописуються в нього групами рядків, тож пам'ять не росте.
+    Категорія зберігається в шляху й читається як словникова колонка через
+    pyarrow.dataset.partitioning(flavor='hive', dictionaries='infer').
+    """
+
+    def __init__(self, store, root=PARQUET_DIR, run_at=None):
+        if pa is None:
+            raise RuntimeError("для експорту в Parquet потрібен pyarrow")
+        self.store = store
+        self.root = root
+        self.run_at = run_at or datetime.now()
+        self._writers = {}
+        self.rows = 0
+
+    def partition_dir(self, category):
+        return os.path.join(self.root, f"store={self.store}", f"date={self.run_at:%Y-%m-%d}",
+                            f"category={quote(category or '', safe='')}")
+
+    def _writer(self, category):
+        if category not in self._writers:
+            directory = self.partition_dir(category)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"run-{self.run_at:%Y%m%dT%H%M%S}.parquet")
+            self._writers[category] = pq.ParquetWriter(path, PARQUET_SCHEMA, compression='zstd')
+        return self._writers[category]
+
+    def write(self, products):
+        normalize_batch(products)
+        by_category = {}
+        for product in products:
+            by_category.setdefault(product.category, []).append(product)
+        for category, items in by_category.items():
+            table = pa.Table.from_pydict(
+                {field.name: [getattr(product, field.name) for product in items] for field in PARQUET_SCHEMA},
+                schema=PARQUET_SCHEMA,
+            )
+            self._writer(category).write_table(table)
+        self.rows += len(products)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        if self._writers:
+            print(f"💾 Дані збережено у Parquet: {os.path.join(self.root, f'store={self.store}')} "
+                  f"({self.rows} рядків, {len(self._writers)} розділів)")
+
+
+class DatabaseSink:
+    """Передає пачки товарів у функцію запису до БД
+
+    З writers > 1 пачки пишуться одночасно у кількох потоках (кожен виклик save
+    бере своє з'єднання з пулу); не більше 2 * writers пачок чекають у черзі.
+    """
+
+    def __init__(self, save, writers=1):
+        self.save = save
+        self._pool = ThreadPoolExecutor(writers, thread_name_prefix='db-writer') if writers > 1 else None
+        self._slots = threading.BoundedSemaphore(writers * 2)
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception():
+            print(f"🔴 Помилка запису в БД: {future.exception()}")
+
+    def write(self, products):
+        if self._pool is None:
+            self.save(products)
+            return
+        self._slots.acquire()
+        self._pool.submit(self.save, products).add_done_callback(self._done)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+class BackgroundWriter:
+    """Фоновий потік, що забирає пачки товарів з обмеженої черги й передає їх у sinks
+
+    Обмежена черга тримає пам'ять сталою: якщо запис відстає, обхід чекає.
+    """
+
+    def __init__(self, sinks, maxsize=8):
+        self.sinks = sinks
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name='product-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, products):
+        if products:
+            self.queue.put(products)
+
+    def _run(self):
+        while True:
+            products = self.queue.get()
+            if products is _STOP:
+                break
+            for sink in self.sinks:
+                try:
+                    sink.write(products)
+                except Exception as e:
+                    print(f"🔴 Помилка запису ({type(sink).__name__}): {e}")
+            self.written += len(products)
+
+    def close(self):
+        """Дочікується запису всіх пачок і закриває sinks"""
+        self.queue.put(_STOP)
+        self._thread.join()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"🔴 Помилка закриття ({type(sink).__name__}): {e}")
+        return self.written
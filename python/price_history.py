@@ -0,0 +1,131 @@
+import argparse
+from dialects import distinct_from
+
+# Точка історії додається лише тоді, коли змінюється ціна, стара ціна, знижка чи наявність
+HISTORY_TABLE = 'price_history'
+HISTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        store VARCHAR(16) NOT NULL,
+        product_key CHAR(40) NOT NULL,
+        price DECIMAL(10,2),
+        price_bot DECIMAL(10,2),
+        discount VARCHAR(50),
+        is_available BOOLEAN NOT NULL,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_product_time (store, product_key, recorded_at),
+        INDEX idx_store_time (store, recorded_at)
+    ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+SQLITE_HISTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        store TEXT NOT NULL,
+        product_key TEXT NOT NULL,
+        price REAL,
+        price_bot REAL,
+        discount TEXT,
+        is_available INTEGER NOT NULL,
+        recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_product_time ON price_history (store, product_key, recorded_at);
+    CREATE INDEX IF NOT EXISTS idx_store_time ON price_history (store, recorded_at);
+"""
+
+_TRACKED = ('price', 'price_bot', 'discount')
+
+
+def record_changes(cursor, store, table, staging, dialect='mysql'):
+    """Додає точки історії для нових і змінених товарів проміжної таблиці
+
+    Викликається в транзакції merge_incremental до оновлення основної
+    таблиці, яка зберігає останній записаний стан товару.
+    """
+    changed = ' OR '.join(distinct_from(f"l.{column}", f"s.{column}", dialect) for column in _TRACKED)
+    availability = distinct_from('l.is_available', 'COALESCE(s.is_available, TRUE)', dialect)
+    cursor.execute(f"""
+        INSERT INTO {HISTORY_TABLE} (store, product_key, price, price_bot, discount, is_available)
+        SELECT %s, s.product_key, s.price, s.price_bot, s.discount, COALESCE(s.is_available, TRUE)
+        FROM {staging} s LEFT JOIN {table} l ON l.product_key = s.product_key
+        WHERE l.id IS NULL OR {changed} OR {availability}
+           OR NOT EXISTS (SELECT 1 FROM {HISTORY_TABLE} h
+                          WHERE h.store = %s AND h.product_key = s.product_key)
+    """, (store, store))
+    return cursor.rowcount
+
+
+def record_vanished(cursor, store, table, staging, partial_categories=()):
+    """Додає точку «недоступний» для товарів, яких немає в обійдених категоріях
+
+    partial_categories обійдено не повністю, тож їхні товари не позначаються.
+    """
+    skip = f" AND l.category NOT IN ({', '.join(['%s'] * len(partial_categories))})" if partial_categories else ''
+    cursor.execute(f"""
+        INSERT INTO {HISTORY_TABLE} (store, product_key, price, price_bot, discount, is_available)
+        SELECT %s, l.product_key, l.price, l.price_bot, l.discount, FALSE
+        FROM {table} l LEFT JOIN {staging} s ON l.product_key = s.product_key
+        WHERE s.product_key IS NULL AND l.product_key IS NOT NULL AND l.is_available IS NOT FALSE
+          AND l.category IN (SELECT category FROM (SELECT DISTINCT category FROM {staging}) c){skip}
+    """, (store, *partial_categories))
+    return cursor.rowcount
+
+
+def price_history(conn, store, product_key, since=None, until=None):
+    """Точки ціни товару за проміжок часу: список (час, ціна, стара ціна, знижка, наявність)"""
+    query = (f"SELECT recorded_at, price, price_bot, discount, is_available FROM {HISTORY_TABLE} "
+             "WHERE store = %s AND product_key = %s")
+    params = [store, product_key]
+    if since:
+        query += " AND recorded_at >= %s"
+        params.append(since)
+    if until:
+        query += " AND recorded_at < %s"
+        params.append(until)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query + " ORDER BY recorded_at", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def find_products(conn, store, name):
+    """Товари магазину, назва яких містить name: список (product_key, назва)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT product_key, name FROM {store}_products "
+            "WHERE name LIKE %s AND product_key IS NOT NULL ORDER BY name",
+            (f"%{name}%",)
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    from backends import SQLITE_PATH, open_backend
+
+    parser = argparse.ArgumentParser(description="Історія цін товару")
+    parser.add_argument('store', choices=('atb', 'silpo'))
+    parser.add_argument('name', help="частина назви товару")
+    parser.add_argument('--since', help="від дати, наприклад 2025-01-01")
+    parser.add_argument('--until', help="до дати (не включно)")
+    parser.add_argument('--db', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--sqlite-path', default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    db = open_backend(args.db, args.sqlite_path)
+    if db is None:
+        raise SystemExit(1)
+    try:
+        for key, name in db.run(lambda conn: find_products(conn, args.store, args.name)):
+            print(f"\n📈 {name}")
+            for recorded_at, price, price_bot, discount, is_available in db.run(
+                    lambda conn: price_history(conn, args.store, key, args.since, args.until)):
+                state = '' if is_available else ' (недоступний)'
+                old = f" (було {price_bot})" if price_bot else ''
+                # MySQL повертає datetime, SQLite — рядок 'РРРР-ММ-ДД ГГ:ХХ:СС'
+                print(f"  {str(recorded_at)[:16]}  {price}{old} {discount or ''}{state}")
+    finally:
+        db.close()
@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class _HostState:
+    __slots__ = ('rate', 'next_allowed', 'started', 'requests', 'backoffs', 'blocks', 'waited',
+                 'response_time')
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_allowed = 0.0
+        self.started = time.monotonic()
+        self.requests = 0
+        self.backoffs = 0
+        self.blocks = 0
+        self.waited = 0.0
+        self.response_time = 0.0
+
+
+class AdaptiveRateLimiter:
+    """Адаптивний обмежувач запитів для кожного сайту (token bucket + AIMD)
+
+    Поки сайт відповідає нормально, швидкість зростає на increase запитів/с
+    після кожної сторінки; при блокуванні, повільній відповіді чи порожній
+    сторінці — множиться на decrease. Блокування додатково ставить паузу cooldown.
+    """
+
+    def __init__(self, rate=0.25, min_rate=0.02, max_rate=1.0, increase=0.02, decrease=0.5,
+                 slow_response=10.0, cooldown=60.0, jitter=0.2):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_response = slow_response
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def share(self, parts):
+        """Ділить швидкість між parts процесами, щоб разом вони не перевищували ліміт сайту
+
+        Кожен робочий процес має власний обмежувач; після share(parts) сума їхніх
+        швидкостей не більша за max_rate одного обмежувача.
+        """
+        if parts <= 1:
+            return
+        with self._lock:
+            self.initial_rate /= parts
+            self.min_rate /= parts
+            self.max_rate /= parts
+            self.increase /= parts
+            for state in self._hosts.values():
+                state.rate /= parts
+
+    def _state(self, url):
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.initial_rate)
+        return self._hosts[host]
+
+    def wait(self, url):
+        """Чекає, доки для сайту з'явиться токен на запит"""
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            start = max(now, state.next_allowed)
+            interval = 1.0 / state.rate
+            state.next_allowed = start + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            state.requests += 1
+            delay = start - now
+            state.waited += delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, elapsed, products=None, blocked=False):
+        """Оновлює швидкість за результатом запиту
+
+        elapsed — тривалість завантаження, products — кількість знайдених товарів
+        (0 вважається сигналом перевантаження), blocked — сайт обмежив доступ.
+        """
+        with self._lock:
+            state = self._state(url)
+            state.response_time += elapsed
+            if blocked:
+                state.blocks += 1
+                state.next_allowed = max(state.next_allowed, time.monotonic() + self.cooldown)
+                self._back_off(state)
+            elif elapsed > self.slow_response or products == 0:
+                self._back_off(state)
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def _back_off(self, state):
+        state.backoffs += 1
+        state.rate = max(self.min_rate, state.rate * self.decrease)
+
+    def stats(self):
+        """Статистика по сайтах: поточна та фактична швидкість, відступи, блокування"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(state.rate, 3),
+                    'observed_rate': round(state.requests / max(now - state.started, 1e-9), 3),
+                    'requests': state.requests,
+                    'backoffs': state.backoffs,
+                    'blocks': state.blocks,
+                    'waited_sec': round(state.waited, 1),
+                    'avg_response_sec': round(state.response_time / state.requests, 2) if state.requests else None,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def report(self):
+        """Друкує статистику по сайтах"""
+        for host, stats in self.stats().items():
+            print(f"🚦 {host}: {stats['requests']} запитів, швидкість {stats['rate']} запит/с "
+                  f"(фактично {stats['observed_rate']}), "
+                  f"відступів {stats['backoffs']}, блокувань {stats['blocks']}, "
+                  f"очікування {stats['waited_sec']} с")
+
+
+# Спільний обмежувач процесу: у паралельному режимі кожен робочий процес має власний
+# і отримує частку швидкості (share у parallel._init_worker)
+default_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,38 @@
+import sys
+from dataclasses import dataclass, asdict
+
+
+@dataclass(slots=True)
+class Product:
+    """Запис товару лише з примітивних значень; заповнюється під час розбору сторінки
+
+    Не тримає посилань на дерево сторінки, тож розібрані сторінки звільняються одразу.
+    """
+    name: str
+    price: float
+    price_bot: float = None
+    discount: str = None
+    unit: str = None
+    quantity: float = None
+    image_url: str = None
+    category: str = None
+    is_available: bool = True
+    # Заповнюються units.normalize_batch під час запису
+    base_unit: str = None
+    base_quantity: float = None
+    price_per_kg_or_l: float = None
+    old_price_per_kg_or_l: float = None
+    # Заповнюється search.index_batch
+    search_text: str = None
+
+    def __post_init__(self):
+        # Одиниці повторюються в кожному записі — зберігаємо один екземпляр рядка
+        if self.unit is not None:
+            self.unit = sys.intern(self.unit)
+
+    def get(self, key, default=None):
+        """Доступ як у словника (для csv.DictWriter та побудови рядків БД)"""
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return asdict(self)
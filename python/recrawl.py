@@ -0,0 +1,177 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+SCHEDULE_PATH = os.path.join(os.path.dirname(__file__), 'info', 'recrawl.db')
+
+# Інтервали повторного обходу категорії, години
+MIN_INTERVAL = 6.0
+MAX_INTERVAL = 7 * 24.0
+# Через скільки годин повторити категорію, обхід якої збоїв або заблоковано
+RETRY_INTERVAL = 1.0
+# Вага останнього обходу в експоненційному середньому частоти змін
+RATE_ALPHA = 0.3
+# Скільки перших сторінок без змін зупиняють обхід категорії
+UNCHANGED_PAGES = 2
+
+SCHEDULE_DDL = """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        store TEXT NOT NULL,
+        category TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        fingerprint TEXT NOT NULL,
+        checked_at REAL NOT NULL,
+        PRIMARY KEY (store, category, page)
+    );
+    CREATE TABLE IF NOT EXISTS categories (
+        store TEXT NOT NULL,
+        category TEXT NOT NULL,
+        change_rate REAL NOT NULL,
+        crawls INTEGER NOT NULL,
+        changes INTEGER NOT NULL,
+        last_crawl REAL NOT NULL,
+        next_crawl REAL NOT NULL,
+        short_circuited INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (store, category)
+    );
+"""
+
+
+def page_fingerprint(products, page_count=None):
+    """Хеш даних карток сторінки: назва, ціни, знижка, наявність і кількість сторінок"""
+    cards = sorted((product.name, product.price, product.price_bot, product.discount, product.is_available)
+                   for product in products)
+    return hashlib.sha1(repr((page_count, cards)).encode('utf-8')).hexdigest()
+
+
+def next_interval(change_rate, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+    """Інтервал до наступного обходу, години: чим рідше змінюються ціни, тим довший"""
+    return min(max(min_interval / max(change_rate, 1e-3), min_interval), max_interval)
+
+
+class RecrawlScheduler:
+    """Розклад повторних обходів за частотою змін кожної категорії (SQLite)
+
+    Для кожної сторінки зберігається відбиток карток. Якщо перші unchanged_pages
+    сторінок категорії не змінилися, решта сторінок не завантажується. Після
+    обходу частота змін категорії оновлюється експоненційним середнім, і з неї
+    визначається, коли категорію обходити наступного разу.
+    Як і CrawlJournal, об'єкт можна передавати в робочі процеси.
+    """
+
+    def __init__(self, store, path=SCHEDULE_PATH, unchanged_pages=UNCHANGED_PAGES,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, retry_interval=RETRY_INTERVAL):
+        self.store = store
+        self.path = path
+        self.unchanged_pages = unchanged_pages
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self.started = time.time()
+        self._conn = None
+        self._pid = None
+        self._state = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_conn=None, _pid=None, _state={})
+        return state
+
+    def _connect(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEDULE_DDL)
+            self._pid = os.getpid()
+        return self._conn
+
+    def due(self, categories, now=None):
+        """Категорії, час обходу яких настав (нові категорії — завжди)"""
+        now = now or time.time()
+        rows = self._connect().execute(
+            "SELECT category, next_crawl, change_rate FROM categories WHERE store = ?", (self.store,))
+        schedule = {category: (next_crawl, rate) for category, next_crawl, rate in rows}
+        selected = []
+        for name, url in categories:
+            next_crawl, rate = schedule.get(name, (0, None))
+            if next_crawl <= now:
+                selected.append((name, url))
+            else:
+                print(f"⏭️ {name}: наступний обхід через {(next_crawl - now) / 3600:.1f} год "
+                      f"(частота змін {rate:.2f})")
+        return selected
+
+    def check_page(self, category, page, products, page_count=None):
+        """Записує відбиток сторінки; True, якщо решту сторінок категорії можна не завантажувати"""
+        state = self._state.setdefault(category, {'pages': 0, 'changed': False, 'leading': 0})
+        fingerprint = page_fingerprint(products, page_count)
+        conn = self._connect()
+        row = conn.execute("SELECT fingerprint FROM fingerprints WHERE store = ? AND category = ? AND page = ?",
+                           (self.store, category, page)).fetchone()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO fingerprints (store, category, page, fingerprint, checked_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (self.store, category, page, fingerprint, time.time()))
+        state['pages'] += 1
+        unchanged = row is not None and row[0] == fingerprint
+        if not unchanged:
+            state['changed'] = True
+        # Рахуються лише сторінки без змін поспіль від першої
+        if unchanged and state['leading'] == page - 1:
+            state['leading'] = page
+        return not state['changed'] and state['leading'] >= self.unchanged_pages
+
+    def finish_category(self, category, short_circuited=False):
+        """Оновлює частоту змін категорії та час наступного обходу"""
+        state = self._state.pop(category, None)
+        if not state or not state['pages']:
+            return
+        conn = self._connect()
+        row = conn.execute("SELECT change_rate, crawls, changes FROM categories WHERE store = ? AND category = ?",
+                           (self.store, category)).fetchone()
+        changed = state['changed']
+        if row is None:
+            # Перший обхід: змін ще не з чим порівняти, починаємо з найчастішого розкладу
+            rate, crawls, changes = 1.0, 1, 0
+        else:
+            rate = RATE_ALPHA * changed + (1 - RATE_ALPHA) * row[0]
+            crawls, changes = row[1] + 1, row[2] + changed
+        now = time.time()
+        interval = next_interval(rate, self.min_interval, self.max_interval)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO categories (store, category, change_rate, crawls, changes, "
+                         "last_crawl, next_crawl, short_circuited) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (self.store, category, rate, crawls, changes, now, now + interval * 3600,
+                          int(short_circuited)))
+        print(f"🗓️ {category}: частота змін {rate:.2f}, наступний обхід через {interval:.1f} год")
+
+    def retry_soon(self, categories):
+        """Переносить наступний обхід не повністю обійдених категорій на retry_interval
+
+        finish_category уже відсунув його за частотою змін, але збій чи блокування
+        сторінки не означає, що категорія не змінюється. Зупинені після незмінних
+        перших сторінок категорії (short_circuited) сюди не передаються.
+        """
+        categories = sorted(categories)
+        if not categories:
+            return
+        retry_at = time.time() + self.retry_interval * 3600
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE categories SET next_crawl = MIN(next_crawl, ?) WHERE store = ? "
+                         f"AND short_circuited = 0 AND category IN ({', '.join(['?'] * len(categories))})",
+                         (retry_at, self.store, *categories))
+        print(f"🔁 Повторний обхід через {self.retry_interval:.1f} год: {', '.join(categories)}")
+
+    def short_circuited(self):
+        """Категорії цього запуску, обхід яких зупинено після незмінних перших сторінок"""
+        rows = self._connect().execute(
+            "SELECT category FROM categories WHERE store = ? AND short_circuited = 1 AND last_crawl >= ?",
+            (self.store, self.started))
+        return [row[0] for row in rows]
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
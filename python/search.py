@@ -0,0 +1,26 @@
+import re
+import unicodedata
+
+# Текст для повнотекстового пошуку (FULLTEXT ... WITH PARSER ngram) за назвою та категорією
+SEARCH_COLUMNS = ('search_text',)
+SEARCH_INDEX = 'FULLTEXT INDEX ft_search (search_text) WITH PARSER ngram'
+
+# Варіанти апострофа в українських назвах (м'ясо, мʼясо, м’ясо) зводяться до одного вигляду
+_APOSTROPHES_RE = re.compile(r"[’ʼ`´‘]")
+
+
+def search_text(name, category=None):
+    """Нормалізований текст для пошуку: NFC, casefold, єдиний апостроф, одинарні пробіли
+
+    serv/src/app.service.ts (toSearchQuery) нормалізує запит так само.
+    """
+    text = f"{name} {category or ''}"
+    text = _APOSTROPHES_RE.sub("'", unicodedata.normalize('NFC', text)).casefold()
+    return ' '.join(text.split())
+
+
+def index_batch(products):
+    """Заповнює search_text для пачки товарів перед записом"""
+    for product in products:
+        product.search_text = search_text(product.name, product.category)
+    return products
@@ -3,304 +3,561 @@ from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import mysql.connector
+import argparse
+import functools
 import time
 import random
-import csv
 import os
-import re
-from config import host, user, password, db_name, port
+from urllib.parse import urlparse
+from parsers import parse_silpo_page
+from parallel import crawl_parallel, start_headless_edge
+from browser_pool import DEFAULT_MAX_PAGES, ManagedDriver, start_headless_chromium
+from page_archive import archive_page, replay_archive
+from js_extract import extract_with_js
+from silpo_api import crawl_api
+from checkpoint import CrawlJournal
+from recrawl import RecrawlScheduler
+from work_queue import IDLE_EXIT, QUEUE_TIMEOUT, TaskError, WorkQueue, crawl_queue, follow_pages, page_url, run_workers
+from images import update_product_images
+from matching import rebuild_matches
+from pipeline import BackgroundWriter, CsvSink, DatabaseSink, ParquetSink, export_formats
+from rate_limiter import default_limiter
+from metrics import METRICS_DIR, default_metrics
+from units import UNIT_COLUMNS, normalize_batch
+from search import SEARCH_COLUMNS, index_batch
+from storage import DEFAULT_BATCH_SIZE, IDENTITY_COLUMNS, with_identity, staging_table
+from backends import SQLITE_PATH, open_backend
 
-def connect_to_database():
-    """Підключення до бази даних MAMP"""
-    try:
-        conn = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=db_name,
-            port=port,
-        )
-        print("Підключено до бази даних MAMP")
-        return conn
-    except Exception as e:
-        print(f"Помилка підключення до MySQL: {e}")
-        return None
+def connect_to_database(allow_local_infile=False, backend='mysql', sqlite_path=SQLITE_PATH, pool_size=4):
+    """Підключення до бази даних MAMP (пул з'єднань) або до локальної SQLite"""
+    db = open_backend(backend, sqlite_path, pool_size, allow_local_infile)
+    if db:
+        print("Підключено до бази даних " + ("MAMP" if backend == 'mysql' else f"SQLite ({sqlite_path})"))
+    return db
 
-def save_to_database(conn, products):
-    """Зберігає список продуктів у базу даних"""
-    if not conn:
-        print("Відсутнє з'єднання з базою даних.")
-        return
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS silpo_products (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        category VARCHAR(255) NOT NULL,
+        name VARCHAR(500) NOT NULL,
+        price DECIMAL(10,2) NOT NULL,
+        price_bot DECIMAL(10,2),
+        discount VARCHAR(50),
+        unit VARCHAR(10),
+        quantity DECIMAL(10,3),
+        image_url VARCHAR(512),
+        is_available BOOLEAN DEFAULT TRUE,
+        product_key CHAR(40) NULL,
+        content_hash CHAR(40) NULL,
+        base_unit VARCHAR(4) NULL,
+        base_quantity DECIMAL(12,4) NULL,
+        price_per_kg_or_l DECIMAL(12,2) NULL,
+        old_price_per_kg_or_l DECIMAL(12,2) NULL,
+        search_text VARCHAR(800) NULL,
+        image_path VARCHAR(100) NULL,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE INDEX uq_product_key (product_key),
+        INDEX idx_unit_price (base_unit, price_per_kg_or_l),
+        FULLTEXT INDEX ft_search (search_text) WITH PARSER ngram,
+        INDEX idx_category (category),
+        INDEX idx_price (price),
+        INDEX idx_availability (is_available)
+    ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
 
-    cursor = conn.cursor()
+COLUMNS = ('category', 'name', 'price', 'price_bot', 'discount', 'unit', 'quantity', 'image_url', 'is_available') + UNIT_COLUMNS + SEARCH_COLUMNS
 
-    try:
-        # Створення таблиці, якщо вона не існує
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS silpo_products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                category VARCHAR(255) NOT NULL,
-                name VARCHAR(500) NOT NULL,
-                price DECIMAL(10,2) NOT NULL,
-                price_bot DECIMAL(10,2),
-                discount VARCHAR(50),
-                unit VARCHAR(10),
-                quantity DECIMAL(10,3),
-                image_url VARCHAR(512),
-                is_available BOOLEAN DEFAULT TRUE,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_category (category),
-                INDEX idx_price (price),
-                INDEX idx_availability (is_available)
-            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
-        """)
+def product_to_row(product):
+    """Перетворює запис товару на рядок таблиці"""
+    return (
+        product.category,
+        product.name,
+        product.price,
+        product.price_bot,
+        product.discount,
+        product.unit,
+        product.quantity,
+        product.image_url,
+        product.is_available,
+        product.base_unit,
+        product.base_quantity,
+        product.price_per_kg_or_l,
+        product.old_price_per_kg_or_l,
+        product.search_text
+    )
 
-        insert_query = """
-            INSERT INTO silpo_products 
-            (category, name, price, price_bot, discount, unit, quantity, image_url, is_available)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+def prepare_database(db, incremental=True):
+    """Готує таблицю та, для інкрементального режиму, проміжну таблицю"""
+    db.prepare('silpo_products', TABLE_DDL, incremental)
 
-        inserted_count = 0
+def save_to_database(db, products, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False, incremental=False):
+    """Зберігає список продуктів у базу даних пачками
 
+    В інкрементальному режимі товари пишуться у проміжну таблицю, яку потім
+    зливає з основною db.merge. Кожен виклик бере окреме з'єднання сховища.
+    """
+    if not db:
+        print("Відсутнє з'єднання з базою даних.")
+        return
+
+    with default_metrics.timer('normalize', store='silpo'):
+        normalize_batch(products)
+        index_batch(products)
+        rows = []
         for product in products:
             try:
-                # Конвертація значень до правильних типів з перевіркою
-                price = float(product.get('price', '0').replace(' ', '').replace(',', '.'))
-                price_bot = product.get('price_bot')
-                price_bot = float(price_bot.replace(' ', '').replace(',', '.')) if price_bot else None
-
-                quantity = product.get('quantity')
-                quantity = float(quantity) if quantity is not None else None
-
-                values = (
-                    product.get('category'),
-                    product.get('name'),
-                    price,
-                    price_bot,
-                    product.get('discount'),
-                    product.get('unit'),
-                    quantity,
-                    product.get('image_url'),
-                    product.get('is_available', True)
-                )
-
-                cursor.execute(insert_query, values)
-                inserted_count += 1
-
+                rows.append(product_to_row(product))
             except Exception as inner_e:
-                print(f"Не вдалося зберегти товар: {product.get('name')}")
+                default_metrics.count('skipped_rows', store='silpo', category=product.category)
+                print(f"Не вдалося зберегти товар: {product.name}")
                 print(f"Помилка: {inner_e}")
-                continue
 
-        conn.commit()
+    try:
+        with default_metrics.timer('db_write', store='silpo'):
+            if incremental:
+                inserted_count = db.insert(staging_table('silpo_products'), COLUMNS + IDENTITY_COLUMNS,
+                                           with_identity('silpo', COLUMNS, rows), batch_size, use_load_data,
+                                           ignore_duplicates=True)
+            else:
+                inserted_count = db.insert('silpo_products', COLUMNS, rows, batch_size, use_load_data)
         print(f"Успішно збережено {inserted_count} товарів у базу даних.")
 
     except Exception as e:
-        conn.rollback()
         print("Помилка під час збереження до БД:")
         print(e)
         import traceback
         traceback.print_exc()
 
-    finally:
-        cursor.close()
-
-def connect_to_existing_edge():
-    """Підключення до браузера"""
+def connect_to_existing_edge(capture_network=False):
+    """Підключення до браузера; capture_network вмикає журнал мережевих подій (CDP)"""
     edge_options = Options()
     edge_options.add_experimental_option("debuggerAddress", "localhost:9222")
+    if capture_network:
+        edge_options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
     driver = webdriver.Edge(options=edge_options)
+    if capture_network:
+        driver.execute_cdp_cmd('Network.enable', {})
     return driver
 
 def human_like_delay(min=1, max=3):
     """Імітація людської затримки"""
     time.sleep(random.uniform(min, max))
 
-def extract_products(driver):
-    """Витяг даних про продукти з урахуванням перевірки ваги"""
-    try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.products-list"))
+def is_blocked(driver, js=False):
+    """Перевірка сторінки блокування; в JS-режимі без передачі всього DOM"""
+    if js:
+        return driver.execute_script(
+            "return document.documentElement.textContent.includes('Доступ обмежений');"
         )
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        products_container = soup.find('div', class_='products-list')
-        
-        if not products_container:
-            print("Не знайдено контейнер з товарами")
-            return []
-            
-        products = products_container.find_all('shop-silpo-common-product-card')
-        extracted = []
-        
-        for product in products:
-            try:
-                product_card = product.find('a', class_='product-card')
-                if not product_card:
-                    continue
-                
-                name = product_card.find('div', class_='product-card__title').get_text(strip=True)
-                price = product_card.find('div', class_='product-card-price__displayPrice').get_text(strip=True)
-                price = price.replace(' ', '')[:-3]  # Видаляємо пробіли та "₴"
-                
-                # Обробка опціональних полів
-                price_bot_elem = product_card.find('div', class_='product-card-price__displayOldPrice')
-                price_bot = price_bot_elem.get_text(strip=True).replace(' ', '')[:-3] if price_bot_elem else None
-                
-                discount_elem = product_card.find('div', class_='product-card-price__sale')
-                discount = discount_elem.get_text(strip=True) if discount_elem else None
-                
-                # Удосконалена обробка ваги
-                weight_elem = product_card.find('div', class_='ft-typo-14-semibold')
-                unit, quantity = None, None
-                
-                if weight_elem:
-                    weight_text = weight_elem.get_text(strip=True)
-                    # Регулярний вираз для знаходження ваги (число + одиниця)
-                    weight_match = re.match(r'^(\d+[,.]?\d*)\s*([а-яґєіїa-z]*)$', weight_text, re.IGNORECASE)
-                    if weight_match:
-                        quantity = float(weight_match.group(1).replace(',', '.'))
-                        unit = weight_match.group(2).lower() if weight_match.group(2) else None
-                
-                # Если unit = "шт", ищем вес в названии
-                if unit == 'шт' or (unit is None and weight_elem is None):
-                    # Ищем в названии паттерны типа "100г", "0.5кг" и т.д.
-                    name_weight_match = re.search(r'(\d+[,.]?\d*)\s*(г|кг|мл|л|шт)', name, re.IGNORECASE)
-                    if name_weight_match:
-                        quantity = float(name_weight_match.group(1).replace(',', '.'))
-                        unit = name_weight_match.group(2).lower()
-                    else:
-                        # Если не нашли в названии, оставляем unit = "шт", quantity = NULL
-                        unit = 'шт'
-                        quantity = None
-                
-                img_tag = product_card.find('img', class_='product-card__product-img')
-                image_url = img_tag['src'] if img_tag and 'src' in img_tag.attrs else None
-                if image_url and not image_url.startswith('http'):
-                    image_url = f"https://silpo.ua{image_url}"
-                
-                is_available = product_card.find('div', class_='cart-soldout')
-                if is_available == "Товар закінчився":
-                    continue
-                
-                extracted.append({
-                    'name': name,
-                    'price': price,
-                    'price_bot': price_bot,
-                    'discount': discount,
-                    'unit': unit,
-                    'quantity': quantity,
-                    'image_url': image_url
-                })
-                
-            except Exception as e:
-                print(f"Помилка парсингу товару: {e}")
-                continue
-                
+    return "Доступ обмежений" in driver.page_source
+
+def extract_page(driver, engine=None, archive_key=None, js=False):
+    """Витяг товарів сторінки та кількості сторінок категорії з пагінації"""
+    try:
+        with default_metrics.timer('wait'):
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.products-list"))
+            )
+        html = None
+        if archive_key or not js:
+            # page_source передається з браузера один раз і для архіву, і для розбору
+            with default_metrics.timer('page_source'):
+                html = driver.page_source
+        if archive_key:
+            # archive_key = (категорія, номер сторінки, url)
+            with default_metrics.timer('archive'):
+                archive_page('silpo', *archive_key, html)
+        if js:
+            # Один execute_script замість передачі та розбору всього DOM
+            with default_metrics.timer('js_extract'):
+                extracted, page_count = extract_with_js(driver, 'silpo')
+        else:
+            with default_metrics.timer('parse'):
+                extracted, page_count = parse_silpo_page(html, engine)
         print(f"Знайдено товарів на сторінці: {len(extracted)}")
-        return extracted
+        return extracted, page_count
         
     except Exception as e:
+        default_metrics.count('errors')
         print(f"Помилка витягування товарів: {e}")
-        return []
+        return [], None
 
-def process_category(driver, base_url, category_name, min_products=47, max_pages=100):
-    """Обробка категорії"""
-    all_products = []
-    current_page = 1
-    has_next_page = True
+def extract_products(driver, engine=None, archive_key=None):
+    """Витяг даних про продукти з урахуванням перевірки ваги"""
+    return extract_page(driver, engine, archive_key)[0]
+
+def load_page(driver, url, category_name, current_page, archive=True, js=False):
+    """Завантаження сторінки категорії: (товари, кількість сторінок) або None при блокуванні"""
+    with default_metrics.page('silpo', category_name, current_page):
+        with default_metrics.timer('delay'):
+            default_limiter.wait(url)
+        started = time.monotonic()
+        with default_metrics.timer('load'):
+            driver.get(url)
+        load_time = time.monotonic() - started
+        
+        with default_metrics.timer('block_check'):
+            blocked = is_blocked(driver, js)
+        if blocked:
+            default_limiter.record(url, load_time, blocked=True)
+            default_metrics.count('blocks')
+            return None
+            
+        products, page_count = extract_page(driver, archive_key=(category_name, current_page, url) if archive else None,
+                                            js=js)
+        default_limiter.record(url, load_time, len(products))
+        default_metrics.count('pages')
+        default_metrics.count('products', len(products))
+    return products, page_count
+
+def iter_category_pages(driver, base_url, category_name, min_products=47, max_pages=100, archive=True,
+                        js=False, journal=None, scheduler=None):
+    """Обробка категорії по сторінках: товари кожної сторінки віддаються окремою пачкою
+
+    Кількість сторінок береться з пагінації першої сторінки; якщо її немає,
+    наступна сторінка запитується лише після повної (min_products товарів).
+    Сторінки, вже записані в journal, беруться з нього без завантаження.
+    scheduler (RecrawlScheduler) зупиняє обхід, якщо перші сторінки не змінилися.
+    """
+    pending = [1]
+    known_pages = False
+    complete = True
+    short_circuited = False
+    total = 0
     
-    while has_next_page and current_page <= max_pages:
-        url = f"{base_url}?page={current_page}" if current_page > 1 else base_url
-        print(f"\nОбробка сторінки {current_page}: {url}")
+    while pending:
+        current_page = pending.pop(0)
+        url = page_url(base_url, current_page)
         
         try:
-            driver.get(url)
-            human_like_delay(2, 4)
+            saved = journal.load_page(category_name, current_page) if journal else None
+            if saved:
+                products, page_count = saved
+                default_metrics.count('resumed_pages', store='silpo', category=category_name)
+                print(f"\nСторінка {current_page} з журналу: {len(products)} товарів")
+            else:
+                print(f"\nОбробка сторінки {current_page}: {url}")
+                page = load_page(driver, url, category_name, current_page, archive, js)
+                if page is None:
+                    print("Блокування доступу! Перехід до наступної категорії")
+                    complete = False
+                    break
+                products, page_count = page
+            if current_page == 1 and page_count:
+                known_pages = True
+                pending = list(range(2, min(page_count, max_pages) + 1))
+                print(f"Сторінок у категорії: {page_count}")
             
-            if "Доступ обмежений" in driver.page_source:
-                print("Блокування доступу! Перехід до наступної категорії")
-                break
-                
-            products = extract_products(driver)
             if not products:
+                default_metrics.count('empty_pages', store='silpo', category=category_name)
                 print("Товари не знайдені")
+                # Сторінка без товарів — збій завантаження, тож категорію обійдено не повністю
+                if known_pages or current_page == 1:
+                    complete = False
+                if known_pages:
+                    continue
                 break
                 
-            all_products.extend(products)
+            for product in products:
+                product.category = category_name
+            if journal and not saved:
+                journal.record_page(category_name, current_page, products, page_count)
+            unchanged = scheduler.check_page(category_name, current_page, products, page_count) \
+                if scheduler and not saved else False
+            total += len(products)
+            yield products
             
-            if len(products) < min_products:
-                print(f"На сторінці лише {len(products)} товарів")
+            if unchanged:
+                short_circuited = True
+                print(f"Перші {scheduler.unchanged_pages} сторінки без змін, "
+                      f"решту сторінок категорії пропущено")
                 break
-                
-            current_page += 1
-            human_like_delay(3, 5)
+            
+            if not known_pages:
+                if len(products) < min_products:
+                    print(f"На сторінці лише {len(products)} товарів")
+                elif current_page < max_pages:
+                    pending.append(current_page + 1)
             
         except Exception as e:
+            complete = False
+            default_metrics.count('errors', store='silpo', category=category_name)
             print(f"Помилка обробки сторінки: {e}")
-            break
-    
-    for product in all_products:
-        product['category'] = category_name
+            if not known_pages:
+                break
     
-    print(f"Всього товарів у категорії {category_name}: {len(all_products)}")
-    return all_products
+    if journal and complete:
+        journal.complete_category(category_name)
+    if scheduler:
+        scheduler.finish_category(category_name, short_circuited)
+    print(f"Всього товарів у категорії {category_name}: {total}")
 
-def main():
-    """Головна функція"""
-    categories = [
-        ("М'ясо", "https://silpo.ua/category/m-iaso-4411"),
-        ("Риба", "https://silpo.ua/category/ryba-4430"),
-        ("Ковбасні вироби", "https://silpo.ua/category/kovbasni-vyroby-i-m-iasni-delikatesy-4731"),
-        ("Сири", "https://silpo.ua/category/syry-1468"),
-        ("Хліб та випічка", "https://silpo.ua/category/khlib-ta-vypichka-5121"),
-        ("Молочні продукти", "https://silpo.ua/category/molochni-produkty-ta-iaitsia-234"),
-        ("Бакалія", "https://silpo.ua/category/bakaliia-i-konservy-4870"),
-        ("Соуси та спеції", "https://silpo.ua/category/sousy-i-spetsii-4938"),
-        ("Заморожені продукти", "https://silpo.ua/category/zamorozhena-produktsiia-264"),
-        ("Овочі та фрукти", "https://silpo.ua/category/frukty-ovochi-4788")
-    ]
-    
+def process_category(driver, base_url, category_name, min_products=47, max_pages=100, archive=True, js=False,
+                     journal=None, scheduler=None):
+    """Обробка категорії"""
+    pages = iter_category_pages(driver, base_url, category_name, min_products, max_pages, archive, js, journal,
+                                scheduler)
+    return [product for products in pages for product in products]
+
+def process_task(driver, task, min_products=47, max_pages=100, archive=True, js=False):
+    """Обробка однієї сторінки з черги завдань: (товари, кількість сторінок, наступні сторінки)"""
+    url = page_url(task.url, task.page)
+    print(f"\n{task.category}, сторінка {task.page}: {url}")
+    page = load_page(driver, url, task.category, task.page, archive, js)
+    if page is None:
+        raise TaskError(f"{url}: блокування доступу")
+    products, page_count = page
+    if not products:
+        raise TaskError(f"{url}: на сторінці немає товарів")
+    for product in products:
+        product.category = task.category
+    return products, page_count, follow_pages(task.page, products, page_count, min_products, max_pages)
+
+CATEGORIES = [
+    ("М'ясо", "https://silpo.ua/category/m-iaso-4411"),
+    ("Риба", "https://silpo.ua/category/ryba-4430"),
+    ("Ковбасні вироби", "https://silpo.ua/category/kovbasni-vyroby-i-m-iasni-delikatesy-4731"),
+    ("Сири", "https://silpo.ua/category/syry-1468"),
+    ("Хліб та випічка", "https://silpo.ua/category/khlib-ta-vypichka-5121"),
+    ("Молочні продукти", "https://silpo.ua/category/molochni-produkty-ta-iaitsia-234"),
+    ("Бакалія", "https://silpo.ua/category/bakaliia-i-konservy-4870"),
+    ("Соуси та спеції", "https://silpo.ua/category/sousy-i-spetsii-4938"),
+    ("Заморожені продукти", "https://silpo.ua/category/zamorozhena-produktsiia-264"),
+    ("Овочі та фрукти", "https://silpo.ua/category/frukty-ovochi-4788")
+]
+
+def crawl_sequential(categories, archive=True, js=False, journal=None, make_driver=None, scheduler=None):
+    """Послідовна обробка категорій в одному браузері (Edge на порту 9222 або make_driver)"""
+    driver = make_driver() if make_driver else connect_to_existing_edge()
+    try:
+        for category_name, url in categories:
+            for products in iter_category_pages(driver, url, category_name, archive=archive, js=js,
+                                                journal=journal, scheduler=scheduler):
+                yield category_name, products
+    finally:
+        driver.quit()
+        default_limiter.report()
+
+def crawl_via_api(categories, concurrency=4, base_url=None, api_template=None, incomplete=None):
+    """Обхід через JSON API: браузер потрібен лише для перехоплення першого запиту"""
+    driver = None if api_template else connect_to_existing_edge(capture_network=True)
+    try:
+        yield from crawl_api(driver, categories, concurrency, base_url, api_template, incomplete)
+    finally:
+        if driver:
+            driver.quit()
+
+def main(workers=1, per_host=2, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False, incremental=True,
+         archive=True, replay=False, js=False, api=False, concurrency=4, base_url=None, api_template=None,
+         export=export_formats()[0], metrics_dir=METRICS_DIR, resume=False, browser='edge',
+         session_pages=DEFAULT_MAX_PAGES, backend='mysql', sqlite_path=SQLITE_PATH,
+         db_writers=None, schedule=False, images=False, queue=False, queue_timeout=QUEUE_TIMEOUT,
+         match=False):
+    """Головна функція
+
+    З resume=True сторінки незавершеного запуску беруться з журналу checkpoint
+    (для обходу браузером), а обхід продовжується з місця збою чи блокування.
+    З queue=True сторінки обробляють воркери (run_queue_worker) через спільну
+    чергу в БД, а тут лише записуються їхні результати.
+    """
     # Підключення до БД
-    db_conn = connect_to_database()
+    # Кілька потоків запису для паралельного обходу, кожен зі своїм з'єднанням пулу
+    db_writers = db_writers or workers
+    db = connect_to_database(allow_local_infile=use_load_data, backend=backend, sqlite_path=sqlite_path,
+                             pool_size=db_writers + 1)
+    if db:
+        prepare_database(db, incremental)
+    elif queue:
+        print("Черзі завдань потрібна БД")
+        return
+    
+    # Запис у БД та файл у фоновому потоці, поки браузер завантажує наступні сторінки
+    if export == 'parquet':
+        sinks = [ParquetSink('silpo')]
+    else:
+        sinks = [CsvSink(os.path.join(os.path.dirname(__file__), 'info', 'silpo_products.csv'),
+                         ['category', 'name', 'price', 'image_url'])]
+    if db:
+        sinks.append(DatabaseSink(functools.partial(
+            save_to_database, db, batch_size=batch_size,
+            use_load_data=use_load_data, incremental=incremental), writers=db_writers))
+    writer = BackgroundWriter(sinks)
+    # Журнал завершених сторінок; API та архів обходяться повністю за один прохід, черга зберігає стан сама
+    task_queue = WorkQueue(db, 'silpo') if queue and not (replay or api) else None
+    # Категорії, частину сторінок API яких не вдалося завантажити, та категорії невдалих сеансів --workers
+    api_incomplete = set()
+    parallel_failed = set()
+    journal = None if replay or api or task_queue else CrawlJournal('silpo', resume=resume)
+    # Розклад за частотою змін: лише категорії, час яких настав (і незавершені з журналу)
+    scheduler = RecrawlScheduler('silpo') if schedule and (journal or task_queue) else None
+    categories = CATEGORIES
+    if scheduler:
+        due = scheduler.due(CATEGORIES)
+        pending = journal.categories() if resume and journal else set()
+        categories = [(name, url) for name, url in CATEGORIES if (name, url) in due or name in pending]
+    # Керований headless Chromium замість Edge, запущеного вручну
+    make_driver = None
+    if browser == 'chromium':
+        make_driver = functools.partial(ManagedDriver, start_headless_chromium, session_pages)
     
     try:
-        # Підключення до браузера
-        driver = connect_to_existing_edge()
-        all_products = []
-        
-        for category_name, url in categories:
-            products = process_category(driver, url, category_name)
-            if products:
-                all_products.extend(products)
-                # Збереження у БД
-                if db_conn:
-                    save_to_database(db_conn, products)
-            
-            human_like_delay(5, 8)
+        # Підключення до браузера або паралельні сеанси
+        if replay:
+            results = replay_archive('silpo', CATEGORIES)
+        elif api:
+            results = crawl_via_api(CATEGORIES, concurrency, base_url, api_template, api_incomplete)
+        elif task_queue:
+            results = crawl_queue(task_queue, categories, resume, scheduler, timeout=queue_timeout)
+        elif workers > 1:
+            results = crawl_parallel(functools.partial(iter_category_pages, archive=archive, js=js, journal=journal,
+                                                       scheduler=scheduler),
+                                     categories, workers, per_host,
+                                     make_driver or functools.partial(ManagedDriver, start_headless_edge, session_pages),
+                                     failed=parallel_failed)
+        else:
+            results = crawl_sequential(categories, archive, js, journal, make_driver, scheduler)
         
-        # Збереження в CSV
-        if all_products:
-            info_folder = os.path.join(os.path.dirname(__file__), 'info')
-            os.makedirs(info_folder, exist_ok=True)
-            csv_path = os.path.join(info_folder, 'silpo_products.csv')
-            
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=['category', 'name', 'price', 'image_url'])
-                writer.writeheader()
-                writer.writerows(all_products)
-            
-            print(f"Дані збережено у {csv_path}")
+        for category_name, products in results:
+            writer.put(products)
             
     except Exception as e:
         print(f"Критична помилка: {e}")
     finally:
-        if 'driver' in locals():
-            driver.quit()
-        if db_conn:
-            db_conn.close()
+        written = writer.close()
+        # Не повністю обійдені категорії: відсутні в них товари не позначаються зниклими
+        partial = api_incomplete | parallel_failed
+        if journal:
+            journal.finish(categories)
+            partial.update(journal.incomplete(categories))
+            journal.close()
+        if task_queue:
+            partial.update(task_queue.failed_categories())
+        if scheduler:
+            # Збої та блокування не відсувають категорію на весь інтервал розкладу
+            scheduler.retry_soon(partial)
+            partial.update(scheduler.short_circuited())
+            scheduler.close()
+        try:
+            # Перенесення змін в основну таблицю
+            if db and incremental and written:
+                with default_metrics.timer('db_merge', store='silpo'):
+                    db.merge('silpo_products', COLUMNS, store='silpo', partial_categories=sorted(partial))
+        except Exception as e:
+            print(f"Помилка злиття змін: {e}")
+        try:
+            # Локальні копії зображень нових і змінених товарів
+            if db and images and written:
+                with default_metrics.timer('images', store='silpo'):
+                    update_product_images(db, 'silpo_products')
+        except Exception as e:
+            print(f"Помилка завантаження зображень: {e}")
+        try:
+            # Пари ATB↔Silpo за свіжими товарами обох магазинів
+            if db and match and written:
+                with default_metrics.timer('matching', store='silpo'):
+                    rebuild_matches(db)
+        except Exception as e:
+            print(f"Помилка зіставлення товарів: {e}")
+        if db:
+            db.close()
+        json_path, _ = default_metrics.write_reports('silpo', metrics_dir)
+        print(f"Час етапів, с: {default_metrics.summary()}")
+        print(f"Звіт запуску: {json_path}")
+
+def run_queue_worker(workers=1, per_host=2, archive=True, js=False, browser='edge',
+                     session_pages=DEFAULT_MAX_PAGES, backend='mysql', sqlite_path=SQLITE_PATH,
+                     idle_exit=IDLE_EXIT, metrics_dir=METRICS_DIR):
+    """Воркер спільної черги: обробка сторінок Сільпо, доки координатор (--queue) додає завдання"""
+    if browser == 'chromium':
+        make_driver = functools.partial(ManagedDriver, start_headless_chromium, session_pages)
+    else:
+        # Edge теж у керованому сеансі: перезапуск після збою чи session_pages сторінок
+        make_driver = functools.partial(ManagedDriver, start_headless_edge, session_pages)
+    done = run_workers(functools.partial(open_backend, backend, sqlite_path, 2), 'silpo',
+                       functools.partial(process_task, archive=archive, js=js), make_driver, workers,
+                       {urlparse(url).netloc for _, url in CATEGORIES}, per_host, idle_exit)
+    default_limiter.report()
+    json_path, _ = default_metrics.write_reports('silpo_worker', metrics_dir)
+    print(f"Виконано завдань черги: {done}")
+    print(f"Звіт воркера: {json_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Парсер Silpo")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="кількість паралельних headless-сеансів (1 — браузер на порту 9222)")
+    parser.add_argument('--per-host', type=int, default=2,
+                        help="максимум одночасних завантажень сторінок на сайт")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="кількість рядків в одному INSERT")
+    parser.add_argument('--load-data', action='store_true',
+                        help="записувати через LOAD DATA LOCAL INFILE")
+    parser.add_argument('--append', action='store_true',
+                        help="дописувати рядки в таблицю без інкрементального злиття")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="не зберігати завантажені сторінки в архів")
+    parser.add_argument('--replay', action='store_true',
+                        help="розібрати сторінки з архіву замість обходу сайту")
+    parser.add_argument('--js-extract', action='store_true',
+                        help="витягувати картки JavaScript-функцією в браузері (разом із --no-archive "
+                             "page_source не передається взагалі)")
+    parser.add_argument('--api', action='store_true',
+                        help="отримувати товари з JSON API сайту, перехопивши перший запит браузера")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="кількість одночасних запитів до API")
+    parser.add_argument('--api-base-url', default=None,
+                        help="адреса сервера API замість справжнього (наприклад, локальна копія)")
+    parser.add_argument('--api-template', default=None,
+                        help="адреса запиту API з {category} замість перехоплення браузером")
+    parser.add_argument('--export', choices=export_formats(), default=export_formats()[0],
+                        help="формат файлу з товарами: Parquet з розділами store/date/category або CSV")
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help="тека для JSON-звіту та файлу Prometheus textfile collector")
+    parser.add_argument('--resume', action='store_true',
+                        help="продовжити перерваний запуск: завершені сторінки взяти з журналу")
+    parser.add_argument('--browser', choices=['edge', 'chromium'], default='edge',
+                        help="edge — браузер з портом 9222 (або headless Edge для --workers); chromium — "
+                             "керовані headless-сеанси без зображень, шрифтів і лічильників")
+    parser.add_argument('--session-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help="після скількох сторінок перезапускати сеанс Chromium або headless Edge (--workers, воркери черги)")
+    parser.add_argument('--db', choices=['mysql', 'sqlite'], default='mysql',
+                        help="сховище: пул з'єднань MySQL або локальна база SQLite (WAL)")
+    parser.add_argument('--sqlite-path', default=SQLITE_PATH,
+                        help="файл бази для --db sqlite")
+    parser.add_argument('--db-writers', type=int,
+                        help="кількість потоків запису в БД (за замовчуванням — як --workers)")
+    parser.add_argument('--schedule', action='store_true',
+                        help="обходити лише категорії, час яких настав за частотою змін, і зупиняти "
+                             "категорію, якщо перші сторінки не змінилися")
+    parser.add_argument('--images', action='store_true',
+                        help="після запису завантажити зображення нових товарів у локальний кеш з мініатюрами")
+    parser.add_argument('--match', action='store_true',
+                        help="після запису перебудувати пари ATB↔Silpo (product_matches); вмикати для "
+                             "парсера, що запускається другим, коли товари обох магазинів уже записано")
+    parser.add_argument('--queue', action='store_true',
+                        help="координатор: поставити категорії в спільну чергу в БД і записувати сторінки, "
+                             "які обробили воркери (з --resume — продовжити незавершену чергу)")
+    parser.add_argument('--queue-worker', action='store_true',
+                        help="воркер: брати сторінки зі спільної черги (--db має вказувати на ту саму БД); "
+                             "можна запускати на кількох машинах, --workers — сеансів на цій машині")
+    parser.add_argument('--idle-exit', type=int, default=IDLE_EXIT,
+                        help="через скільки секунд без завдань воркер завершується")
+    parser.add_argument('--queue-timeout', type=int, default=QUEUE_TIMEOUT,
+                        help="через скільки секунд координатор перестає чекати воркерів; незавершені "
+                             "сторінки позначаються невдалими (продовжити: --queue --resume)")
+    args = parser.parse_args()
+    if args.queue_worker:
+        run_queue_worker(workers=args.workers, per_host=args.per_host, archive=not args.no_archive,
+                         js=args.js_extract, browser=args.browser, session_pages=args.session_pages,
+                         backend=args.db, sqlite_path=args.sqlite_path, idle_exit=args.idle_exit,
+                         metrics_dir=args.metrics_dir)
+    else:
+        main(workers=args.workers, per_host=args.per_host,
+             batch_size=args.batch_size, use_load_data=args.load_data,
+             incremental=not args.append, archive=not args.no_archive, replay=args.replay,
+             js=args.js_extract, api=args.api, concurrency=args.concurrency,
+             base_url=args.api_base_url, api_template=args.api_template, export=args.export,
+             metrics_dir=args.metrics_dir, resume=args.resume, browser=args.browser,
+             session_pages=args.session_pages,
+             backend=args.db, sqlite_path=args.sqlite_path, db_writers=args.db_writers,
+             schedule=args.schedule, images=args.images, queue=args.queue,
+             queue_timeout=args.queue_timeout, match=args.match)
@@ -0,0 +1,224 @@
+import asyncio
+import base64
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import aiohttp
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from http_client import FetchError, fetch_page, rebase_url
+from parsers import silpo_unit_and_quantity
+from records import Product
+from metrics import default_metrics
+
+# Частина адреси JSON-запиту, яким SPA отримує список товарів категорії
+API_URL_MARKER = '/products'
+OFFSET_PARAM = 'offset'
+LIMIT_PARAM = 'limit'
+IMAGE_URL_TEMPLATE = "https://images.silpo.ua/v2/products/300x300/webp/{icon}"
+
+# Заголовки, які не можна або не варто переносити з перехопленого запиту
+_SKIP_HEADERS = {'host', 'content-length', 'connection', 'accept-encoding', 'cookie'}
+
+
+def category_slug(url):
+    """Ідентифікатор категорії з адреси сторінки (https://silpo.ua/category/ryba-4430 -> ryba-4430)"""
+    return urlsplit(url).path.rstrip('/').split('/')[-1]
+
+
+def read_network_log(driver):
+    """Повертає події Network.* з журналу продуктивності браузера"""
+    events = []
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message['method'].startswith('Network.'):
+            events.append(message)
+    return events
+
+
+def capture_product_responses(driver, url, timeout=15):
+    """Відкриває сторінку категорії й повертає перехоплені JSON-відповіді зі списком товарів
+
+    Кожен елемент — ({'url': ..., 'headers': {...}}, розібраний JSON).
+    """
+    read_network_log(driver)  # Відкидаємо події попередніх сторінок
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "div.products-list"))
+    )
+
+    requests = {}
+    captured = []
+    for event in read_network_log(driver):
+        params = event['params']
+        if event['method'] == 'Network.requestWillBeSent':
+            requests[params['requestId']] = params['request']
+        elif event['method'] == 'Network.responseReceived':
+            response = params['response']
+            if API_URL_MARKER not in response['url'] or 'json' not in response.get('mimeType', ''):
+                continue
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+            except Exception as e:
+                print(f"Не вдалося прочитати відповідь {response['url']}: {e}")
+                continue
+            text = base64.b64decode(body['body']).decode('utf-8') if body.get('base64Encoded') else body['body']
+            request = requests.get(params['requestId'], {'url': response['url'], 'headers': {}})
+            headers = {name: value for name, value in request.get('headers', {}).items()
+                       if not name.startswith(':') and name.lower() not in _SKIP_HEADERS}
+            captured.append(({'url': response['url'], 'headers': headers}, json.loads(text)))
+    return captured
+
+
+def _items(payload):
+    if isinstance(payload, dict):
+        for key in ('items', 'products'):
+            if isinstance(payload.get(key), list):
+                return payload[key]
+        if isinstance(payload.get('data'), dict):
+            return _items(payload['data'])
+    return []
+
+
+def _total(payload):
+    if isinstance(payload, dict):
+        for key in ('total', 'count', 'totalCount'):
+            if isinstance(payload.get(key), int):
+                return payload[key]
+        if isinstance(payload.get('data'), dict):
+            return _total(payload['data'])
+    return None
+
+
+def product_from_item(item):
+    """Перетворює товар з JSON API на запис у форматі extract_products"""
+    name = item.get('title') or item.get('name')
+    price = item.get('displayPrice', item.get('price'))
+    if not name or price is None:
+        return None
+    old_price = item.get('displayOldPrice') or item.get('oldPrice')
+    discount = None
+    if old_price and float(old_price) > float(price):
+        discount = f"-{round((1 - float(price) / float(old_price)) * 100)}%"
+
+    unit, quantity = silpo_unit_and_quantity(name, item.get('displayRatio'))
+
+    image_url = item.get('icon') or item.get('image')
+    if image_url and not image_url.startswith('http'):
+        image_url = IMAGE_URL_TEMPLATE.format(icon=image_url.lstrip('/'))
+
+    return Product(
+        name=name.strip(),
+        price=float(price),
+        price_bot=float(old_price) if old_price else None,
+        discount=discount,
+        unit=unit,
+        quantity=quantity,
+        image_url=image_url,
+        is_available=bool(item.get('stock', True)),
+    )
+
+
+def products_from_payload(payload, category_name):
+    products = []
+    for item in _items(payload):
+        try:
+            record = product_from_item(item)
+            if record:
+                record.category = category_name
+                products.append(record)
+        except Exception as e:
+            print(f"Помилка розбору товару з API: {e}")
+    return products
+
+
+def with_query(url, **params):
+    """Повертає URL із заміненими параметрами запиту"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def remaining_page_urls(request_url, payload):
+    """Адреси решти сторінок API за offset/limit першого запиту та загальною кількістю"""
+    query = dict(parse_qsl(urlsplit(request_url).query))
+    total = _total(payload)
+    if total is None or LIMIT_PARAM not in query:
+        return []
+    limit = int(query[LIMIT_PARAM])
+    offset = int(query.get(OFFSET_PARAM, 0))
+    return [with_query(request_url, **{OFFSET_PARAM: next_offset})
+            for next_offset in range(offset + limit, total, limit)]
+
+
+async def _fetch_json(urls, headers, concurrency, timeout=30):
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        texts = await asyncio.gather(*(fetch_page(session, semaphore, url, headers=headers) for url in urls))
+    return [json.loads(text) for text in texts]
+
+
+def fetch_json(urls, headers=None, concurrency=4):
+    """Завантажує JSON-сторінки API пулом keep-alive з'єднань"""
+    if not urls:
+        return []
+    return asyncio.run(_fetch_json(urls, headers, concurrency))
+
+
+def crawl_api(driver, categories, concurrency=4, base_url=None, api_template=None, incomplete=None):
+    """Обходить категорії Silpo через JSON API
+
+    Перший запит API перехоплюється з мережевого журналу браузера (CDP); для
+    наступних категорій адреса будується з нього заміною ідентифікатора
+    категорії, а всі сторінки завантажуються HTTP-клієнтом без браузера.
+    api_template (адреса з {category}) дозволяє обійтися без браузера взагалі,
+    base_url — спрямувати запити на локальний сервер. Категорії, частину
+    сторінок яких не вдалося завантажити, додаються в множину incomplete.
+    """
+    template = None
+    if api_template:
+        template = {'url': api_template, 'headers': {}, 'slug': '{category}'}
+
+    for category_name, url in categories:
+        slug = category_slug(url)
+        request, payload = None, None
+        try:
+            if template and template['slug'] in template['url']:
+                request = {'url': rebase_url(template['url'].replace(template['slug'], slug), base_url),
+                           'headers': template['headers']}
+                with default_metrics.timer('api_fetch', store='silpo', category=category_name):
+                    payload = fetch_json([request['url']], request['headers'], concurrency)[0]
+            elif driver is not None:
+                with default_metrics.timer('api_capture', store='silpo', category=category_name):
+                    captured = capture_product_responses(driver, url)
+                if captured:
+                    request, payload = captured[0]
+                    template = {'url': request['url'], 'headers': request['headers'], 'slug': slug}
+                    request = {'url': rebase_url(request['url'], base_url), 'headers': request['headers']}
+        except (FetchError, ValueError) as e:
+            print(f"Помилка API для категорії {category_name}: {e}")
+
+        if payload is None:
+            print(f"Не знайдено JSON API для категорії {category_name}")
+            continue
+
+        products = products_from_payload(payload, category_name)
+        yield category_name, products
+
+        urls = remaining_page_urls(request['url'], payload)
+        total = len(products)
+        try:
+            with default_metrics.timer('api_fetch', store='silpo', category=category_name):
+                payloads = fetch_json(urls, request['headers'], concurrency)
+            for page_payload in payloads:
+                page_products = products_from_payload(page_payload, category_name)
+                total += len(page_products)
+                yield category_name, page_products
+        except (FetchError, ValueError) as e:
+            if incomplete is not None:
+                incomplete.add(category_name)
+            print(f"Помилка API для категорії {category_name}: {e}")
+        print(f"Всього товарів у категорії {category_name} (API, {len(urls) + 1} запитів): {total}")
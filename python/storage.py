@@ -0,0 +1,243 @@
+import hashlib
+import os
+import tempfile
+import time
+from dialects import distinct_from, update_join
+from price_history import HISTORY_DDL, SQLITE_HISTORY_DDL, record_changes, record_vanished
+from search import SEARCH_INDEX
+
+DEFAULT_BATCH_SIZE = 500
+
+# Колонки інкрементального завантаження та нормалізованої ціни, які додаються й до вже існуючих таблиць
+IDENTITY_COLUMNS = ('product_key', 'content_hash')
+INCREMENTAL_COLUMNS = {
+    'product_key': 'CHAR(40) NULL',
+    'content_hash': 'CHAR(40) NULL',
+    'is_available': 'BOOLEAN DEFAULT TRUE',
+    'base_unit': 'VARCHAR(4) NULL',
+    'base_quantity': 'DECIMAL(12,4) NULL',
+    'price_per_kg_or_l': 'DECIMAL(12,2) NULL',
+    'old_price_per_kg_or_l': 'DECIMAL(12,2) NULL',
+    'search_text': 'VARCHAR(800) NULL',
+    'image_path': 'VARCHAR(100) NULL',
+}
+INCREMENTAL_INDEXES = {
+    'uq_product_key': 'UNIQUE INDEX uq_product_key (product_key)',
+    'idx_unit_price': 'INDEX idx_unit_price (base_unit, price_per_kg_or_l)',
+    'ft_search': SEARCH_INDEX,
+}
+
+# Таблиці, для яких CREATE TABLE уже виконано: (сервер, порт, база, таблиця)
+_ready_tables = set()
+
+
+def _database_key(conn):
+    """Сервер і база з'єднання; id() обгорток пулу перевикористовується, тож за ним кешувати не можна"""
+    return getattr(conn, 'server_host', None), getattr(conn, 'server_port', None), getattr(conn, 'database', None)
+
+
+def ensure_table(conn, table, ddl, columns=None, indexes=None):
+    """Виконує CREATE TABLE IF NOT EXISTS один раз на базу даних за процес
+
+    columns та indexes — словники назва -> визначення; відсутні в існуючій
+    таблиці колонки та індекси додаються через ALTER TABLE.
+    """
+    key = (*_database_key(conn), table)
+    if key in _ready_tables:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(ddl)
+        if columns:
+            cursor.execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            for name, definition in columns.items():
+                if name not in existing:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        if indexes:
+            cursor.execute(
+                "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            for name, definition in indexes.items():
+                if name not in existing:
+                    cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+        conn.commit()
+    finally:
+        cursor.close()
+    _ready_tables.add(key)
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _tsv_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    text = str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _load_data(cursor, table, columns, rows):
+    """Завантажує рядки через LOAD DATA LOCAL INFILE з тимчасового файлу"""
+    fd, path = tempfile.mkstemp(suffix='.tsv')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            for row in rows:
+                f.write('\t'.join(_tsv_value(value) for value in row))
+                f.write('\n')
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+            (path.replace('\\', '/'),)
+        )
+    finally:
+        os.remove(path)
+
+
+def bulk_insert(conn, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False,
+                ignore_duplicates=False):
+    """Вставляє рядки пачками в одній транзакції та повідомляє швидкість запису
+
+    executemany у mysql.connector перетворює пачку на один багаторядковий INSERT.
+    use_load_data вимагає з'єднання з allow_local_infile=True.
+    ignore_duplicates пропускає рядки з уже наявним унікальним ключем.
+    """
+    if not rows:
+        return 0
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        if use_load_data:
+            _load_data(cursor, table, columns, rows)
+        else:
+            query = (f"INSERT {'IGNORE ' if ignore_duplicates else ''}INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(['%s'] * len(columns))})")
+            for chunk in _chunks(rows, batch_size):
+                cursor.executemany(query, chunk)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {table}: {len(rows)} рядків за {elapsed:.2f} с ({len(rows) / max(elapsed, 1e-9):.0f} рядків/с)")
+    return len(rows)
+
+
+# --- Інкрементальне завантаження ---
+
+def normalize_name(name):
+    """Нормалізує назву товару для ідентифікації: регістр та пробіли"""
+    return ' '.join(name.casefold().split())
+
+
+def product_key(store, name, image_url):
+    """Стабільний ідентифікатор товару: магазин + нормалізована назва + зображення"""
+    identity = f"{store}|{normalize_name(name)}|{image_url or ''}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def content_hash(values):
+    """Хеш вмісту рядка, за яким визначається, чи змінився товар"""
+    payload = '|'.join('' if value is None else str(value) for value in values)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def with_identity(store, columns, rows):
+    """Додає до рядків product_key та content_hash"""
+    name_index = columns.index('name')
+    image_index = columns.index('image_url')
+    return [
+        row + (product_key(store, row[name_index], row[image_index]), content_hash(row))
+        for row in rows
+    ]
+
+
+def staging_table(table):
+    """Назва проміжної таблиці для інкрементального завантаження"""
+    return f"{table}_staging"
+
+
+def begin_incremental(conn, table):
+    """Створює порожню проміжну таблицю з тією ж структурою, що й основна"""
+    staging = staging_table(table)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TABLE {staging} LIKE {table}")
+        conn.commit()
+    finally:
+        cursor.close()
+    print(f"🧱 Проміжна таблиця {staging} готова")
+
+
+def merge_incremental(conn, table, columns, store=None, partial_categories=(), dialect='mysql'):
+    """Переносить зміни з проміжної таблиці в основну однією транзакцією
+
+    Оновлюються лише рядки зі зміненим content_hash, нові товари додаються
+    з наявністю, отриманою під час обходу, а товари, яких більше немає в
+    обійдених категоріях, позначаються недоступними. Основна таблиця весь час лишається заповненою.
+    Якщо задано store, у тій самій транзакції дописується price_history.
+    Категорії partial_categories обійдено не повністю (збій чи блокування
+    сторінки, recrawl зупинив обхід), тож відсутні в них товари не знімаються з продажу.
+    dialect ('mysql' або 'sqlite') змінює лише фрагменти з dialects.py.
+    """
+    staging = staging_table(table)
+    data_columns = [column for column in columns if column != 'is_available']
+    assignments = [(column, f"s.{column}") for column in data_columns] + [
+        ('content_hash', 's.content_hash'), ('is_available', 'COALESCE(s.is_available, TRUE)'),
+        ('scraped_at', 'CURRENT_TIMESTAMP')]
+    changed_filter = (f"l.content_hash <> s.content_hash OR "
+                      f"{distinct_from('l.is_available', 'COALESCE(s.is_available, TRUE)', dialect)}")
+    insert_columns = ', '.join(data_columns + list(IDENTITY_COLUMNS))
+    select_columns = ', '.join(f"s.{column}" for column in data_columns + list(IDENTITY_COLUMNS))
+    skip = f" AND l.category NOT IN ({', '.join(['%s'] * len(partial_categories))})" if partial_categories else ''
+
+    if store and dialect == 'sqlite':
+        conn.executescript(SQLITE_HISTORY_DDL)
+    elif store:
+        ensure_table(conn, 'price_history', HISTORY_DDL)
+    history = 0
+    cursor = conn.cursor()
+    try:
+        if store:
+            history += record_changes(cursor, store, table, staging, dialect)
+        cursor.execute(update_join(table, staging, assignments, changed_filter, dialect))
+        changed = cursor.rowcount
+        cursor.execute(f"""
+            INSERT INTO {table} ({insert_columns}, is_available)
+            SELECT {select_columns}, COALESCE(s.is_available, TRUE)
+            FROM {staging} s LEFT JOIN {table} l ON l.product_key = s.product_key
+            WHERE l.id IS NULL
+        """)
+        added = cursor.rowcount
+        if store:
+            history += record_vanished(cursor, store, table, staging, partial_categories)
+        cursor.execute(f"""
+            UPDATE {table} AS l SET is_available = FALSE
+            WHERE NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.product_key = l.product_key)
+              AND l.is_available IS NOT FALSE
+              AND l.category IN (SELECT category FROM (SELECT DISTINCT category FROM {staging}) c){skip}
+        """, tuple(partial_categories))
+        vanished = cursor.rowcount
+        conn.commit()
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    print(f"🔄 {table}: змінено {changed}, нових {added}, недоступних {vanished}"
+          + (f", точок історії цін {history}" if store else ""))
+    return changed, added, vanished
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+import threading
+import pytest
+from aiohttp import web
+
+# Модулі парсерів лежать у python/ без пакета, як і під час запуску скриптів
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'info', 'fixtures')
+
+
+def read_fixture(name, mode='r'):
+    with open(os.path.join(FIXTURES_DIR, name), mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+        return f.read()
+
+
+@pytest.fixture
+def stand_in_server():
+    """Локальний сервер aiohttp замість сайту: start(handler) повертає базову адресу
+
+    Сервер працює у фоновому потоці, бо клієнти скраперів самі викликають asyncio.run.
+    """
+    servers = []
+
+    def start(handler):
+        ready = threading.Event()
+        state = {}
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            app = web.Application()
+            app.router.add_route('*', '/{tail:.*}', handler)
+            runner = web.AppRunner(app)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', 0).start())
+            state.update(loop=loop, port=runner.addresses[0][1])
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        assert ready.wait(10), "сервер не запустився"
+        servers.append((state['loop'], thread))
+        return f"http://127.0.0.1:{state['port']}"
+
+    yield start
+    for loop, thread in servers:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(10)
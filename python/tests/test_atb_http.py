@@ -0,0 +1,62 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from atb_http import crawl_http, parse_cookies
+from http_client import FetchError, fetch_page
+from conftest import read_fixture
+
+CATEGORY = ("Бакалія", "https://www.atbmarket.com/catalog/285-bakaliya")
+
+
+def catalog_handler(cookies):
+    """Каталог ATB із фікстур: без cookie віку — сторінка без карток"""
+    async def handler(request):
+        if any(request.cookies.get(name) != value for name, value in cookies.items()):
+            return web.Response(text="<html><button class='custom-blue-btn'>Мені є 18</button></html>",
+                                content_type='text/html')
+        page = request.query.get('page', '1')
+        fixture = 'atb_page_1.html' if page in ('1', '2') else 'atb_page_3.html'
+        return web.Response(text=read_fixture(fixture), content_type='text/html')
+    return handler
+
+
+def test_crawl_http_reads_all_pages_from_stand_in(stand_in_server):
+    base_url = stand_in_server(catalog_handler(parse_cookies('age_confirmed=1')))
+    results = list(crawl_http([CATEGORY], base_url=base_url, archive=False))
+    # Сторінки віддаються окремо; пагінація фікстури — 3 сторінки: 36 + 36 + 21 картка
+    assert [name for name, _ in results] == [CATEGORY[0]] * 3
+    assert sorted(len(products) for _, products in results) == [21, 36, 36]
+    assert {product.category for _, products in results for product in products} == {CATEGORY[0]}
+
+
+def test_crawl_http_sends_configured_age_cookie(stand_in_server):
+    base_url = stand_in_server(catalog_handler({'adult': 'yes'}))
+    assert list(crawl_http([CATEGORY], base_url=base_url, archive=False)) == []
+    results = list(crawl_http([CATEGORY], base_url=base_url, archive=False, cookies=parse_cookies('adult=yes')))
+    assert sum(len(products) for _, products in results) == 93
+
+
+async def fetch(url):
+    async with aiohttp.ClientSession() as session:
+        return await fetch_page(session, asyncio.Semaphore(1), url, retries=3, backoff=0.01)
+
+
+@pytest.mark.parametrize('status, retried', [(503, True), (429, True), (404, False), (403, False)])
+def test_fetch_page_retries_only_transient_statuses(stand_in_server, status, retried):
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        if len(hits) == 1:
+            return web.Response(status=status)
+        return web.Response(text=read_fixture('atb_page_3.html'), content_type='text/html')
+
+    url = stand_in_server(handler) + '/catalog/siri'
+    if retried:
+        assert 'catalog-item' in asyncio.run(fetch(url))
+        assert len(hits) == 2
+    else:
+        with pytest.raises(FetchError, match=str(status)):
+            asyncio.run(fetch(url))
+        assert len(hits) == 1
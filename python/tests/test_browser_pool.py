@@ -0,0 +1,73 @@
+import functools
+import threading
+import ht
+from browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Замість Chromium: рахує запуски сеансів і віддає адресу як сторінку"""
+    started = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        with FakeDriver.lock:
+            FakeDriver.started += 1
+        self.url = None
+
+    def get(self, url):
+        self.url = url
+
+    def execute_script(self, script):
+        return 'complete'
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    @property
+    def page_source(self):
+        return f"<html>{self.url}</html>"
+
+    def quit(self):
+        pass
+
+
+def test_save_pages_html_reuses_pool_sessions(monkeypatch, tmp_path):
+    FakeDriver.started = 0
+    monkeypatch.setattr(ht, 'BrowserPool', functools.partial(BrowserPool, make_driver=FakeDriver))
+    urls = [f"https://silpo.ua/category/ryba-4430?page={page}" for page in range(1, 7)]
+    ht.save_pages_html(urls, str(tmp_path), sessions=2)
+    for index, url in enumerate(urls, 1):
+        assert (tmp_path / f"page{index}.html").read_text(encoding='utf-8') == f"<html>{url}</html>"
+    assert 1 <= FakeDriver.started <= 2
+
+
+def test_pool_session_recycled_after_page_limit():
+    FakeDriver.started = 0
+    pool = BrowserPool(1, make_driver=FakeDriver, max_pages=2)
+    try:
+        for page in range(5):
+            with pool.session() as driver:
+                driver.get(f"https://www.atbmarket.com/catalog/siri?page={page}")
+    finally:
+        pool.close()
+    assert FakeDriver.started == 3
+
+
+class BrokenDriver(FakeDriver):
+    """Сеанс, що ламається на першій сторінці"""
+
+    def get(self, url):
+        if FakeDriver.started == 1:
+            raise RuntimeError("session deleted because of page crash")
+        super().get(url)
+
+
+def test_save_pages_html_recycles_broken_session(monkeypatch, tmp_path):
+    FakeDriver.started = 0
+    monkeypatch.setattr(ht, 'BrowserPool', functools.partial(BrowserPool, make_driver=BrokenDriver))
+    urls = [f"https://silpo.ua/category/ryba-4430?page={page}" for page in range(1, 4)]
+    ht.save_pages_html(urls, str(tmp_path), sessions=1)
+    # Перша сторінка втрачена, але зламаний сеанс замінено новим для решти
+    assert not (tmp_path / "page1.html").exists()
+    assert (tmp_path / "page2.html").exists() and (tmp_path / "page3.html").exists()
+    assert FakeDriver.started == 2
@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+import pytest
+from aiohttp import web
+import images
+from backends import SQLiteBackend
+from storage import with_identity
+
+COLUMNS = ('name', 'price', 'image_url', 'category')
+
+
+def png(color):
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def image_handler(blobs, hits, unconditional_304=()):
+    """Сервер зображень з ETag; шляхи unconditional_304 спершу відповідають 304 навіть без умовного запиту"""
+    async def handler(request):
+        data = blobs.get(request.path)
+        if data is None:
+            hits.append((request.path, 404))
+            return web.Response(status=404)
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag or (
+                request.path in unconditional_304 and not any(path == request.path for path, _ in hits)):
+            hits.append((request.path, 304))
+            return web.Response(status=304, headers={'ETag': etag})
+        hits.append((request.path, 200))
+        return web.Response(body=data, content_type='image/png', headers={'ETag': etag})
+    return handler
+
+
+@pytest.fixture
+def products_db(tmp_path):
+    db = SQLiteBackend(str(tmp_path / 'products.db'))
+    db.prepare('atb_products', incremental=False)
+
+    def add(names):
+        rows = [(name, 10.0, f"https://www.atbmarket.com/images/products/{name}.png", 'Сири') for name in names]
+        db.insert('atb_products', COLUMNS + ('product_key', 'content_hash'), with_identity('atb', COLUMNS, rows))
+
+    db.add = add
+    yield db
+    db.close()
+
+
+def image_paths(db):
+    with db.connection() as conn:
+        return dict(conn.execute("SELECT name, image_path FROM atb_products").fetchall())
+
+
+def test_images_deduplicated_and_revalidated(stand_in_server, products_db, tmp_path):
+    red, blue = png('red'), png('blue')
+    hits = []
+    base_url = stand_in_server(image_handler({'/images/products/a.png': red, '/images/products/b.png': red,
+                                              '/images/products/c.png': blue}, hits))
+    images_dir = str(tmp_path / 'images')
+    products_db.add(['a', 'b', 'c', 'd'])
+
+    assert images.update_product_images(products_db, 'atb_products', base_url=base_url,
+                                        images_dir=images_dir) == 3
+    paths = image_paths(products_db)
+    # Однаковий вміст за різними URL зберігається один раз
+    assert paths['a'] == paths['b'] != paths['c']
+    assert paths['d'] is None
+    assert {path for path in paths.values() if path} == {
+        f"objects/{digest[:2]}/{digest}.png" for digest in (hashlib.sha256(red).hexdigest(),
+                                                           hashlib.sha256(blue).hexdigest())}
+    thumbnail = os.path.join(images_dir, images.thumbnail_path(paths['c']))
+    assert os.path.exists(thumbnail)
+    # 404 не повторюється
+    assert sorted(status for _, status in hits) == [200, 200, 200, 404]
+
+    hits.clear()
+    assert images.update_product_images(products_db, 'atb_products', base_url=base_url, images_dir=images_dir,
+                                        refresh=True) == 3
+    assert sorted(status for _, status in hits) == [304, 304, 304, 404]
+    assert image_paths(products_db) == paths
+
+
+def test_unconditional_304_is_refetched(stand_in_server, products_db, tmp_path):
+    hits = []
+    data = png('green')
+    base_url = stand_in_server(image_handler({'/images/products/e.png': data}, hits,
+                                             unconditional_304={'/images/products/e.png'}))
+    products_db.add(['e'])
+
+    assert images.update_product_images(products_db, 'atb_products', base_url=base_url,
+                                        images_dir=str(tmp_path / 'images'), thumbnails=False) == 1
+    assert [status for _, status in hits] == [304, 200]
+    assert image_paths(products_db)['e'] == f"objects/{hashlib.sha256(data).hexdigest()[:2]}/" \
+                                            f"{hashlib.sha256(data).hexdigest()}.png"
@@ -0,0 +1,34 @@
+import os
+import pytest
+from js_extract import extract_fixture, fixture_pages
+
+PAGES = fixture_pages()
+
+
+@pytest.fixture(scope='module')
+def driver():
+    """Headless Chromium або Edge; якщо жоден не запускається, тести пропускаються"""
+    from browser_pool import start_headless_chromium
+    from parallel import start_headless_edge
+    errors = []
+    for start in (start_headless_chromium, start_headless_edge):
+        try:
+            driver = start()
+            break
+        except Exception as e:
+            errors.append(str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__)
+    else:
+        pytest.skip(f"браузер недоступний: {'; '.join(errors)}")
+    yield driver
+    driver.quit()
+
+
+def test_fixtures_present():
+    assert {store for store, _ in PAGES} == {'atb', 'silpo'}
+
+
+@pytest.mark.parametrize('store, path', PAGES, ids=[os.path.basename(path) for _, path in PAGES])
+def test_js_extract_matches_bs4(driver, store, path):
+    (products, page_count), (expected, expected_pages) = extract_fixture(driver, store, path)
+    assert products == expected
+    assert page_count == expected_pages
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import atb
+import silpo
+from backends import SQLiteBackend
+from matching import rebuild_matches
+from records import Product
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def store(db, module, table, products):
+    module.prepare_database(db, incremental=True)
+    module.save_to_database(db, products, incremental=True)
+    db.merge(table, module.COLUMNS, store=module.__name__)
+
+
+def test_matching_and_price_history_run_on_sqlite(tmp_path):
+    path = str(tmp_path / 'products.db')
+    db = SQLiteBackend(path)
+    try:
+        store(db, atb, 'atb_products', [Product(name='Сир «President» Гауда 45% 200 г', price=89.9, category='Сири'),
+                                        Product(name='Хліб житній', price=25.0, category='Хліб')])
+        store(db, silpo, 'silpo_products', [Product(name='Сир Гауда 45% «President» 200г', price=94.5,
+                                                    category='Сири')])
+        assert rebuild_matches(db) == 1
+        # Повторний запуск замінює пари, а не дописує їх
+        assert rebuild_matches(db) == 1
+        with db.connection() as conn:
+            (atb_name, silpo_name), = conn.execute(
+                "SELECT a.name, s.name FROM product_matches m "
+                "JOIN atb_products a ON a.product_key = m.atb_key "
+                "JOIN silpo_products s ON s.product_key = m.silpo_key").fetchall()
+        assert 'Гауда' in atb_name and 'Гауда' in silpo_name
+    finally:
+        db.close()
+
+    result = subprocess.run([sys.executable, 'price_history.py', 'atb', 'Гауда', '--db', 'sqlite',
+                             '--sqlite-path', path], cwd=PYTHON_DIR, capture_output=True, text=True,
+                            encoding='utf-8', check=True)
+    assert 'Сир «President» Гауда 45% 200 г' in result.stdout
+    assert '89.9' in result.stdout
@@ -0,0 +1,30 @@
+import silpo
+from backends import SQLiteBackend
+from records import Product
+
+
+def crawl(db, products):
+    silpo.prepare_database(db, incremental=True)
+    silpo.save_to_database(db, products, incremental=True)
+    db.merge('silpo_products', silpo.COLUMNS, store='silpo')
+    with db.connection() as conn:
+        stored = dict(conn.execute("SELECT name, is_available FROM silpo_products").fetchall())
+        history = conn.execute("SELECT is_available FROM price_history ORDER BY id").fetchall()
+    return stored, [row[0] for row in history]
+
+
+def test_out_of_stock_products_are_stored_unavailable(tmp_path):
+    db = SQLiteBackend(str(tmp_path / 'products.db'))
+    try:
+        stored, history = crawl(db, [Product(name='Сир А', price=10.0, category='Сири', is_available=False),
+                                     Product(name='Сир Б', price=12.0, category='Сири')])
+        assert stored == {'Сир А': 0, 'Сир Б': 1}
+        assert sorted(history) == [0, 1]
+
+        # Товар знову в наявності: рядок оновлюється, в історії нова точка
+        stored, history = crawl(db, [Product(name='Сир А', price=10.0, category='Сири'),
+                                     Product(name='Сир Б', price=12.0, category='Сири')])
+        assert stored == {'Сир А': 1, 'Сир Б': 1}
+        assert sorted(history) == [0, 1, 1]
+    finally:
+        db.close()
@@ -0,0 +1,24 @@
+import glob
+import os
+import pytest
+from conftest import FIXTURES_DIR, read_fixture
+from parsers import parse_atb_page, parse_silpo_page, available_engines
+
+PAGE_PARSERS = {'atb': parse_atb_page, 'silpo': parse_silpo_page}
+PAGES = sorted(
+    (store, os.path.basename(path))
+    for store in PAGE_PARSERS
+    for path in glob.glob(os.path.join(FIXTURES_DIR, f"{store}_page_*.html"))
+)
+
+
+@pytest.mark.parametrize('engine', [engine for engine in available_engines() if engine != 'bs4'])
+@pytest.mark.parametrize('store,name', PAGES)
+def test_engine_matches_bs4(store, name, engine):
+    html = read_fixture(name)
+    parse = PAGE_PARSERS[store]
+    products, page_count = parse(html, engine)
+    reference, reference_count = parse(html, 'bs4')
+    assert products, "фікстура без товарів нічого не перевіряє"
+    assert products == reference
+    assert page_count == reference_count
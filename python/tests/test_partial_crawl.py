@@ -0,0 +1,85 @@
+import functools
+import time
+import pytest
+import silpo
+from backends import SQLiteBackend
+from checkpoint import CrawlJournal
+from recrawl import RecrawlScheduler
+from records import Product
+
+CATEGORY = ("Сири", "https://silpo.ua/category/syry-1468")
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def run_crawl(monkeypatch, tmp_path):
+    """Запускає silpo.main на SQLite без браузера
+
+    pages — {номер сторінки: назви товарів або None для сторінки блокування}.
+    Повертає ({назва: is_available}, кількість точок «недоступний» в історії цін).
+    """
+    sqlite_path = str(tmp_path / 'products.db')
+    monkeypatch.setattr(silpo, '__file__', str(tmp_path / 'silpo.py'))
+    monkeypatch.setattr(silpo, 'CATEGORIES', [CATEGORY])
+    monkeypatch.setattr(silpo, 'CrawlJournal', functools.partial(CrawlJournal, path=str(tmp_path / 'checkpoints.db')))
+    monkeypatch.setattr(silpo, 'connect_to_existing_edge', lambda capture_network=False: FakeDriver())
+    monkeypatch.setattr(silpo, 'RecrawlScheduler',
+                        functools.partial(RecrawlScheduler, path=str(tmp_path / 'recrawl.db')))
+
+    def run(pages, schedule=False):
+        def load_page(driver, url, category_name, current_page, archive=True, js=False):
+            names = pages[current_page]
+            if names is None:
+                return None
+            return [Product(name=name, price=10.0) for name in names], len(pages)
+
+        monkeypatch.setattr(silpo, 'load_page', load_page)
+        # CSV пишеться поруч із підміненим silpo.__file__, тобто в tmp_path, а не в info/parquet репозиторію
+        silpo.main(archive=False, export='csv', backend='sqlite', sqlite_path=sqlite_path,
+                   metrics_dir=str(tmp_path / 'metrics'), schedule=schedule)
+        db = SQLiteBackend(sqlite_path)
+        try:
+            with db.connection() as conn:
+                products = dict(conn.execute("SELECT name, is_available FROM silpo_products").fetchall())
+                vanished = conn.execute("SELECT COUNT(*) FROM price_history WHERE is_available = 0").fetchall()[0][0]
+        finally:
+            db.close()
+        return products, vanished
+
+    run.scheduler = lambda: RecrawlScheduler('silpo', path=str(tmp_path / 'recrawl.db'))
+    return run
+
+
+FULL = {1: ['Сир А', 'Сир Б'], 2: ['Сир В', 'Сир Г', 'Сир Д']}
+
+
+@pytest.mark.parametrize('second_page', [None, []], ids=['blocked', 'empty'])
+def test_cut_short_crawl_marks_nothing_vanished(run_crawl, second_page):
+    run_crawl(FULL)
+    products, vanished = run_crawl({1: FULL[1], 2: second_page})
+    assert products == dict.fromkeys(FULL[1] + FULL[2], 1)
+    assert vanished == 0
+
+
+def test_complete_crawl_marks_missing_products_vanished(run_crawl):
+    run_crawl(FULL)
+    products, vanished = run_crawl({1: FULL[1], 2: FULL[2][:2]})
+    assert products['Сир Д'] == 0
+    assert sum(products.values()) == 4
+    assert vanished == 1
+
+
+@pytest.mark.parametrize('second_page, retried', [(None, True), (FULL[2], False)], ids=['blocked', 'complete'])
+def test_cut_short_category_is_recrawled_soon(run_crawl, second_page, retried):
+    run_crawl({1: FULL[1], 2: second_page}, schedule=True)
+    scheduler = run_crawl.scheduler()
+    try:
+        # Через дві години настає лише повтор категорії, обійденої не повністю
+        due = scheduler.due([CATEGORY], now=time.time() + 2 * 3600)
+    finally:
+        scheduler.close()
+    assert due == ([CATEGORY] if retried else [])
@@ -0,0 +1,76 @@
+import json
+import pytest
+from aiohttp import web
+import silpo
+from backends import SQLiteBackend
+from silpo_api import crawl_api
+from conftest import read_fixture
+
+RECORDED = json.loads(read_fixture('silpo_api_responses.json'))
+CATEGORIES = [("Риба", "https://silpo.ua/category/ryba-4430"), ("Сири", "https://silpo.ua/category/syry-1468")]
+
+
+def replay_handler(hits, missing=()):
+    """Відповідає записаними відповідями API; незаписані та missing (категорія, offset) — 404"""
+    responses = {(item['category'], item['offset']): item for item in RECORDED['responses']}
+
+    async def handler(request):
+        hits.append(request.path_qs)
+        key = (request.query.get('category'), int(request.query.get('offset', 0)))
+        recorded = None if key in missing else responses.get(key)
+        if recorded is None:
+            return web.Response(status=404)
+        return web.json_response(recorded['body'], status=recorded['status'])
+    return handler
+
+
+def test_crawl_api_pages_through_recorded_responses(stand_in_server):
+    hits = []
+    base_url = stand_in_server(replay_handler(hits))
+    incomplete = set()
+    results = list(crawl_api(None, CATEGORIES, base_url=base_url, api_template=RECORDED['template'],
+                             incomplete=incomplete))
+
+    assert [len(products) for name, products in results if name == 'Риба'] == [3, 3, 1]
+    assert [len(products) for name, products in results if name == 'Сири'] == [3]
+    # Сторінка offset=3 категорії «Сири» не завантажилася: категорія обійдена не повністю
+    assert incomplete == {'Сири'}
+    assert len(hits) == 5
+
+    fish = {product.name: product for name, products in results if name == 'Риба' for product in products}
+    shrimp = fish['Креветки варено-морожені 500г']
+    assert shrimp.is_available is False
+    assert shrimp.image_url == 'https://images.silpo.ua/v2/products/300x300/webp/e5aa-krevetky.png'
+    assert fish['Скумбрія холодного копчення'].discount == '-15%'
+    assert (fish['Форель слабосолена 120г'].unit, fish['Форель слабосолена 120г'].quantity) == ('г', 120.0)
+
+
+@pytest.fixture
+def run_api_crawl(monkeypatch, tmp_path, stand_in_server):
+    """Запускає silpo.main --api на SQLite проти стенда; повертає {назва: is_available} категорії «Риба»"""
+    sqlite_path = str(tmp_path / 'products.db')
+    monkeypatch.setattr(silpo, '__file__', str(tmp_path / 'silpo.py'))
+    monkeypatch.setattr(silpo, 'CATEGORIES', CATEGORIES)
+
+    def run(missing=()):
+        base_url = stand_in_server(replay_handler([], missing))
+        # export='csv' пише поруч із підміненим silpo.__file__, а не в info/parquet репозиторію
+        silpo.main(api=True, api_template=RECORDED['template'], base_url=base_url, archive=False, export='csv',
+                   backend='sqlite', sqlite_path=sqlite_path, metrics_dir=str(tmp_path / 'metrics'))
+        db = SQLiteBackend(sqlite_path)
+        try:
+            with db.connection() as conn:
+                return dict(conn.execute("SELECT name, is_available FROM silpo_products "
+                                         "WHERE category = 'Риба'").fetchall())
+        finally:
+            db.close()
+
+    return run
+
+
+def test_failed_api_page_keeps_products_available(run_api_crawl):
+    first = run_api_crawl()
+    assert len(first) == 7
+    assert first['Креветки варено-морожені 500г'] == 0
+    # Остання сторінка категорії не завантажилася: її товари не знімаються з продажу
+    assert run_api_crawl(missing={('ryba-4430', 6)}) == first
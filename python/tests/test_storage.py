@@ -0,0 +1,100 @@
+import re
+import storage
+
+
+class RecordingCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rowcount = 1
+
+    def execute(self, query, params=()):
+        self.log.append((' '.join(query.split()), tuple(params)))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    """З'єднання без бази: записує запити, які виконав би mysql.connector"""
+
+    def __init__(self, database='prices', server_host='db', server_port=3306):
+        self.database = database
+        self.server_host = server_host
+        self.server_port = server_port
+        self.log = []
+
+    def cursor(self):
+        return RecordingCursor(self.log)
+
+    def commit(self):
+        self.log.append(('COMMIT', ()))
+
+    def rollback(self):
+        self.log.append(('ROLLBACK', ()))
+
+
+COLUMNS = ('category', 'name', 'price', 'is_available')
+
+
+def merge_statements(monkeypatch, dialect):
+    monkeypatch.setattr(storage, '_ready_tables', set())
+    conn = RecordingConnection()
+    if dialect == 'sqlite':
+        conn.executescript = lambda script: conn.log.append(('SCRIPT', ()))
+    storage.merge_incremental(conn, 'atb_products', COLUMNS, store='atb', partial_categories=['Сири'],
+                              dialect=dialect)
+    return conn.log
+
+
+def test_mysql_merge_statements(monkeypatch):
+    log = merge_statements(monkeypatch, 'mysql')
+    queries = [query for query, _ in log]
+    assert [re.match(r'\w+( \w+)?', query).group() for query in queries] == [
+        'CREATE TABLE', 'COMMIT', 'INSERT INTO', 'UPDATE atb_products', 'INSERT INTO', 'INSERT INTO',
+        'UPDATE atb_products', 'COMMIT', 'DROP TABLE']
+    history, update, insert, vanished_history, vanished, _, drop = queries[2:]
+    assert history.startswith('INSERT INTO price_history')
+    assert 'NOT (l.price <=> s.price)' in history
+    assert 'NOT (l.is_available <=> COALESCE(s.is_available, TRUE))' in history
+    assert update.startswith('UPDATE atb_products l JOIN atb_products_staging s ON l.product_key = s.product_key '
+                             'SET l.category = s.category, l.name = s.name, l.price = s.price, '
+                             'l.content_hash = s.content_hash, l.is_available = COALESCE(s.is_available, TRUE), '
+                             'l.scraped_at = CURRENT_TIMESTAMP WHERE l.content_hash <> s.content_hash OR '
+                             'NOT (l.is_available <=> COALESCE(s.is_available, TRUE))')
+    assert insert.startswith('INSERT INTO atb_products (category, name, price, product_key, content_hash, '
+                             'is_available) SELECT s.category, s.name, s.price')
+    assert vanished_history.startswith('INSERT INTO price_history')
+    assert vanished.startswith('UPDATE atb_products AS l SET is_available = FALSE WHERE NOT EXISTS')
+    assert drop == 'DROP TABLE IF EXISTS atb_products_staging'
+    # Неповні категорії передаються параметрами обом запитам про зниклі товари
+    assert log[5][1] == ('atb', 'Сири') and log[6][1] == ('Сири',)
+    assert all(query.count('%s') == len(params) for query, params in log)
+
+
+def test_sqlite_merge_differs_only_in_dialect_fragments(monkeypatch):
+    mysql = [query for query, _ in merge_statements(monkeypatch, 'mysql')]
+    sqlite = [query for query, _ in merge_statements(monkeypatch, 'sqlite')]
+    assert '<=>' not in ' '.join(sqlite)
+    assert sqlite[0] == 'SCRIPT'
+    assert sqlite[1] == mysql[2].replace('NOT (l.price <=> s.price)', 'l.price IS NOT s.price') \
+        .replace('NOT (l.price_bot <=> s.price_bot)', 'l.price_bot IS NOT s.price_bot') \
+        .replace('NOT (l.discount <=> s.discount)', 'l.discount IS NOT s.discount') \
+        .replace('NOT (l.is_available <=> COALESCE(s.is_available, TRUE))',
+                 'l.is_available IS NOT COALESCE(s.is_available, TRUE)')
+    assert sqlite[2].startswith('UPDATE atb_products AS l SET category = s.category, name = s.name')
+    assert sqlite[2].endswith('FROM atb_products_staging AS s WHERE l.product_key = s.product_key AND '
+                              '(l.content_hash <> s.content_hash OR '
+                              'l.is_available IS NOT COALESCE(s.is_available, TRUE))')
+    assert sqlite[3:] == mysql[4:]
+
+
+def test_ensure_table_runs_once_per_database(monkeypatch):
+    monkeypatch.setattr(storage, '_ready_tables', set())
+    first, recycled, other = RecordingConnection(), RecordingConnection(), RecordingConnection(database='other')
+    for conn in (first, recycled, other):
+        storage.ensure_table(conn, 'price_history', 'CREATE TABLE IF NOT EXISTS price_history (id INT)')
+    # Нове з'єднання до тієї ж бази DDL не повторює, до іншої бази — виконує
+    assert len(first.log) == 2 and recycled.log == [] and len(other.log) == 2
@@ -0,0 +1,66 @@
+import parallel
+from rate_limiter import AdaptiveRateLimiter, default_limiter
+from conftest import read_fixture
+from page_archive import archive_page, replay_archive
+from records import Product
+
+CATEGORIES = [('Сири', 'https://example.test/cheese'), ('Риба', 'https://example.test/fish'),
+              ('Хліб', 'https://example.test/bread')]
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+def iter_pages(driver, url, category_name):
+    for page in range(1, 4):
+        yield [Product(name=f"{category_name} {page}", price=float(page), category=category_name)]
+
+
+def test_crawl_parallel_yields_each_page(monkeypatch):
+    # Робочі процеси успадковують підміну й стартують без паузи
+    monkeypatch.setattr(parallel.random, 'uniform', lambda low, high: 0)
+    results = list(parallel.crawl_parallel(iter_pages, CATEGORIES, workers=2, make_driver=FakeDriver))
+    assert len(results) == 9
+    assert all(len(products) == 1 for _, products in results)
+    assert sorted(products[0].name for _, products in results) == sorted(
+        f"{name} {page}" for name, _ in CATEGORIES for page in range(1, 4))
+
+
+def iter_pages_with_failure(driver, url, category_name):
+    yield [Product(name=f"{category_name} 1", price=default_limiter.max_rate, category=category_name)]
+    if category_name == 'Риба':
+        raise RuntimeError("сторінку заблоковано")
+
+
+def test_crawl_parallel_reports_failed_categories_and_shares_rate(monkeypatch):
+    monkeypatch.setattr(parallel.random, 'uniform', lambda low, high: 0)
+    failed = set()
+    results = list(parallel.crawl_parallel(iter_pages_with_failure, CATEGORIES, workers=2,
+                                           make_driver=FakeDriver, failed=failed))
+    # Помилка в категорії не зупиняє решту частки, а сама категорія стає неповною
+    assert failed == {'Риба'}
+    assert sorted(category for category, _ in results) == ['Риба', 'Сири', 'Хліб']
+    # Кожен із двох процесів отримав половину швидкості сайту
+    assert {products[0].price for _, products in results} == {default_limiter.max_rate / 2}
+
+
+def test_limiter_share_divides_rates():
+    limiter = AdaptiveRateLimiter(rate=0.3, max_rate=0.9)
+    limiter.wait('https://silpo.ua/category/ryba-4430')
+    limiter.share(3)
+    assert limiter.max_rate == 0.3
+    assert limiter.stats()['silpo.ua']['rate'] == 0.1
+
+
+def test_replay_archive_yields_pages_in_order(tmp_path):
+    archive_dir = str(tmp_path / 'archive')
+    html = {1: read_fixture('atb_page_1.html'), 2: read_fixture('atb_page_1.html'), 3: read_fixture('atb_page_3.html')}
+    for category in ('Сири', 'Риба'):
+        for page, text in html.items():
+            archive_page('atb', category, page, f"https://example.test/{page}", text, archive_dir)
+
+    results = list(replay_archive('atb', [('Риба', ''), ('Сири', '')], workers=1, archive_dir=archive_dir))
+    assert [(category, len(products)) for category, products in results] == [
+        ('Риба', 36), ('Риба', 36), ('Риба', 21), ('Сири', 36), ('Сири', 36), ('Сири', 21)]
@@ -0,0 +1,67 @@
+import functools
+import sqlite3
+import threading
+import time
+import work_queue
+from backends import SQLiteBackend, open_backend
+from records import Product
+from work_queue import WorkQueue, crawl_queue
+
+CATEGORIES = [('Сири', 'https://example.test/cheese'), ('Риба', 'https://example.test/fish')]
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+def table_exists(path):
+    conn = sqlite3.connect(path)
+    try:
+        return bool(conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'crawl_tasks'").fetchall())
+    finally:
+        conn.close()
+
+
+def test_worker_started_before_coordinator(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    open_db = functools.partial(open_backend, 'sqlite', path)
+    processed = []
+
+    def process_task(driver, task):
+        processed.append((task.category, task.page))
+        return [Product(name=f"{task.category} {task.page}", price=10.0)], None, []
+
+    # Воркер стартує на порожній базі й сам створює таблицю черги, координатор — пізніше
+    worker = threading.Thread(target=work_queue._worker_process,
+                              args=(open_db, 'atb', process_task, FakeDriver, 1))
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not table_exists(path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert worker.is_alive()
+    db = SQLiteBackend(path)
+    try:
+        results = list(crawl_queue(WorkQueue(db, 'atb'), CATEGORIES, poll=0.1, timeout=30))
+    finally:
+        worker.join()
+        db.close()
+    assert sorted(processed) == [('Риба', 1), ('Сири', 1)]
+    assert sorted(category for category, _ in results) == ['Риба', 'Сири']
+
+
+def test_coordinator_deadline_reports_unclaimed_tasks(tmp_path, capsys):
+    db = SQLiteBackend(str(tmp_path / 'queue.db'))
+    queue = WorkQueue(db, 'silpo')
+    try:
+        assert list(crawl_queue(queue, CATEGORIES, poll=0.05, timeout=0.2, idle_notice=0.1)) == []
+        output = capsys.readouterr().out
+        assert "жоден воркер не взяв завдань silpo" in output
+        assert "Жоден воркер не взяв 2 завдань: Риба (сторінка 1), Сири (сторінка 1)" in output
+        # Незавершені категорії стають неповними, а --resume поверне їх у чергу
+        assert sorted(queue.failed_categories()) == ['Риба', 'Сири']
+        assert queue.unclaimed() == []
+        queue.start(CATEGORIES, resume=True)
+        assert queue.progress() == {'pending': 2}
+    finally:
+        db.close()
@@ -0,0 +1,62 @@
+import re
+
+# Одиниця виміру -> (базова одиниця, множник до неї); спільна для обох магазинів
+UNIT_TABLE = {
+    'г': ('кг', 0.001),
+    'гр': ('кг', 0.001),
+    'g': ('кг', 0.001),
+    'кг': ('кг', 1.0),
+    'kg': ('кг', 1.0),
+    'мл': ('л', 0.001),
+    'ml': ('л', 0.001),
+    'л': ('л', 1.0),
+    'l': ('л', 1.0),
+    'шт': ('шт', 1.0),
+    'уп': ('шт', 1.0),
+}
+_UNIT_RE = re.compile(
+    r'^(' + '|'.join(sorted(map(re.escape, UNIT_TABLE), key=len, reverse=True)) + r')\.?$'
+)
+
+# Колонки з нормалізованою ціною, які додаються до таблиць обох магазинів
+UNIT_COLUMNS = ('base_unit', 'base_quantity', 'price_per_kg_or_l', 'old_price_per_kg_or_l')
+
+
+def base_unit(unit):
+    """Базова одиниця та множник для підпису одиниці ("Кг.", "гр", "мл"); None — невідома"""
+    if not unit:
+        return None
+    match = _UNIT_RE.match(unit.strip().lower())
+    return UNIT_TABLE[match.group(1)] if match else None
+
+
+def normalize_batch(products):
+    """Заповнює base_unit, base_quantity та ціни за кг/л/шт для пачки товарів
+
+    Один прохід по пачці з кешем розібраних підписів одиниць. Товар без
+    кількості вважається ціною за одну базову одиницю (ваговий товар за кг,
+    штучний за шт); для грамів/мілілітрів без кількості ціна не рахується.
+    """
+    units = {}
+    for product in products:
+        unit = product.unit
+        if unit not in units:
+            units[unit] = base_unit(unit)
+        base = units[unit]
+        if base is None:
+            product.base_unit = product.base_quantity = None
+            product.price_per_kg_or_l = product.old_price_per_kg_or_l = None
+            continue
+
+        product.base_unit, factor = base
+        if product.quantity:
+            quantity = product.quantity * factor
+        elif factor == 1.0:
+            quantity = 1.0
+        else:
+            quantity = None
+        product.base_quantity = round(quantity, 4) if quantity else None
+        product.price_per_kg_or_l = round(product.price / quantity, 2) if quantity else None
+        product.old_price_per_kg_or_l = (round(product.price_bot / quantity, 2)
+                                         if quantity and product.price_bot else None)
+    return products
@@ -0,0 +1,442 @@
+import json
+import multiprocessing
+import os
+import random
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from parallel import PoliteDriver, _init_worker
+from records import Product
+from metrics import default_metrics
+
+QUEUE_TABLE = 'crawl_tasks'
+# Скільки секунд завдання належить воркеру; після цього його може взяти інший
+DEFAULT_LEASE = 600
+MAX_ATTEMPTS = 3
+# Затримка перед повтором невдалого завдання, подвоюється з кожною спробою
+RETRY_DELAY = 30
+# Воркер завершується, якщо стільки секунд у черзі немає завдань
+IDLE_EXIT = 60
+POLL_INTERVAL = 2.0
+# Координатор припиняє чекати воркерів через стільки секунд
+QUEUE_TIMEOUT = 4 * 3600
+
+QUEUE_DDL = {
+    'mysql': """
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            store VARCHAR(20) NOT NULL,
+            category VARCHAR(255) NOT NULL,
+            url VARCHAR(512) NOT NULL,
+            page INT NOT NULL,
+            status VARCHAR(10) NOT NULL DEFAULT 'pending',
+            owner VARCHAR(100) NULL,
+            lease_until DOUBLE NOT NULL DEFAULT 0,
+            attempts INT NOT NULL DEFAULT 0,
+            page_count INT NULL,
+            products MEDIUMTEXT NULL,
+            error VARCHAR(500) NULL,
+            collected BOOLEAN NOT NULL DEFAULT FALSE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE INDEX uq_task (store, category, page),
+            INDEX idx_claim (store, status, lease_until)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+    """,
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            store TEXT NOT NULL,
+            category TEXT NOT NULL,
+            url TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            owner TEXT,
+            lease_until REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            page_count INTEGER,
+            products TEXT,
+            error TEXT,
+            collected INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (store, category, page)
+        )
+    """,
+}
+SQLITE_QUEUE_INDEX = "CREATE INDEX IF NOT EXISTS idx_crawl_tasks_claim ON crawl_tasks (store, status, lease_until)"
+
+# Умова, за якої завдання можна взяти: нове, відкладене після помилки або з простроченою орендою
+CLAIMABLE = "status IN ('pending', 'leased') AND lease_until <= %s AND attempts < %s"
+
+
+class TaskError(Exception):
+    """Сторінку не вдалося обробити; завдання повертається в чергу для повтору"""
+
+
+@dataclass(slots=True)
+class QueueTask:
+    """Завдання черги: одна сторінка категорії магазину"""
+    id: int
+    category: str
+    url: str
+    page: int
+    attempts: int
+
+
+def page_url(base_url, page):
+    return f"{base_url}?page={page}" if page > 1 else base_url
+
+
+def follow_pages(page, products, page_count, min_products, max_pages):
+    """Сторінки, які треба поставити в чергу після обробленої (як в iter_category_pages)
+
+    Перша сторінка з пагінацією додає решту сторінок; без пагінації наступна
+    сторінка додається лише після повної (min_products товарів).
+    """
+    if page == 1 and page_count:
+        return list(range(2, min(page_count, max_pages) + 1))
+    if not page_count and len(products) >= min_products and page < max_pages:
+        return [page + 1]
+    return []
+
+
+def _query(conn, query, params=()):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.commit()  # завершує читання, щоб наступний запит бачив свіжі дані
+        return rows
+    finally:
+        cursor.close()
+
+
+def _update(conn, query, params=()):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        conn.commit()
+        return cursor.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+class WorkQueue:
+    """Спільна черга завдань обходу в таблиці crawl_tasks сховища (MySQL або SQLite)
+
+    Координатор ставить у чергу першу сторінку кожної категорії; воркер, що
+    обробив сторінку, додає наступні. Воркер бере завдання в оренду на lease
+    секунд: якщо він зник, після закінчення оренди завдання бере інший.
+    Невдалі завдання повторюються з паузою, що подвоюється, не більше
+    max_attempts разів. Товари сторінки записуються в рядок завдання, і
+    координатор забирає їх у свій конвеєр запису.
+    """
+
+    def __init__(self, db, store, lease=DEFAULT_LEASE, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self.db = db
+        self.store = store
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def prepare(self):
+        def action(conn):
+            if self.db.dialect == 'sqlite':
+                _update(conn, QUEUE_DDL['sqlite'])
+                _update(conn, SQLITE_QUEUE_INDEX)
+            else:
+                _update(conn, QUEUE_DDL['mysql'])
+        self.db.run(action)
+
+    def start(self, categories, resume=False):
+        """Ставить у чергу першу сторінку кожної категорії
+
+        З resume=True незавершена черга магазину продовжується: невдалі завдання
+        повторюються, а вже виконані сторінки віддаються координатору ще раз
+        (проміжна таблиця наповнюється заново).
+        """
+        self.prepare()
+        unfinished = self.progress()
+        if resume and (unfinished.get('pending') or unfinished.get('leased') or unfinished.get('failed')):
+            self.db.run(lambda conn: _update(
+                conn, f"UPDATE {QUEUE_TABLE} SET status = 'pending', attempts = 0, lease_until = 0 "
+                      f"WHERE store = %s AND status = 'failed'", (self.store,)))
+            self.db.run(lambda conn: _update(
+                conn, f"UPDATE {QUEUE_TABLE} SET collected = 0 WHERE store = %s", (self.store,)))
+            print(f"♻️ Продовження черги {self.store}: {self.progress()}")
+            return
+        if resume:
+            print(f"⚠️ Незавершеної черги {self.store} немає, починаємо спочатку")
+        self.db.run(lambda conn: _update(conn, f"DELETE FROM {QUEUE_TABLE} WHERE store = %s", (self.store,)))
+        self.add([(name, url, 1) for name, url in categories])
+        print(f"📬 Черга {self.store}: {len(categories)} категорій")
+
+    def add(self, tasks):
+        """Додає завдання (категорія, url, сторінка); наявні в черзі пропускаються"""
+        if not tasks:
+            return
+        rows = [(self.store, category, url, page) for category, url, page in tasks]
+        query = f"INSERT IGNORE INTO {QUEUE_TABLE} (store, category, url, page) VALUES (%s, %s, %s, %s)"
+
+        def action(conn):
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(query, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self.db.run(action)
+
+    def claim(self, owner, candidates=5):
+        """Бере в оренду одне завдання або повертає None, якщо брати нічого
+
+        Кілька воркерів можуть вибрати ті самі рядки; завдання дістається тому,
+        чий UPDATE з тією ж умовою змінив рядок першим.
+        """
+        def action(conn):
+            now = time.time()
+            # Спершу перші сторінки: вони додають у чергу решту сторінок категорій
+            rows = _query(conn, f"SELECT id FROM {QUEUE_TABLE} WHERE store = %s AND {CLAIMABLE} "
+                                f"ORDER BY page, id LIMIT {int(candidates)}",
+                          (self.store, now, self.max_attempts))
+            ids = [row[0] for row in rows]
+            random.shuffle(ids)
+            for task_id in ids:
+                claimed = _update(conn, f"UPDATE {QUEUE_TABLE} SET status = 'leased', owner = %s, "
+                                        f"lease_until = %s, attempts = attempts + 1 WHERE id = %s AND {CLAIMABLE}",
+                                  (owner, now + self.lease, task_id, now, self.max_attempts))
+                if claimed:
+                    row = _query(conn, f"SELECT id, category, url, page, attempts FROM {QUEUE_TABLE} WHERE id = %s",
+                                 (task_id,))[0]
+                    return QueueTask(*row)
+            return None
+        return self.db.run(action)
+
+    def complete(self, task, owner, products, page_count=None, next_pages=()):
+        """Записує товари сторінки й додає наступні сторінки; False, якщо оренду вже втрачено"""
+        data = json.dumps([dict(product.to_dict(), category=task.category) for product in products],
+                          ensure_ascii=False)
+        rows = [(self.store, task.category, task.url, page) for page in next_pages]
+
+        def action(conn):
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"UPDATE {QUEUE_TABLE} SET status = 'done', products = %s, page_count = %s, "
+                               f"error = NULL WHERE id = %s AND owner = %s AND status = 'leased'",
+                               (data, page_count, task.id, owner))
+                if not cursor.rowcount:
+                    conn.rollback()
+                    return False
+                if rows:
+                    cursor.executemany(f"INSERT IGNORE INTO {QUEUE_TABLE} (store, category, url, page) "
+                                       f"VALUES (%s, %s, %s, %s)", rows)
+                conn.commit()
+                return True
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        return self.db.run(action)
+
+    def fail(self, task, owner, error):
+        """Повертає завдання в чергу з паузою або, після max_attempts спроб, позначає невдалим"""
+        if task.attempts >= self.max_attempts:
+            status, available_at = 'failed', 0
+        else:
+            status, available_at = 'pending', time.time() + self.retry_delay * 2 ** (task.attempts - 1)
+        self.db.run(lambda conn: _update(
+            conn, f"UPDATE {QUEUE_TABLE} SET status = %s, lease_until = %s, error = %s "
+                  f"WHERE id = %s AND owner = %s AND status = 'leased'",
+            (status, available_at, str(error)[:500], task.id, owner)))
+        return status
+
+    def expire(self):
+        """Позначає невдалими завдання, оренда яких минула після останньої спроби"""
+        return self.db.run(lambda conn: _update(
+            conn, f"UPDATE {QUEUE_TABLE} SET status = 'failed', error = COALESCE(error, 'оренду втрачено') "
+                  f"WHERE store = %s AND status IN ('pending', 'leased') AND attempts >= %s AND lease_until <= %s",
+            (self.store, self.max_attempts, time.time())))
+
+    def collect(self):
+        """Виконані сторінки, яких координатор ще не забрав: (категорія, сторінка, товари, кількість сторінок)"""
+        rows = self.db.run(lambda conn: _query(
+            conn, f"SELECT id, category, page, page_count, products FROM {QUEUE_TABLE} "
+                  f"WHERE store = %s AND status = 'done' AND collected = 0 ORDER BY category, page",
+            (self.store,)))
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        self.db.run(lambda conn: _update(
+            conn, f"UPDATE {QUEUE_TABLE} SET collected = 1 WHERE id IN ({', '.join(['%s'] * len(ids))})",
+            tuple(ids)))
+        return [(category, page, [Product(**item) for item in json.loads(products)], page_count)
+                for _, category, page, page_count, products in rows]
+
+    def progress(self):
+        """Кількість завдань магазину за статусами"""
+        rows = self.db.run(lambda conn: _query(
+            conn, f"SELECT status, COUNT(*) FROM {QUEUE_TABLE} WHERE store = %s GROUP BY status", (self.store,)))
+        return {status: count for status, count in rows}
+
+    def unclaimed(self):
+        """Завдання, яких жоден воркер ще не брав: (категорія, сторінка)"""
+        return self.db.run(lambda conn: _query(
+            conn, f"SELECT category, page FROM {QUEUE_TABLE} WHERE store = %s AND status = 'pending' "
+                  f"AND attempts = 0 ORDER BY category, page", (self.store,)))
+
+    def abandon(self, error):
+        """Позначає невдалими всі незавершені завдання магазину; --resume поверне їх у чергу"""
+        return self.db.run(lambda conn: _update(
+            conn, f"UPDATE {QUEUE_TABLE} SET status = 'failed', error = %s "
+                  f"WHERE store = %s AND status IN ('pending', 'leased')", (error, self.store)))
+
+    def failed_categories(self):
+        """Категорії, частину сторінок яких так і не оброблено"""
+        rows = self.db.run(lambda conn: _query(
+            conn, f"SELECT DISTINCT category FROM {QUEUE_TABLE} WHERE store = %s AND status = 'failed'",
+            (self.store,)))
+        return [row[0] for row in rows]
+
+
+def crawl_queue(queue, categories, resume=False, scheduler=None, poll=POLL_INTERVAL, timeout=QUEUE_TIMEOUT,
+                idle_notice=IDLE_EXIT):
+    """Координатор: ставить категорії в чергу й віддає (категорія, товари) сторінок від воркерів
+
+    Завершується, коли в черзі не лишилося завдань, що очікують чи виконуються,
+    або через timeout секунд: тоді незавершені завдання позначаються невдалими,
+    а їхні категорії — неповними. Якщо за idle_notice секунд жоден воркер не
+    взяв завдання, про це виводиться попередження.
+    scheduler лише записує відбитки сторінок і частоту змін: сторінки обробляють
+    різні воркери, тож обхід категорії не зупиняється.
+    """
+    queue.start(categories, resume)
+    started = time.monotonic()
+    noticed = False
+    last = None
+    while True:
+        queue.expire()
+        # Стан черги до collect: усе, що виконано до цього моменту, буде забрано нижче
+        progress = queue.progress()
+        for category, page, products, page_count in queue.collect():
+            default_metrics.count('queue_pages', store=queue.store, category=category)
+            if scheduler:
+                scheduler.check_page(category, page, products, page_count)
+            print(f"📥 {category}, сторінка {page}: {len(products)} товарів")
+            yield category, products
+        if progress != last:
+            print(f"📬 Черга {queue.store}: {progress}")
+            last = progress
+        if not progress.get('pending') and not progress.get('leased'):
+            break
+        elapsed = time.monotonic() - started
+        if not noticed and elapsed > idle_notice and progress == {'pending': len(queue.unclaimed())}:
+            print(f"⚠️ За {int(elapsed)} с жоден воркер не взяв завдань {queue.store}: чи запущено --queue-worker "
+                  f"з тією самою --db?")
+            noticed = True
+        if elapsed > timeout:
+            unclaimed = queue.unclaimed()
+            print(f"⏰ Черга {queue.store} не завершилася за {timeout} с: {progress}")
+            if unclaimed:
+                print(f"🔴 Жоден воркер не взяв {len(unclaimed)} завдань: "
+                      + ", ".join(f"{category} (сторінка {page})" for category, page in unclaimed))
+            queue.abandon('не виконано до дедлайну координатора')
+            break
+        time.sleep(poll)
+
+    if scheduler:
+        for category_name, _ in categories:
+            scheduler.finish_category(category_name)
+    failed = queue.failed_categories()
+    if failed:
+        print(f"🔴 Не всі сторінки оброблено: {', '.join(failed)}. Повторити: --queue --resume")
+
+
+def run_worker(queue, process_task, make_driver, owner=None, idle_exit=IDLE_EXIT, poll=POLL_INTERVAL):
+    """Воркер: бере завдання з черги й обробляє їх одним браузером, доки черга не порожня idle_exit секунд
+
+    process_task(driver, task) повертає (товари, кількість сторінок, наступні сторінки)
+    або кидає виняток, і тоді завдання повторюється пізніше. Повертає кількість виконаних завдань.
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    driver = None
+    done = 0
+    idle_since = time.monotonic()
+    try:
+        while True:
+            task = queue.claim(owner)
+            if task is None:
+                if time.monotonic() - idle_since > idle_exit:
+                    break
+                time.sleep(poll)
+                continue
+            # Браузер запускається лише тоді, коли з'явилася робота
+            if driver is None:
+                driver = make_driver()
+            try:
+                products, page_count, next_pages = process_task(driver, task)
+            except Exception as e:
+                default_metrics.count('queue_retries', store=queue.store, category=task.category)
+                status = queue.fail(task, owner, e)
+                print(f"🔴 {task.category}, сторінка {task.page} (спроба {task.attempts}): {e}"
+                      + (" — завдання невдале" if status == 'failed' else " — повтор пізніше"))
+            else:
+                if queue.complete(task, owner, products, page_count, next_pages):
+                    done += 1
+                    default_metrics.count('queue_tasks', store=queue.store, category=task.category)
+                    print(f"✅ {task.category}, сторінка {task.page}: {len(products)} товарів"
+                          + (f", у черзі ще сторінки {next_pages[0]}–{next_pages[-1]}" if next_pages else ""))
+                else:
+                    print(f"⚠️ {task.category}, сторінка {task.page}: оренду втрачено, результат відкинуто")
+            idle_since = time.monotonic()
+    finally:
+        if driver is not None:
+            driver.quit()
+    print(f"🏁 Воркер {owner}: виконано завдань {done}")
+    return done
+
+
+def _worker_process(open_db, store, process_task, make_driver, idle_exit):
+    db = open_db()
+    if db is None:
+        return 0, default_metrics.snapshot()
+    try:
+        queue = WorkQueue(db, store)
+        # Воркер може стартувати раніше за координатора, який створює таблицю черги
+        queue.prepare()
+        done = run_worker(queue, process_task,
+                          lambda: PoliteDriver(make_driver()), idle_exit=idle_exit)
+    finally:
+        db.close()
+    return done, default_metrics.snapshot()
+
+
+def run_workers(open_db, store, process_task, make_driver, workers=1, hosts=(), per_host=2, idle_exit=IDLE_EXIT):
+    """Запускає workers воркерів черги на цій машині, кожен у своєму процесі й браузері
+
+    open_db відкриває сховище з чергою в кожному процесі. Як і в crawl_parallel,
+    одночасних завантажень з одного сайту (hosts) не більше per_host, а швидкість
+    адаптивного обмежувача ділиться між воркерами цієї машини.
+    """
+    if workers <= 1:
+        return _worker_process(open_db, store, process_task, make_driver, idle_exit)[0]
+    host_limits = {host: multiprocessing.BoundedSemaphore(per_host) for host in hosts}
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(host_limits, None, workers)) as pool:
+        futures = [pool.submit(_worker_process, open_db, store, process_task, make_driver, idle_exit)
+                   for _ in range(workers)]
+        for future in futures:
+            try:
+                count, snapshot = future.result()
+                default_metrics.merge(snapshot)
+                done += count
+            except Exception as e:
+                print(f"🔴 Помилка воркера: {e}")
+    return done
@@ -12,10 +12,11 @@ export class AppController {
     @Query('name') name: string,
     @Query('category') category: string,
     @Query('sortOrder') sortOrder: 'asc' | 'desc' = 'asc',
+    @Query('baseUnit') baseUnit?: string,
   ): Promise<IPro[]> {
-    const filteredProducts = await this.productService.getFilteredATBProducts(name, category);
-    const withCalculatedPrices = await this.productService.calculateATBPriceForGrams(filteredProducts, grams || 100);
-    return this.productService.sortByPrice(withCalculatedPrices, sortOrder);
+    // Already sorted by base unit, then unit price in SQL
+    const filteredProducts = await this.productService.getFilteredATBProducts(name, category, sortOrder, baseUnit);
+    return this.productService.calculateATBPriceForGrams(filteredProducts, grams || 100);
   }
 
   @Get('silpo')
@@ -24,10 +25,35 @@ export class AppController {
     @Query('name') name: string,
     @Query('category') category: string,
     @Query('sortOrder') sortOrder: 'asc' | 'desc' = 'asc',
+    @Query('baseUnit') baseUnit?: string,
   ): Promise<ISilpoPro[]> {
-    const filteredProducts = await this.productService.getFilteredSilpoProducts(name, category);
-    const withCalculatedPrices = await this.productService.calculateSilpoPriceForGrams(filteredProducts, grams || 100);
-    return this.productService.sortByPrice(withCalculatedPrices, sortOrder);
+    // Already sorted by base unit, then unit price in SQL
+    const filteredProducts = await this.productService.getFilteredSilpoProducts(name, category, sortOrder, baseUnit);
+    return this.productService.calculateSilpoPriceForGrams(filteredProducts, grams || 100);
+  }
+
+  @Get('history')
+  async getPriceHistory(
+    @Query('store') store: 'atb' | 'silpo',
+    @Query('productKey') productKey: string,
+    @Query('from') from?: string,
+    @Query('to') to?: string,
+  ) {
+    return this.productService.getPriceHistory(
+      store,
+      productKey,
+      from ? new Date(from) : undefined,
+      to ? new Date(to) : undefined,
+    );
+  }
+
+  @Get('matches')
+  async getMatchedProducts(
+    @Query('name') name: string,
+    @Query('grams') grams: number,
+    @Query('minScore') minScore: number,
+  ) {
+    return this.productService.getMatchedProducts(name, Number(grams) || 100, Number(minScore) || 0.5);
   }
 
   @Get('compare')
@@ -36,7 +62,8 @@ export class AppController {
     @Query('grams') grams: number,
     @Query('category') category: string,
     @Query('sortOrder') sortOrder: 'asc' | 'desc' = 'asc',
+    @Query('baseUnit') baseUnit?: string,
   ) {
-    return this.productService.compareProducts(name, grams || 100, category, sortOrder);
+    return this.productService.compareProducts(name, grams || 100, category, sortOrder, baseUnit);
   }
 }
@@ -18,59 +18,95 @@ export interface ISilpoPro extends silpo_products {
 
 type CombinedProduct = (IPro | ISilpoPro) & { pricePerUnit: number };
 
+type SortOrder = 'asc' | 'desc';
+
+// Unit prices of different base units (кг, л, шт) are not comparable, so lists are
+// grouped by base_unit first and sorted by price_per_kg_or_l within each group
+function unitPriceOrder(sortOrder: SortOrder) {
+  return [
+    { base_unit: { sort: 'asc' as const, nulls: 'last' as const } },
+    { price_per_kg_or_l: { sort: sortOrder, nulls: 'last' as const } },
+  ];
+}
+
+// Same normalization as python/search.py::search_text, turned into a boolean-mode
+// query over the ngram FULLTEXT index: every word must be present
+export function toSearchQuery(text: string): string {
+  return text
+    .normalize('NFC')
+    .replace(/[’ʼ`´‘]/g, "'")
+    .toLowerCase()
+    .split(/\s+/)
+    .map(word => word.replace(/["+\-<>()~*@]/g, ''))
+    .filter(word => word.length >= 2)
+    .map(word => `+"${word}"`)
+    .join(' ');
+}
+
+function searchFilter(name?: string, category?: string, baseUnit?: string) {
+  const query = name ? toSearchQuery(name) : '';
+  return {
+    ...(query ? { search_text: { search: query } } : {}),
+    ...(category ? { category } : {}),
+    ...(baseUnit ? { base_unit: baseUnit } : {}),
+  };
+}
+
 @Injectable()
 export class ProductService {
   constructor(private readonly prisma: PrismaService) {}
 
   // ATB functions
-  private filterATBByName(products: atb_products[], name: string = ''): atb_products[] {
-    return products.filter(product => 
-      product.name.toLowerCase().includes(name.toLowerCase())
-    );
-  }
-
-  private filterATBByCategory(products: atb_products[], category: string = ''): atb_products[] {
-    return products.filter(product => 
-      product.category && product.category.toLowerCase() === category.toLowerCase()
-    );
-  }
-
-  private async getBaseATBProducts(): Promise<atb_products[]> {
-    return this.prisma.atb_products.findMany();
-  }
-
-  async getFilteredATBProducts(name?: string, category?: string): Promise<atb_products[]> {
-    const products = await this.getBaseATBProducts();
-    const filteredByName = this.filterATBByName(products, name || '');
-    return this.filterATBByCategory(filteredByName, category || '');
+  async getFilteredATBProducts(
+    name?: string,
+    category?: string,
+    sortOrder: SortOrder = 'asc',
+    baseUnit?: string,
+  ): Promise<atb_products[]> {
+    return this.prisma.atb_products.findMany({
+      where: { is_available: true, ...searchFilter(name, category, baseUnit) },
+      orderBy: unitPriceOrder(sortOrder),
+    });
   }
 
   // Silpo functions
-  private filterSilpoByName(products: silpo_products[], name: string = ''): silpo_products[] {
-    return products.filter(product => 
-      product.name.toLowerCase().includes(name.toLowerCase())
-    );
-  }
-
-  private filterSilpoByCategory(products: silpo_products[], category: string = ''): silpo_products[] {
-    return products.filter(product => 
-      product.category && product.category.toLowerCase() === category.toLowerCase()
-    );
-  }
-
-  private async getBaseSilpoProducts(): Promise<silpo_products[]> {
-    return this.prisma.silpo_products.findMany();
+  async getFilteredSilpoProducts(
+    name?: string,
+    category?: string,
+    sortOrder: SortOrder = 'asc',
+    baseUnit?: string,
+  ): Promise<silpo_products[]> {
+    return this.prisma.silpo_products.findMany({
+      where: { is_available: true, ...searchFilter(name, category, baseUnit) },
+      orderBy: unitPriceOrder(sortOrder),
+    });
   }
 
-  async getFilteredSilpoProducts(name?: string, category?: string): Promise<silpo_products[]> {
-    const products = await this.getBaseSilpoProducts();
-    const filteredByName = this.filterSilpoByName(products, name || '');
-    return this.filterSilpoByCategory(filteredByName, category || '');
+  // Common functions
+  // Price per kg/l (per piece for "шт") is computed once by the Python ingest.
+  // A piece price can't be scaled by weight, so "шт" rows keep it as is with x = 1
+  private normalizedPriceForGrams(product: atb_products | silpo_products, grams: number) {
+    if (product.base_unit === 'шт') {
+      return {
+        priceforx: Number(product.price_per_kg_or_l),
+        priceforxbot: product.old_price_per_kg_or_l ? Number(product.old_price_per_kg_or_l) : 0,
+        x: 1,
+      };
+    }
+    const scale = grams / 1000;
+    return {
+      priceforx: Number(product.price_per_kg_or_l) * scale,
+      priceforxbot: product.old_price_per_kg_or_l ? Number(product.old_price_per_kg_or_l) * scale : 0,
+      x: grams,
+    };
   }
 
-  // Common functions
   async calculateATBPriceForGrams(products: atb_products[], grams: number): Promise<IPro[]> {
     return products.map(product => {
+      if (product.price_per_kg_or_l != null) {
+        return { ...product, ...this.normalizedPriceForGrams(product, grams), store: 'ATB' };
+      }
+
       let quantity = 1000
       if (product.unit == "г") {
         quantity = Number(product.quantity);
@@ -92,6 +128,10 @@ export class ProductService {
 
   async calculateSilpoPriceForGrams(products: silpo_products[], grams: number): Promise<ISilpoPro[]> {
     return products.map(product => {
+      if (product.price_per_kg_or_l != null) {
+        return { ...product, ...this.normalizedPriceForGrams(product, grams), store: 'Silpo' };
+      }
+
       let quantity = product.quantity != null ? product.quantity.toNumber() : 1000;
 
       if (product.unit === "кг" || product.unit === "л") {
@@ -123,35 +163,77 @@ export class ProductService {
     });
   }
 
+  // Price history: one point per change of price, old price, discount or availability
+  async getPriceHistory(store: 'atb' | 'silpo', productKey: string, from?: Date, to?: Date) {
+    return this.prisma.price_history.findMany({
+      where: { store, product_key: productKey, recorded_at: { gte: from, lt: to } },
+      select: { recorded_at: true, price: true, price_bot: true, discount: true, is_available: true },
+      orderBy: { recorded_at: 'asc' },
+    });
+  }
+
+  // Cross-store pairs precomputed by python/matching.py
+  async getMatchedProducts(name: string = '', grams: number = 100, minScore: number = 0.5) {
+    const atbProducts = await this.prisma.atb_products.findMany({
+      where: { is_available: true, product_key: { not: null }, ...searchFilter(name) },
+    });
+    const matches = await this.prisma.product_matches.findMany({
+      where: {
+        atb_key: { in: atbProducts.map(product => product.product_key as string) },
+        score: { gte: minScore },
+      },
+      orderBy: { score: 'desc' },
+    });
+    const silpoProducts = await this.prisma.silpo_products.findMany({
+      where: { product_key: { in: matches.map(match => match.silpo_key) }, is_available: true },
+    });
+
+    const atbByKey = new Map((await this.calculateATBPriceForGrams(atbProducts, grams)).map(p => [p.product_key, p]));
+    const silpoByKey = new Map((await this.calculateSilpoPriceForGrams(silpoProducts, grams)).map(p => [p.product_key, p]));
+    return matches
+      .filter(match => silpoByKey.has(match.silpo_key))
+      .map(match => ({
+        atb: atbByKey.get(match.atb_key),
+        silpo: silpoByKey.get(match.silpo_key),
+        score: Number(match.score),
+      }));
+  }
+
   // Comparison function
   async compareProducts(
     name: string,
     grams: number = 100,
     category?: string,
-    sortOrder: 'asc' | 'desc' = 'asc'
+    sortOrder: SortOrder = 'asc',
+    baseUnit?: string,
   ): Promise<CombinedProduct[]> {
     // Get products from both stores
-    const atbProducts = await this.getFilteredATBProducts(name, category);
-    const silpoProducts = await this.getFilteredSilpoProducts(name, category);
+    const atbProducts = await this.getFilteredATBProducts(name, category, sortOrder, baseUnit);
+    const silpoProducts = await this.getFilteredSilpoProducts(name, category, sortOrder, baseUnit);
 
     // Calculate prices
     const atbWithPrices = await this.calculateATBPriceForGrams(atbProducts, grams);
     const silpoWithPrices = await this.calculateSilpoPriceForGrams(silpoProducts, grams);
 
-    // Combine and add price per unit for better comparison
+    // Combine and add price per unit for better comparison (x is 1 for "шт" rows)
     const combined: CombinedProduct[] = [
       ...atbWithPrices.map(p => ({ 
         ...p, 
-        pricePerUnit: p.priceforx / grams 
+        pricePerUnit: p.priceforx / p.x 
       })),
       ...silpoWithPrices.map(p => ({ 
         ...p, 
-        pricePerUnit: p.priceforx / grams 
+        pricePerUnit: p.priceforx / p.x 
       }))
     ];
 
-    // Sort by price per unit
+    // Group by base unit, then sort by price per unit within the group
     return combined.sort((a, b) => {
+      const unitA = a.base_unit ?? '\uffff';
+      const unitB = b.base_unit ?? '\uffff';
+      if (unitA !== unitB) {
+        return unitA < unitB ? -1 : 1;
+      }
       return sortOrder === 'asc' 
         ? a.pricePerUnit - b.pricePerUnit 
         : b.pricePerUnit - a.pricePerUnit;